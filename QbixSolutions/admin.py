@@ -1,12 +1,89 @@
-from django.contrib import admin
+import csv
+import io
+
+from django.contrib import admin, messages
+from django.contrib.admin.views.main import ChangeList
+from django.core.exceptions import PermissionDenied
+from django.db import connections, transaction
+from django.db.models import Count, Q
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import path
+from django.utils import timezone
+from . import exports, fonts, jobs, tasks
+from .forms import SubscriberImportForm
+from .pagination import EstimatedCountPaginator
+from .search import matching_ids
+from .subscribers import import_subscribers, read_csv_emails
 from .models import (
     TeamMember, Service, Portfolio, BlogPost, 
     Testimonial, JobListing, ContactSubmission, 
-    CareerApplication, NewsletterSubscriber
+    CareerApplication, NewsletterSubscriber, Job, Campaign, CampaignDelivery
 )
 
 # Register your models here.
 
+
+class ExportActionsMixin:
+    """Admin actions that stream the selected (or all filtered) rows as a file"""
+    actions = ['export_csv', 'export_json', 'export_ndjson']
+    
+    @admin.action(description='Export selected as CSV')
+    def export_csv(self, request, queryset):
+        return exports.export_response(queryset, 'csv')
+    
+    @admin.action(description='Export selected as JSON')
+    def export_json(self, request, queryset):
+        return exports.export_response(queryset, 'json')
+    
+    @admin.action(description='Export selected as NDJSON')
+    def export_ndjson(self, request, queryset):
+        return exports.export_response(queryset, 'ndjson')
+
+
+def email_prefix_filter(queryset, prefix):
+    """Rows whose email starts with ``prefix``, as a range scan on the email index"""
+    if connections[queryset.db].vendor == 'postgresql':
+        # LIKE 'prefix%' can use a varchar_pattern_ops index; a range cannot under
+        # a locale collation, where punctuation sorts out of code-point order
+        return queryset.filter(email__startswith=prefix)
+    upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    return queryset.filter(email__gte=prefix, email__lt=upper)
+
+
+class LargeTableChangeList(ChangeList):
+    def get_queryset(self, request, exclude_parameters=None):
+        queryset = super().get_queryset(request, exclude_parameters)
+        return queryset.only(*self.model_admin.list_only)
+
+
+class LargeTableAdminMixin:
+    """
+    Changelist settings for tables that grow without bound (form submissions).
+
+    The changelist is a fixed number of queries whatever the table's size: rows
+    load only the ``list_only`` columns, related objects come from a join
+    (list_select_related), large tables are not counted exactly, and there is no
+    date_hierarchy, whose year/month links are DISTINCT scans over every row.
+    Search is a prefix match on the email index (lower-cased addresses) rather
+    than a substring scan of every text column.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    list_only = ()
+    search_fields = ['email']
+    search_help_text = 'Search by the start of the email address.'
+
+    def get_changelist(self, request, **kwargs):
+        return LargeTableChangeList
+
+    def get_search_results(self, request, queryset, search_term):
+        search_term = search_term.strip().lower()
+        if not search_term:
+            return queryset, False
+        return email_prefix_filter(queryset, search_term), False
+
+
 @admin.register(TeamMember)
 class TeamMemberAdmin(admin.ModelAdmin):
     list_display = ['name', 'position', 'order']
@@ -20,6 +97,17 @@ class ServiceAdmin(admin.ModelAdmin):
     list_editable = ['order']
     search_fields = ['title']
     prepopulated_fields = {'slug': ('title',)}
+    
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        missing = fonts.missing_icons(obj.icon)
+        if missing:
+            self.message_user(
+                request,
+                f"The icon {', '.join(missing)} is not in the site's icon font yet and will not show "
+                f"until manage.py build_fonts is run and deployed.",
+                messages.WARNING,
+            )
 
 
 @admin.register(Portfolio)
@@ -37,9 +125,17 @@ class BlogPostAdmin(admin.ModelAdmin):
     list_display = ['title', 'author', 'category', 'published_date', 'featured']
     list_filter = ['category', 'featured', 'published_date']
     list_editable = ['featured']
-    search_fields = ['title', 'author', 'content']
+    search_fields = ['title', 'author']
     prepopulated_fields = {'slug': ('title',)}
     date_hierarchy = 'published_date'
+    
+    def get_search_results(self, request, queryset, search_term):
+        # Title/author via search_fields; excerpt and content via the full-text
+        # index instead of an icontains scan over the content column
+        results, may_have_duplicates = super().get_search_results(request, queryset, search_term)
+        if search_term:
+            results |= queryset.filter(pk__in=matching_ids('blogpost', search_term))
+        return results, may_have_duplicates
 
 
 @admin.register(Testimonial)
@@ -61,28 +157,110 @@ class JobListingAdmin(admin.ModelAdmin):
 
 
 @admin.register(ContactSubmission)
-class ContactSubmissionAdmin(admin.ModelAdmin):
+class ContactSubmissionAdmin(LargeTableAdminMixin, ExportActionsMixin, admin.ModelAdmin):
     list_display = ['name', 'email', 'phone', 'service', 'submitted_at']
     list_filter = ['service', 'submitted_at']
-    search_fields = ['name', 'email', 'message']
+    list_only = ['name', 'email', 'phone', 'service', 'submitted_at']
     readonly_fields = ['submitted_at']
-    date_hierarchy = 'submitted_at'
 
 
 @admin.register(CareerApplication)
-class CareerApplicationAdmin(admin.ModelAdmin):
+class CareerApplicationAdmin(LargeTableAdminMixin, ExportActionsMixin, admin.ModelAdmin):
     list_display = ['name', 'email', 'job', 'submitted_at']
     list_filter = ['job', 'submitted_at']
-    search_fields = ['name', 'email']
+    list_select_related = ['job']
+    list_only = ['name', 'email', 'submitted_at', 'job__title']
     readonly_fields = ['submitted_at']
-    date_hierarchy = 'submitted_at'
 
 
 @admin.register(NewsletterSubscriber)
-class NewsletterSubscriberAdmin(admin.ModelAdmin):
+class NewsletterSubscriberAdmin(LargeTableAdminMixin, ExportActionsMixin, admin.ModelAdmin):
     list_display = ['email', 'subscribed_at', 'active']
     list_filter = ['active', 'subscribed_at']
     list_editable = ['active']
-    search_fields = ['email']
+    list_only = ['email', 'subscribed_at', 'active']
     readonly_fields = ['subscribed_at']
-    date_hierarchy = 'subscribed_at'
+    change_list_template = 'admin/QbixSolutions/newslettersubscriber/change_list.html'
+    
+    def get_urls(self):
+        return [
+            path('import/', self.admin_site.admin_view(self.import_view), name='QbixSolutions_newslettersubscriber_import'),
+        ] + super().get_urls()
+    
+    def import_view(self, request):
+        if not self.has_add_permission(request):
+            raise PermissionDenied
+        form = SubscriberImportForm(request.POST or None, request.FILES or None)
+        if request.method == 'POST' and form.is_valid():
+            upload = form.cleaned_data['file']
+            # Read the upload line by line; it is never loaded into memory whole
+            lines = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+            try:
+                with transaction.atomic():
+                    report = import_subscribers(read_csv_emails(lines))
+            except (UnicodeDecodeError, csv.Error):
+                form.add_error('file', "Upload a UTF-8 encoded CSV file.")
+            else:
+                self.message_user(request, f"Imported {upload.name}: {report}.", messages.SUCCESS)
+                return redirect('admin:QbixSolutions_newslettersubscriber_changelist')
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'form': form,
+            'title': 'Import subscribers',
+        }
+        return TemplateResponse(request, 'admin/QbixSolutions/newslettersubscriber/import.html', context)
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['name', 'status', 'attempts', 'run_at', 'created_at', 'finished_at']
+    list_filter = ['status']
+    search_fields = ['name']
+    readonly_fields = [
+        'name', 'payload', 'status', 'attempts', 'max_attempts', 'run_at',
+        'locked_by', 'locked_at', 'last_error', 'created_at', 'finished_at',
+    ]
+    actions = ['retry_jobs']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    @admin.action(description='Retry selected failed jobs now')
+    def retry_jobs(self, request, queryset):
+        count = queryset.filter(status=Job.FAILED).update(
+            status=Job.QUEUED, attempts=0, run_at=timezone.now(), finished_at=None,
+        )
+        self.message_user(request, f"{count} job(s) queued for retry.")
+
+
+@admin.register(Campaign)
+class CampaignAdmin(admin.ModelAdmin):
+    list_display = ['__str__', 'blog_post', 'status', 'sent_count', 'failed_count', 'created_at', 'finished_at']
+    list_filter = ['status']
+    list_select_related = ['blog_post']
+    autocomplete_fields = ['blog_post']
+    readonly_fields = ['status', 'created_at', 'started_at', 'finished_at']
+    actions = ['send_campaigns']
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            sent=Count('deliveries', filter=Q(deliveries__status=CampaignDelivery.SENT)),
+            failed=Count('deliveries', filter=Q(deliveries__status=CampaignDelivery.FAILED)),
+        )
+    
+    @admin.display(description='Sent', ordering='sent')
+    def sent_count(self, obj):
+        return obj.sent
+    
+    @admin.display(description='Failed', ordering='failed')
+    def failed_count(self, obj):
+        return obj.failed
+    
+    @admin.action(description='Send selected campaigns (or resume them)')
+    def send_campaigns(self, request, queryset):
+        campaigns = list(queryset.exclude(status=Campaign.SENT).values_list('pk', flat=True))
+        with transaction.atomic():
+            for pk in campaigns:
+                jobs.enqueue(tasks.SEND_CAMPAIGN, {'campaign_id': pk}, max_attempts=10)
+        self.message_user(request, f"{len(campaigns)} campaign(s) queued for sending.")
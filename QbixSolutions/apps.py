@@ -1,6 +1,13 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class QbixsolutionsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'QbixSolutions'
+
+    def ready(self):
+        from . import signals, tasks  # noqa: F401
+        if getattr(settings, 'BENCHMARK_QUERY_DELAY_MS', 0):
+            from .benchmarks import delay_queries
+            delay_queries(settings.BENCHMARK_QUERY_DELAY_MS)
@@ -0,0 +1,365 @@
+"""
+Build-time processing of the site's CSS and JavaScript.
+
+Run by storage.StaticFilesStorage during ``collectstatic``: CSS and JS files
+are minified before they are hashed, then a critical stylesheet is written
+for each page template. The critical stylesheet holds only the rules that can
+apply to the top of the page (the loader, header and the page's first
+section); it is inlined by {% critical_css %} so the page renders before the
+full stylesheets, which {% stylesheet %} then loads without blocking.
+
+The minifiers are deliberately conservative: they remove comments and
+whitespace but never rename or reorder anything.
+"""
+import posixpath
+import re
+from pathlib import Path
+
+from django.apps import apps
+
+
+# ---------------------------------------------------------------- minification
+
+_CSS_TOKEN = re.compile(r'''("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')|/\*.*?\*/|\s+''', re.S)
+# Whitespace next to these is never significant. A space after ":" can go too,
+# but not one before it: in a selector "a :hover" and "a:hover" differ.
+_CSS_PUNCTUATION = '{};,>'
+
+
+def minify_css(css):
+    pieces = []
+    for part in _split(_CSS_TOKEN, css):
+        if isinstance(part, str) or part.group(1):
+            pieces.append(part if isinstance(part, str) else part.group(1))
+        elif pieces and pieces[-1] != ' ':
+            pieces.append(' ')  # whitespace or a comment, which still separates words
+    out = []
+    for index, piece in enumerate(pieces):
+        if piece == ' ':
+            before = out[-1][-1] if out else ''
+            after = pieces[index + 1][:1] if index + 1 < len(pieces) else ''
+            if not before or not after or before in _CSS_PUNCTUATION + ':' or after in _CSS_PUNCTUATION:
+                continue
+        out.append(piece)
+    return ''.join(out).replace(';}', '}')
+
+
+def _split(pattern, text):
+    """Alternate plain text (str) and pattern matches (re.Match)"""
+    position = 0
+    for match in pattern.finditer(text):
+        if match.start() > position:
+            yield text[position:match.start()]
+        yield match
+        position = match.end()
+    if position < len(text):
+        yield text[position:]
+
+
+# A "/" after one of these (or at the start) begins a regular expression literal
+_REGEX_PRECEDERS = set('(,=:[!&|?{};+-*%<>~^')
+_REGEX_KEYWORDS = ('return', 'typeof', 'case', 'do', 'else', 'in', 'of', 'void', 'delete', 'throw', 'new')
+# A space next to one of these is never needed, unless the other side is one
+# of _JS_KEEP_APART: "a - -b", "a + +b" and "a / /re/" must stay apart
+_JS_PUNCTUATION = set('{}()[];,:=<>?!&|*%~^+-/.')
+_JS_KEEP_APART = set('+-/.')
+
+
+def minify_js(source):
+    """
+    Remove comments, indentation and most whitespace from JavaScript.
+
+    Line breaks are kept (except after ``{``, ``;`` and ``,`` or before ``}``)
+    so automatic semicolon insertion behaves exactly as in the source.
+    """
+    tokens = []  # (is_whitespace, text); strings and regexes are single tokens
+    i, length = 0, len(source)
+    last = ''  # last token that is not whitespace
+    while i < length:
+        char = source[i]
+        if char in '"\'`':
+            end = _string_end(source, i)
+        elif source.startswith('//', i) or source.startswith('/*', i):
+            if source[i + 1] == '/':
+                end = source.find('\n', i)
+                end = length if end == -1 else end
+            else:
+                end = source.find('*/', i + 2)
+                end = length if end == -1 else end + 2
+            tokens.append((True, '\n' if '\n' in source[i:end] else ' '))
+            i = end
+            continue
+        elif char == '/' and _starts_regex(last):
+            end = _regex_end(source, i)
+        elif char.isspace():
+            end = i
+            while end < length and source[end].isspace():
+                end += 1
+            tokens.append((True, '\n' if '\n' in source[i:end] else ' '))
+            i = end
+            continue
+        else:
+            end = i + 1
+            while end < length and not source[end].isspace() and source[end] not in '"\'`/':
+                end += 1
+        last = source[i:end]
+        tokens.append((False, last))
+        i = end
+
+    out, gap = [], ''
+    for is_whitespace, text in tokens:
+        if is_whitespace:
+            if out and gap != '\n':
+                gap = text
+            continue
+        if gap:
+            before, after = out[-1][-1], text[0]
+            if gap == '\n' and before not in '{;,' and after != '}':
+                out.append('\n')
+            elif gap == ' ' or gap == '\n':
+                if not _js_space_optional(before, after):
+                    out.append(' ')
+            gap = ''
+        out.append(text)
+    return ''.join(out)
+
+
+def _js_space_optional(before, after):
+    if before in _JS_PUNCTUATION and after not in _JS_KEEP_APART:
+        return True
+    return after in _JS_PUNCTUATION and before not in _JS_KEEP_APART
+
+
+def _string_end(source, start):
+    quote = source[start]
+    i = start + 1
+    while i < len(source):
+        if source[i] == '\\':
+            i += 2
+            continue
+        if source[i] == quote:
+            return i + 1
+        if quote == '`' and source.startswith('${', i):
+            # Skip the expression, which may itself contain strings and braces
+            depth, i = 1, i + 2
+            while i < len(source) and depth:
+                if source[i] in '"\'`':
+                    i = _string_end(source, i)
+                    continue
+                depth += {'{': 1, '}': -1}.get(source[i], 0)
+                i += 1
+            continue
+        i += 1
+    return i
+
+
+def _starts_regex(last):
+    if not last:
+        return True
+    if last[-1] in _REGEX_PRECEDERS:
+        return True
+    return re.search(r'(?:^|[^\w$])(%s)$' % '|'.join(_REGEX_KEYWORDS), last) is not None
+
+
+def _regex_end(source, start):
+    i, in_class = start + 1, False
+    while i < len(source) and source[i] != '\n':
+        char = source[i]
+        if char == '\\':
+            i += 2
+            continue
+        if char == '[':
+            in_class = True
+        elif char == ']':
+            in_class = False
+        elif char == '/' and not in_class:
+            i += 1
+            while i < len(source) and (source[i].isalnum() or source[i] == '$'):
+                i += 1  # flags
+            return i
+        i += 1
+    return i
+
+
+# ---------------------------------------------------------------- critical CSS
+
+# A page's own markup starts at {% block content %}; base.html's before it is on every page
+_PAGE_CONTENT = re.compile(r'{%\s*block\s+content\s*%}')
+_STYLESHEET_TAG = re.compile(r'''{%\s*stylesheet\s+['"]([^'"]+)['"]\s*%}''')
+_TEMPLATE_SYNTAX = re.compile(r'{%.*?%}|{{.*?}}|{#.*?#}', re.S)
+
+BASE_TEMPLATE = 'base.html'
+
+
+def _template_directory():
+    return Path(apps.get_app_config('QbixSolutions').path) / 'templates'
+
+
+def critical_stylesheets(read):
+    """
+    {static path: critical CSS} for every page template. ``read(path)`` returns
+    a stylesheet's text and the URL it is served from.
+    """
+    base_source = (_template_directory() / BASE_TEMPLATE).read_text(encoding='utf-8')
+    stylesheets = {}
+    result = {}
+    for name, source in page_templates().items():
+        html = above_the_fold(base_source, source)
+        parts = []
+        for path in page_stylesheets(base_source, source):
+            if path not in stylesheets:
+                stylesheets[path] = read(path)
+            css, base_url = stylesheets[path]
+            parts.append(critical_css(css, html, base_url))
+        result[critical_name(name)] = ''.join(parts)
+    return result
+
+
+def critical_name(template_name):
+    """Static path of the critical stylesheet for a page template"""
+    return f'critical/{posixpath.splitext(template_name)[0]}.css'
+
+
+def page_templates():
+    """{template name: source} of the app's pages, i.e. the templates extending base.html"""
+    pages = {}
+    for path in sorted(_template_directory().glob('*.html')):
+        source = path.read_text(encoding='utf-8')
+        if re.search(r'''{%\s*extends\s+['"]''' + re.escape(BASE_TEMPLATE), source):
+            pages[path.name] = source
+    return pages
+
+
+def above_the_fold(base_source, page_source):
+    """Markup that is on screen when a page first renders"""
+    body = base_source[base_source.find('<body'):]
+    header = _PAGE_CONTENT.split(body, 1)[0]
+    content = _PAGE_CONTENT.split(page_source, 1)[-1]
+    first_section = content.find('</section>')
+    if first_section != -1:
+        content = content[:first_section]
+    return header + content
+
+
+def page_stylesheets(base_source, page_source):
+    """Stylesheets linked with {% stylesheet %} by base.html and by the page, in order"""
+    return _STYLESHEET_TAG.findall(base_source) + _STYLESHEET_TAG.findall(page_source)
+
+
+def markup_names(html):
+    """(tags, classes, ids) used in a piece of template markup"""
+    html = _TEMPLATE_SYNTAX.sub(' ', html)
+    tags = {tag.lower() for tag in re.findall(r'<([a-zA-Z][\w-]*)', html)} | {'html', 'body'}
+    classes = set()
+    for value in re.findall(r'''\bclass\s*=\s*["']([^"']*)["']''', html):
+        classes.update(value.split())
+    ids = set(re.findall(r'''\bid\s*=\s*["']([^"']*)["']''', html))
+    return tags, classes, ids
+
+
+_PSEUDO = re.compile(r'::?[\w-]+(\((?:[^()]|\([^()]*\))*\))?')
+_ATTRIBUTE = re.compile(r'\[[^\]]*\]')
+
+
+def selector_matches(selector, names):
+    """
+    Whether ``selector`` may match an element in the markup ``names`` came
+    from. Only the tags, classes and ids it mentions are checked (pseudo-classes
+    and attributes are ignored), so this errs towards including a rule.
+    """
+    tags, classes, ids = names
+    selector = _ATTRIBUTE.sub('', _PSEUDO.sub('', selector))
+    if not set(re.findall(r'\.([\w-]+)', selector)) <= classes:
+        return False
+    if not set(re.findall(r'#([\w-]+)', selector)) <= ids:
+        return False
+    for tag in re.findall(r'(?:^|[\s>+~(])([a-zA-Z][\w-]*)', selector):
+        if tag.lower() not in tags:
+            return False
+    return True
+
+
+def parse_css(css):
+    """[(prelude, body)] for the top level of a (minified) stylesheet; body is
+    None for statements such as @import"""
+    rules, i, start, length = [], 0, 0, len(css)
+    while i < length:
+        char = css[i]
+        if char in '"\'':
+            i = _string_end(css, i)
+            continue
+        if char == ';':
+            statement = css[start:i].strip()
+            if statement:
+                rules.append((statement, None))
+            start = i + 1
+        elif char == '{':
+            depth, j = 1, i + 1
+            while j < length and depth:
+                if css[j] in '"\'':
+                    j = _string_end(css, j)
+                    continue
+                depth += {'{': 1, '}': -1}.get(css[j], 0)
+                j += 1
+            rules.append((css[start:i].strip(), css[i + 1:j - 1]))
+            i = start = j
+            continue
+        i += 1
+    return rules
+
+
+def _split_selectors(prelude):
+    selectors, depth, current = [], 0, ''
+    for char in prelude:
+        if char == ',' and not depth:
+            selectors.append(current)
+            current = ''
+            continue
+        depth += {'(': 1, ')': -1}.get(char, 0)
+        current += char
+    return selectors + [current]
+
+
+def _critical_rules(css, names, keyframes):
+    out = []
+    for prelude, body in parse_css(css):
+        if body is None:
+            if prelude.startswith(('@import', '@charset')):
+                out.append(prelude + ';')
+        elif prelude.startswith(('@media', '@supports', '@layer')):
+            inner = _critical_rules(body, names, keyframes)
+            if inner:
+                out.append(f'{prelude}{{{inner}}}')
+        elif prelude.startswith('@font-face'):
+            out.append(f'{prelude}{{{body}}}')
+        elif prelude.startswith('@'):
+            continue  # @keyframes are added afterwards, if used
+        else:
+            selectors = [s for s in _split_selectors(prelude) if selector_matches(s, names)]
+            if selectors:
+                out.append(f'{",".join(selectors)}{{{body}}}')
+                keyframes.update(re.findall(r'animation(?:-name)?:([^;}]+)', body))
+    return ''.join(out)
+
+
+def critical_css(css, html, base_url=''):
+    """
+    The rules of ``css`` that can apply to ``html``, plus the @keyframes they use.
+
+    ``base_url`` is the URL of the stylesheet, so that relative url()s still
+    resolve once the rules are inlined in a page.
+    """
+    names = markup_names(html)
+    animations = set()
+    out = _critical_rules(css, names, animations)
+    used = set()
+    for value in animations:
+        used.update(re.findall(r'[\w-]+', value))
+    for prelude, body in parse_css(css):
+        if body is not None and re.match(r'@(-webkit-)?keyframes\s', prelude) and prelude.split()[-1] in used:
+            out += f'{prelude}{{{body}}}'
+    if base_url:
+        out = re.sub(r'''url\((["']?)(?!data:|https?:|/|#)([^"')]+)\1\)''',
+                     lambda m: f'url({m.group(1)}{posixpath.normpath(posixpath.join(base_url, m.group(2)))}{m.group(1)})',
+                     out)
+    return out
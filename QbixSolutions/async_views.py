@@ -0,0 +1,204 @@
+"""
+Async variants of the read-only public views, served when ASYNC_VIEWS is on
+(under ASGI: uvicorn, or gunicorn with uvicorn workers).
+
+They render the same templates with the same context as views.py. What differs
+is that a page's independent queries run at the same time: fan_out() evaluates
+each in its own worker thread, on that thread's own database connection. (The
+async ORM methods, aget() and friends, all run on the request's one
+thread-sensitive thread, so gathering them would still execute the queries
+one after another.) Single lookups use the async ORM directly, and templates are
+rendered in the request's thread, where any remaining lazy query may run.
+
+Forms and POSTs are handled by the sync views.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.db import close_old_connections
+from django.shortcuts import aget_object_or_404, render
+
+from . import facets, views
+from .forms import ConsultationForm, NewsletterForm
+from .cache import FRAGMENT_CACHE_TIMEOUT, cache_public_page, conditional_content, get_versions
+from .models import BlogPost, JobListing, Portfolio, Service, TeamMember, Testimonial
+from .related import related_items
+from .views import BLOG_KEYSET_ORDERING, PORTFOLIO_KEYSET_ORDERING, paginate
+
+
+def _evaluate(func):
+    try:
+        return func()
+    finally:
+        # This thread's connection outlives the request; release it as the
+        # request cycle would (kept for CONN_MAX_AGE, returned to the pool)
+        close_old_connections()
+
+
+async def fan_out(*funcs):
+    """Call each of ``funcs`` (which may query the database) in its own thread, concurrently"""
+    run = sync_to_async(_evaluate, thread_sensitive=False)
+    return await asyncio.gather(*(run(func) for func in funcs))
+
+
+def _evaluated(page):
+    """A page of paginate() with its rows fetched"""
+    page.object_list = list(page.object_list)
+    return page
+
+
+async def arender(request, template_name, context):
+    return await sync_to_async(render)(request, template_name, context)
+
+
+def _home_state():
+    """Fragment versions, and the home sections whose fragment is not cached"""
+    versions = get_versions('service', 'portfolio', 'testimonial', 'blogpost')
+    # {% cache %} keys on its fragment name as written, quotes included
+    keys = {
+        name: make_template_fragment_key(f"'home_{name}'", [version])
+        for name, version in versions.items()
+    }
+    cached = cache.get_many(keys.values())
+    return versions, {name for name, key in keys.items() if key not in cached}
+
+
+def _home_sections():
+    """Model name -> (context name, lazy queryset) for the home page's cached sections"""
+    return {
+        'service': ('services', Service.objects.all()[:3]),
+        'portfolio': ('portfolio_items', Portfolio.objects.filter(featured=True)[:6]),
+        'testimonial': ('testimonials', Testimonial.objects.filter(featured=True)[:4]),
+        'blogpost': ('blog_posts', BlogPost.objects.order_by('-featured', '-published_date')[:3]),
+    }
+
+
+@conditional_content('service', 'portfolio', 'testimonial', 'blogpost')
+@cache_public_page('service', 'portfolio', 'testimonial', 'blogpost')
+async def home(request):
+    """Home page; the sections not in the fragment cache are queried concurrently"""
+    if request.method == 'POST':
+        return await sync_to_async(views.home)(request)
+    versions, missing = await sync_to_async(_home_state)()
+    sections = _home_sections()
+    # Cached sections keep their lazy querysets: should a fragment expire
+    # before the render, the template still queries it
+    context = dict(sections.values())
+    fetch = [sections[name] for name in sections if name in missing]
+    results = await fan_out(*(lambda queryset=queryset: list(queryset) for key, queryset in fetch))
+    context.update(zip((key for key, queryset in fetch), results))
+    context.update({
+        'consultation_form': ConsultationForm(),
+        'newsletter_form': NewsletterForm(),
+        'fragment_versions': versions,
+        'fragment_timeout': FRAGMENT_CACHE_TIMEOUT,
+    })
+    return await arender(request, 'index.html', context)
+
+
+@conditional_content('teammember')
+@cache_public_page('teammember')
+async def about(request):
+    team_members = [member async for member in TeamMember.objects.all()[:5]]
+    return await arender(request, 'about.html', {'team_members': team_members})
+
+
+@conditional_content('service')
+@cache_public_page('service')
+async def services(request):
+    all_services = [service async for service in Service.objects.all()]
+    return await arender(request, 'services.html', {'services': all_services})
+
+
+@conditional_content('service')
+@cache_public_page('service')
+async def service_detail(request, slug):
+    service, related_services = await asyncio.gather(
+        aget_object_or_404(Service, slug=slug),
+        fan_out(lambda: list(Service.objects.exclude(slug=slug)[:3])),
+    )
+    return await arender(request, 'service_detail.html', {
+        'service': service,
+        'related_services': related_services[0],
+    })
+
+
+@conditional_content('portfolio')
+@cache_public_page('portfolio')
+async def portfolio(request):
+    all_portfolio = Portfolio.objects.all()
+    category = request.GET.get('category')
+    if category:
+        all_portfolio = all_portfolio.filter(category=category)
+    portfolio_items, available_categories = await fan_out(
+        lambda: _evaluated(paginate(request, all_portfolio, PORTFOLIO_KEYSET_ORDERING)),
+        facets.portfolio_categories,
+    )
+    return await arender(request, 'portfolio.html', {
+        'portfolio_items': portfolio_items,
+        'categories': available_categories,
+        'selected_category': category,
+        'total_count': sum(count for code, name, count in available_categories),
+    })
+
+
+@conditional_content('portfolio')
+@cache_public_page('portfolio')
+async def portfolio_detail(request, slug):
+    portfolio_item = await aget_object_or_404(Portfolio, slug=slug)
+    related_projects = await sync_to_async(related_items)(portfolio_item)
+    return await arender(request, 'portfolio_detail.html', {
+        'portfolio_item': portfolio_item,
+        'related_projects': related_projects,
+    })
+
+
+@conditional_content('blogpost')
+@cache_public_page('blogpost')
+async def blog(request):
+    all_posts = BlogPost.objects.all()
+    category = request.GET.get('category')
+    if category:
+        all_posts = all_posts.filter(category=category)
+    blog_posts, categories, featured_posts = await fan_out(
+        lambda: _evaluated(paginate(request, all_posts, BLOG_KEYSET_ORDERING)),
+        facets.blog_categories,
+        lambda: list(BlogPost.objects.filter(featured=True)[:3]),
+    )
+    return await arender(request, 'blog.html', {
+        'blog_posts': blog_posts,
+        'categories': categories,
+        'selected_category': category,
+        'total_count': sum(count for name, count in categories),
+        'featured_posts': featured_posts,
+    })
+
+
+@conditional_content('blogpost')
+@cache_public_page('blogpost')
+async def blog_detail(request, slug):
+    post = await aget_object_or_404(BlogPost, slug=slug)
+    related_posts = await sync_to_async(related_items)(post)
+    return await arender(request, 'blog_detail.html', {
+        'post': post,
+        'related_posts': related_posts,
+        'share_url': views.share_url(post),
+    })
+
+
+@conditional_content('joblisting')
+@cache_public_page('joblisting')
+async def careers(request):
+    listings = JobListing.objects.filter(active=True)
+    department = request.GET.get('department')
+    if department:
+        listings = listings.filter(department=department)
+    job_listings, departments = await fan_out(lambda: list(listings), facets.job_departments)
+    return await arender(request, 'careers.html', {
+        'job_listings': job_listings,
+        'departments': departments,
+        'selected_department': department,
+        'total_count': sum(count for name, count in departments),
+    })
@@ -0,0 +1,435 @@
+"""
+Performance benchmarks for the public site.
+
+- seed(): synthetic content and submissions in realistic volumes
+  (manage.py seed_benchmark_data)
+- measure_views(): wall time, queries and bytes for every route in
+  QbixSolutions/urls.py, in process, on a private cache (manage.py benchmark_views)
+- run_load(): an HTTP load generator for a running server, e.g. gunicorn,
+  reporting latency percentiles and requests per second (manage.py load_test)
+- compare(): regressions between two results files (manage.py compare_benchmarks)
+- start_gunicorn() and delay_queries(): sync WSGI vs async ASGI workers against
+  a simulated slow database (manage.py benchmark_async)
+
+Results files are JSON: {"kind", "created", "environment", "results": {route: {metric: value}}}.
+"""
+import http.client
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from datetime import date, timedelta
+from urllib.parse import urlsplit
+
+import django
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.backends.signals import connection_created
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import campaigns, urls
+from .cache import VERSIONED_MODELS, bump_version
+from .models import (
+    Service, Portfolio, BlogPost, Testimonial, TeamMember, JobListing, Technology,
+    ContactSubmission, CareerApplication, NewsletterSubscriber,
+)
+from .related import rebuild_related
+from .search import rebuild_index
+
+
+# Seeded rows are recognisable by these, so they can be removed again
+SEED_SLUG_PREFIX = 'bench-'
+SEED_EMAIL_DOMAIN = 'bench.example.com'
+
+DEFAULT_COUNTS = {
+    'services': 8,
+    'portfolio': 60,
+    'posts': 300,
+    'testimonials': 12,
+    'team': 6,
+    'jobs': 10,
+    'submissions': 5_000,
+    'applications': 1_000,
+    'subscribers': 5_000,
+}
+
+_CATEGORIES = [value for value, label in Portfolio.CATEGORY_CHOICES]
+_TECHNOLOGIES = ['Django', 'Python', 'React', 'PostgreSQL', 'Redis', 'Docker', 'AWS', 'Vue.js', 'Node.js', 'Flutter']
+_WORDS = (
+    'fast secure scalable django python platform launch design customer growth search cloud mobile '
+    'performance analytics content payment dashboard booking api startup'
+).split()
+
+
+def _text(i, words):
+    return ' '.join(_WORDS[(i * 7 + n * 3) % len(_WORDS)] for n in range(words)).capitalize() + '.'
+
+
+def _pick(choices, i, count):
+    return [choices[(i + n) % len(choices)] for n in range(count)]
+
+
+def clear_seeded():
+    """Delete everything seed() created; returns the number of rows removed"""
+    removed = 0
+    for model in (Service, Portfolio, BlogPost, JobListing):
+        removed += model.objects.filter(slug__startswith=SEED_SLUG_PREFIX).delete()[0]
+    removed += Testimonial.objects.filter(company__endswith='(benchmark)').delete()[0]
+    removed += TeamMember.objects.filter(position__endswith='(benchmark)').delete()[0]
+    for model in (ContactSubmission, CareerApplication, NewsletterSubscriber):
+        removed += model.objects.filter(email__endswith='@' + SEED_EMAIL_DOMAIN).delete()[0]
+    return removed
+
+
+@transaction.atomic
+def seed(counts, batch_size=2_000):
+    """
+    Bulk-insert synthetic rows, {name: count} with the names of DEFAULT_COUNTS,
+    then rebuild what saving them one by one would have: derived fields,
+    technology tags, the search index, related items and cached fragments.
+    """
+    now = timezone.now()
+
+    def create(model, rows):
+        return model.objects.bulk_create(rows, batch_size=batch_size)
+
+    create(Service, [
+        Service(
+            title=f'Service {i}', slug=f'{SEED_SLUG_PREFIX}service-{i}', icon='fas fa-code',
+            short_description=_text(i, 12), full_description=_text(i, 120),
+            features=', '.join(word.title() for word in _pick(_WORDS, i, 5)),
+            feature_list=[word.title() for word in _pick(_WORDS, i, 5)], order=100 + i,
+        )
+        for i in range(counts['services'])
+    ])
+    projects = create(Portfolio, [
+        Portfolio(
+            title=f'Project {i}', slug=f'{SEED_SLUG_PREFIX}project-{i}', category=_CATEGORIES[i % len(_CATEGORIES)],
+            description=_text(i, 80), technologies=', '.join(_pick(_TECHNOLOGIES, i, 3)),
+            technology_list=_pick(_TECHNOLOGIES, i, 3),
+            completion_date=date.today() - timedelta(days=i), featured=i % 10 == 0, order=100 + i,
+        )
+        for i in range(counts['portfolio'])
+    ])
+    tags = {tag.name: tag.pk for tag in Technology.for_names(_TECHNOLOGIES)}
+    Portfolio.technology_tags.through.objects.bulk_create([
+        Portfolio.technology_tags.through(portfolio_id=project.pk, technology_id=tags[name])
+        for project in projects for name in project.technology_list
+    ], batch_size=batch_size, ignore_conflicts=True)
+    create(BlogPost, [
+        BlogPost(
+            title=f'Post {i}: {_text(i, 5)}', slug=f'{SEED_SLUG_PREFIX}post-{i}', excerpt=_text(i, 25),
+            content='\n\n'.join(_text(i + n, 60) for n in range(8)), author='Benchmark',
+            category=f'Category {i % 8}', published_date=now - timedelta(hours=i), featured=i % 25 == 0,
+        )
+        for i in range(counts['posts'])
+    ])
+    create(Testimonial, [
+        Testimonial(
+            client_name=f'Client {i}', company=f'Company {i} (benchmark)', position='CEO',
+            testimonial=_text(i, 40), order=100 + i,
+        )
+        for i in range(counts['testimonials'])
+    ])
+    create(TeamMember, [
+        TeamMember(name=f'Member {i}', position='Engineer (benchmark)', bio=_text(i, 40), order=100 + i)
+        for i in range(counts['team'])
+    ])
+    jobs = create(JobListing, [
+        JobListing(
+            title=f'Job {i}', slug=f'{SEED_SLUG_PREFIX}job-{i}', department=f'Department {i % 4}',
+            employment_type=JobListing.EMPLOYMENT_TYPES[i % len(JobListing.EMPLOYMENT_TYPES)][0],
+            location='Remote', description=_text(i, 80), requirements=_text(i, 40), responsibilities=_text(i, 40),
+        )
+        for i in range(counts['jobs'])
+    ])
+    create(ContactSubmission, [
+        ContactSubmission(
+            name=f'Visitor {i}', email=f'visitor{i}@{SEED_EMAIL_DOMAIN}', phone='+91 98765 43210',
+            service='Web Development', message=_text(i, 40),
+        )
+        for i in range(counts['submissions'])
+    ])
+    if jobs:
+        create(CareerApplication, [
+            CareerApplication(
+                job=jobs[i % len(jobs)], name=f'Applicant {i}', email=f'applicant{i}@{SEED_EMAIL_DOMAIN}',
+                phone='+91 98765 43210', cover_letter=_text(i, 60), resume='resumes/benchmark.pdf',
+            )
+            for i in range(counts['applications'])
+        ])
+    create(NewsletterSubscriber, [
+        NewsletterSubscriber(email=f'reader{i}@{SEED_EMAIL_DOMAIN}')
+        for i in range(counts['subscribers'])
+    ])
+
+    # bulk_create() sends no signals
+    rebuild_index()
+    rebuild_related()
+    for name in VERSIONED_MODELS:
+        bump_version(name)
+
+
+def route_paths():
+    """
+    {route name: path} for every route in QbixSolutions/urls.py, with the
+    first matching object filling in slugs and tokens. Routes whose object
+    does not exist yet are left out.
+    """
+    # Route -> (rows to take its URL argument from, field)
+    samples = {
+        'service_detail': (Service.objects.all(), 'slug'),
+        'portfolio_detail': (Portfolio.objects.all(), 'slug'),
+        'blog_detail': (BlogPost.objects.all(), 'slug'),
+        'career_apply': (JobListing.objects.filter(active=True), 'slug'),
+        'newsletter_unsubscribe': (NewsletterSubscriber.objects.all(), 'pk'),
+    }
+    query = {'search': '?q=django'}
+    paths = {}
+    for pattern in urls.urlpatterns:
+        name = pattern.name
+        if pattern.pattern.converters:
+            queryset, field = samples[name]
+            argument = queryset.values_list(field, flat=True).first()
+            if argument is None:
+                continue
+            if name == 'newsletter_unsubscribe':
+                argument = campaigns.unsubscribe_token(argument)
+            path = reverse(f'{urls.app_name}:{name}', args=[argument])
+        else:
+            path = reverse(f'{urls.app_name}:{name}')
+        paths[name] = path + query.get(name, '')
+    return paths
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(fraction * len(ordered) + 0.5) - 1))]
+
+
+def isolated_cache():
+    """
+    Swap the default cache for a private in-process one while a benchmark
+    clears it over and over, so a deployment's shared cache (pages, fragments
+    and version counters) is left alone
+    """
+    return override_settings(CACHES={
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'qbix-benchmark'},
+    })
+
+
+@isolated_cache()
+def measure_views(paths, repeat=20):
+    """
+    {route: metrics} for GETs by an anonymous visitor, each timed ``repeat``
+    times with an empty cache ("cold") and with the page cache filled ("warm")
+    """
+    results = {}
+    # A view that raises is recorded as a 500, not allowed to stop the run;
+    # the default host, testserver, is only in ALLOWED_HOSTS under the test runner
+    client = Client(raise_request_exception=False, SERVER_NAME='localhost')
+    for name, path in paths.items():
+        cold, warm = [], []
+        for _ in range(repeat):
+            cache.clear()
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                response = client.get(path)
+                cold.append((time.perf_counter() - started) * 1000)
+            started = time.perf_counter()
+            with CaptureQueriesContext(connection) as warm_queries:
+                client.get(path)
+            warm.append((time.perf_counter() - started) * 1000)
+        results[name] = {
+            'path': path,
+            'status': response.status_code,
+            'bytes': len(response.content),
+            'queries': len(queries),
+            'warm_queries': len(warm_queries),
+            'cold_ms': round(statistics.median(cold), 3),
+            'cold_p95_ms': round(percentile(cold, 0.95), 3),
+            'warm_ms': round(statistics.median(warm), 3),
+        }
+    return results
+
+
+def _load_worker(base, paths, deadline, offset, latencies, errors, lock, rounds=None):
+    parts = urlsplit(base)
+    connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+    conn = connection_class(parts.netloc, timeout=30)
+    names = list(paths)
+    index = offset
+    while (index - offset < rounds) if rounds is not None else (time.monotonic() < deadline):
+        name = names[index % len(names)]
+        index += 1
+        started = time.perf_counter()
+        try:
+            conn.request('GET', parts.path.rstrip('/') + paths[name], headers={'Accept-Encoding': 'gzip, br'})
+            response = conn.getresponse()
+            response.read()
+            failed = response.status >= 400
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            failed = True
+        elapsed = (time.perf_counter() - started) * 1000
+        with lock:
+            latencies[name].append(elapsed)
+            if failed:
+                errors[name] += 1
+    conn.close()
+
+
+def run_load(base, paths, concurrency=8, duration=10.0):
+    """
+    Request ``paths`` (route name -> path) from the server at ``base``
+    round-robin, from ``concurrency`` threads for ``duration`` seconds;
+    returns (per-route metrics, overall metrics)
+    """
+    latencies = {name: [] for name in paths}
+    errors = {name: 0 for name in paths}
+    lock = threading.Lock()
+    # One untimed pass, so worker start-up and first-request costs stay out of the numbers
+    _load_worker(base, paths, 0, 0, {name: [] for name in paths}, dict(errors), lock, rounds=len(paths))
+    deadline = time.monotonic() + duration
+    started = time.perf_counter()
+    threads = [
+        threading.Thread(target=_load_worker, args=(base, paths, deadline, n, latencies, errors, lock))
+        for n in range(concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    def summary(values, failed):
+        if not values:
+            return {'requests': 0, 'errors': failed}
+        return {
+            'requests': len(values),
+            'errors': failed,
+            'rps': round(len(values) / elapsed, 1),
+            'p50_ms': round(percentile(values, 0.50), 3),
+            'p95_ms': round(percentile(values, 0.95), 3),
+            'p99_ms': round(percentile(values, 0.99), 3),
+        }
+
+    results = {name: dict(summary(latencies[name], errors[name]), path=paths[name]) for name in paths}
+    overall = summary([value for values in latencies.values() for value in values], sum(errors.values()))
+    return results, overall
+
+
+def start_gunicorn(workers, env=None, app='company_site.wsgi', worker_class=None, threads=1):
+    """
+    Start gunicorn for ``app`` on a free local port; returns (process, base URL).
+    Raises RuntimeError if it does not accept connections within 30 seconds.
+    """
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    command = [
+        sys.executable, '-m', 'gunicorn', app, '--bind', f'127.0.0.1:{port}',
+        '--workers', str(workers), '--threads', str(threads), '--log-level', 'warning',
+    ]
+    if worker_class:
+        command += ['--worker-class', worker_class]
+    server = subprocess.Popen(command, cwd=settings.BASE_DIR, env={**os.environ, **(env or {})})
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"gunicorn exited; is {worker_class or 'gunicorn'} installed?")
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return server, f'http://127.0.0.1:{port}'
+        except OSError:
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError("gunicorn did not start within 30 seconds")
+
+
+def delay_queries(milliseconds):
+    """
+    Make every query on every new connection take ``milliseconds`` longer,
+    standing in for a database across a network. Set through
+    BENCHMARK_QUERY_DELAY_MS; never in production.
+    """
+    def delay(execute, sql, params, many, context):
+        time.sleep(milliseconds / 1000)
+        return execute(sql, params, many, context)
+
+    def install(sender, connection, **kwargs):
+        # Sent again each time the same DatabaseWrapper reconnects
+        if delay not in connection.execute_wrappers:
+            connection.execute_wrappers.append(delay)
+
+    connection_created.connect(install, weak=False, dispatch_uid='qbix.benchmarks.delay_queries')
+
+
+def results_document(kind, results, **extra):
+    return {
+        'kind': kind,
+        'created': timezone.now().isoformat(),
+        'environment': {
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'machine': platform.node(),
+        },
+        **extra,
+        'results': results,
+    }
+
+
+def write_results(path, document):
+    with open(path, 'w', encoding='utf-8') as fh:
+        json.dump(document, fh, indent=2, sort_keys=True)
+        fh.write('\n')
+
+
+def read_results(path):
+    with open(path, encoding='utf-8') as fh:
+        return json.load(fh)
+
+
+def compare(baseline, current, threshold=0.25, min_ms=1.0):
+    """
+    Regressions of ``current`` against ``baseline`` (results documents), as a
+    list of (route, metric, baseline value, current value).
+
+    Times (*_ms) regress when they grow by more than ``threshold`` and by more
+    than ``min_ms`` (small absolute differences are noise); requests per second
+    when it drops by more than ``threshold``; query and error counts on any
+    increase; the status code on any change.
+    """
+    regressions = []
+    for route, before in sorted(baseline['results'].items()):
+        after = current['results'].get(route)
+        if after is None:
+            continue
+        for metric, old in sorted(before.items()):
+            new = after.get(metric)
+            if not isinstance(old, (int, float)) or not isinstance(new, (int, float)):
+                continue
+            if metric.endswith('_ms'):
+                regressed = new > old * (1 + threshold) and new - old > min_ms
+            elif metric == 'rps':
+                regressed = new < old * (1 - threshold)
+            elif metric.endswith('queries') or metric == 'errors':
+                regressed = new > old
+            elif metric == 'status':
+                regressed = new != old
+            else:
+                continue
+            if regressed:
+                regressions.append((route, metric, old, new))
+    return regressions
@@ -0,0 +1,304 @@
+import hashlib
+import re
+import time
+from contextlib import nullcontext
+from functools import wraps
+from inspect import iscoroutinefunction
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.core.cache import cache, caches
+from django.db.models import Count, Max
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.utils import timezone
+from django.views.decorators.http import condition
+
+from .compression import CompressedPage, minify_html
+from .models import TeamMember, Service, Portfolio, BlogPost, Testimonial, JobListing
+from .replicas import REPLICA_PIN_SECONDS, use_primary
+
+
+# How long a rendered fragment may live before it is re-rendered anyway.
+# Invalidation does not depend on this; bumping a version makes old keys unreachable.
+FRAGMENT_CACHE_TIMEOUT = getattr(settings, 'FRAGMENT_CACHE_TIMEOUT', 60 * 60 * 24)
+
+# How long a full anonymous page may be served from cache (also version-invalidated)
+PAGE_CACHE_TIMEOUT = getattr(settings, 'PAGE_CACHE_TIMEOUT', 60 * 60)
+
+# The only query parameters the public views read; anything else (utm_*, etc.)
+# must not fragment the page cache. A request carrying other parameters may be
+# served a cached page but never fills one, so no stored page can reflect them.
+PAGE_CACHE_PARAMS = ('category', 'department', 'page', 'cursor')
+
+# Every rendered page carries a per-visitor CSRF token (footer newsletter form),
+# so it is stored with a placeholder and the visitor's own token is put back on a hit
+CSRF_PLACEHOLDER = b'__qbix_csrf_token__'
+_CSRF_INPUT = re.compile(rb'name="csrfmiddlewaretoken" value="([^"]+)"')
+
+# Content models whose rendered output is cached, keyed by model_name
+VERSIONED_MODELS = {
+    'teammember': TeamMember,
+    'service': Service,
+    'portfolio': Portfolio,
+    'testimonial': Testimonial,
+    'blogpost': BlogPost,
+    'joblisting': JobListing,
+}
+
+
+def version_cache():
+    """
+    The cache holding the version counters: the "versions" alias, which only
+    they use, so culling the pages and fragments never evicts them; the default
+    cache where no such alias is configured
+    """
+    return caches['versions'] if 'versions' in settings.CACHES else cache
+
+
+def _version_key(name):
+    return f'qbix:version:{name}'
+
+
+def get_versions(*names):
+    """Return {name: version} for the given content models in a single cache round-trip"""
+    names = names or tuple(VERSIONED_MODELS)
+    keys = {_version_key(name): name for name in names}
+    versions_cache = version_cache()
+    found = versions_cache.get_many(keys.keys())
+
+    versions = {}
+    for key, name in keys.items():
+        version = found.get(key)
+        if version is None:
+            # Seed from the clock so a counter lost to eviction or a restart
+            # can never reuse a version that already has fragments stored under it.
+            version = time.time_ns()
+            if not versions_cache.add(key, version, timeout=None):
+                version = versions_cache.get(key, version)
+        versions[name] = version
+    return versions
+
+
+def _changed_key(name):
+    return f'qbix:changed:{name}'
+
+
+def _bumped_key(name):
+    return f'qbix:bumped:{name}'
+
+
+def bump_version(name):
+    """Invalidate every fragment rendered from the given content model"""
+    versions_cache = version_cache()
+    # Before the new version exists, so whatever is computed under it sees the time
+    versions_cache.set(_bumped_key(name), timezone.now(), timeout=None)
+    if getattr(settings, 'READ_REPLICAS', ()):
+        versions_cache.set(_changed_key(name), True, REPLICA_PIN_SECONDS)
+    key = _version_key(name)
+    try:
+        return versions_cache.incr(key)
+    except ValueError:
+        version = time.time_ns()
+        versions_cache.set(key, version, timeout=None)
+        return version
+
+
+def fresh_reads(*names):
+    """
+    use_primary() while any of the given content models changed in the last
+    REPLICA_PIN_SECONDS, otherwise a no-op. Wraps cache fills: a replica may
+    not have the change yet, and what is read now is stored under the new
+    version for as long as it lives, not just until the replica catches up.
+    """
+    if not getattr(settings, 'READ_REPLICAS', ()) or not names:
+        return nullcontext()
+    changed = version_cache().get_many([_changed_key(name) for name in names])
+    return use_primary() if changed else nullcontext()
+
+
+
+def _normalized_params(request, params=PAGE_CACHE_PARAMS):
+    normalized = []
+    for name in params:
+        value = request.GET.get(name, '').strip()
+        if name in ('page', 'p'):
+            # Paginators treat missing and non-numeric pages as page 1
+            value = value if value.isdigit() else '1'
+        if value:
+            normalized.append(f'{name}={value}')
+    return '&'.join(normalized)
+
+
+def _page_key(request, versions, params):
+    raw = '|'.join([
+        request.get_host(),
+        request.path,
+        _normalized_params(request, params),
+        ','.join(f'{name}:{version}' for name, version in sorted(versions.items())),
+    ])
+    return 'qbix:page:v3:' + hashlib.md5(raw.encode()).hexdigest()
+
+
+def _is_cacheable_request(request):
+    """Only anonymous GETs with no pending flash messages may share a cached page"""
+    if request.method not in ('GET', 'HEAD'):
+        return False
+    # A session cookie means a logged-in user or session-stored messages;
+    # the messages cookie means a flash is waiting to be shown.
+    if settings.SESSION_COOKIE_NAME in request.COOKIES:
+        return False
+    if CookieStorage.cookie_name in request.COOKIES:
+        return False
+    return True
+
+
+def cache_public_page(*names, params=PAGE_CACHE_PARAMS):
+    """
+    Cache the full response of a public view for anonymous visitors.
+
+    The cache key includes the versions of the given content models, so saving
+    or deleting any of them invalidates the page. POSTs and requests with a
+    session or pending messages always reach the view. Works on sync and async
+    views; for async ones the cache is read and filled in a thread.
+    """
+    def lookup(request):
+        """(cache key, cached response or None), or (None, None) if the request may not share a page"""
+        if not _is_cacheable_request(request):
+            return None, None
+        key = _page_key(request, get_versions(*names), params)
+        cached = cache.get(key)
+        if cached is None:
+            return (key if set(request.GET) <= set(params) else None), None
+        page, headers = cached
+        token = get_token(request).encode() if len(page.parts) > 1 else b''
+        response = HttpResponse(page.content(token), headers=headers)
+        response.compressed_page = page, token
+        return key, response
+
+    def store(key, response):
+        if getattr(response, 'is_rendered', True) is False:
+            response.render()
+        if response.status_code == 200 and not response.streaming and not response.cookies:
+            content = response.content
+            if getattr(settings, 'HTML_MINIFY', True) and response.get('Content-Type', '').startswith('text/html'):
+                content = minify_html(content)
+            # Minified and compressed once here; CompressionMiddleware
+            # serves the stored bytes on every hit
+            match = _CSRF_INPUT.search(content)
+            token = match.group(1) if match else b''
+            if match:
+                content = content.replace(token, CSRF_PLACEHOLDER)
+            page = CompressedPage(content, CSRF_PLACEHOLDER if match else None, len(token))
+            cache.set(key, (page, dict(response.items())), PAGE_CACHE_TIMEOUT)
+            response.content = page.content(token)
+            response.compressed_page = page, token
+        return response
+
+    def decorator(view_func):
+        if iscoroutinefunction(view_func):
+            @wraps(view_func)
+            async def async_wrapper(request, *args, **kwargs):
+                key, response = await sync_to_async(lookup)(request)
+                if response is not None:
+                    return response
+                with await sync_to_async(fresh_reads)(*names):
+                    response = await view_func(request, *args, **kwargs)
+                    if key is None:
+                        return response
+                    return await sync_to_async(store)(key, response)
+            return async_wrapper
+
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            key, response = lookup(request)
+            if response is not None:
+                return response
+            # The render fills the page, and any fragment or facet it uses;
+            # a lazy TemplateResponse is rendered by store()
+            with fresh_reads(*names):
+                response = view_func(request, *args, **kwargs)
+                return response if key is None else store(key, response)
+        return wrapper
+    return decorator
+
+
+def get_content_state(*names):
+    """
+    Return [(count, last modified)] for the given content models.
+
+    The last modification is the later of MAX(updated_at) and the model's last
+    version bump: deletions and changes that leave updated_at alone (related
+    items) bump the version without moving MAX(updated_at), or even move it back.
+    The aggregates are cached per model version, so they are queried once after
+    each save/delete rather than on every request.
+    """
+    versions = get_versions(*names)
+    keys = {name: f'qbix:state:{name}:{versions[name]}' for name in names}
+    found = cache.get_many(keys.values())
+
+    missing = [name for name in names if keys[name] not in found]
+    bumped = version_cache().get_many([_bumped_key(name) for name in missing]) if missing else {}
+    with fresh_reads(*missing):
+        for name in missing:
+            aggregate = VERSIONED_MODELS[name].objects.aggregate(count=Count('pk'), latest=Max('updated_at'))
+            latest = max(filter(None, [aggregate['latest'], bumped.get(_bumped_key(name))]), default=None)
+            found[keys[name]] = (aggregate['count'], latest)
+            cache.set(keys[name], found[keys[name]], FRAGMENT_CACHE_TIMEOUT)
+    return [found[keys[name]] for name in names]
+
+
+def _content_state(request, names):
+    """Per-request get_content_state(), or None when a 304 must not be sent"""
+    if not _is_cacheable_request(request):
+        # A pending flash must be rendered, not replaced by the browser's copy
+        return None
+    if not hasattr(request, '_content_state'):
+        request._content_state = get_content_state(*names)
+    return request._content_state
+
+
+def conditional_content(*names, params=PAGE_CACHE_PARAMS):
+    """
+    Answer conditional GETs with 304 when none of the given content models changed.
+
+    The validators come from get_content_state() per model, evaluated before
+    the view, so an unchanged page costs neither its queries nor its render.
+    Its last-modified time includes version bumps, so deletions and rebuilt
+    related items move Last-Modified as well as the ETag, which also carries
+    the count and the cache versions.
+    """
+    def etag_func(request, *args, **kwargs):
+        state = _content_state(request, names)
+        if state is None:
+            return None
+        versions = get_versions(*names)
+        raw = ','.join(
+            f'{count}:{latest.isoformat() if latest else ""}:{versions[name]}'
+            for name, (count, latest) in zip(names, state)
+        )
+        return hashlib.md5(f'{request.path}|{_normalized_params(request, params)}|{raw}'.encode()).hexdigest()
+
+    def last_modified_func(request, *args, **kwargs):
+        state = _content_state(request, names)
+        if not state:
+            return None
+        timestamps = [latest for count, latest in state if latest is not None]
+        return max(timestamps) if timestamps else None
+
+    conditional = condition(etag_func=etag_func, last_modified_func=last_modified_func)
+
+    def decorator(view_func):
+        wrapped = conditional(view_func)
+        if not iscoroutinefunction(view_func):
+            return wrapped
+
+        @wraps(view_func)
+        async def async_wrapper(request, *args, **kwargs):
+            # condition() calls the validators synchronously; run their queries
+            # in a thread first, so it finds them on the request
+            await sync_to_async(_content_state)(request, names)
+            return await wrapped(request, *args, **kwargs)
+        return async_wrapper
+    return decorator
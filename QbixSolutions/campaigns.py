@@ -0,0 +1,282 @@
+"""
+Sending newsletter campaigns.
+
+send_campaign() walks the active subscribers in primary-key order, one batch
+at a time (WHERE id > cursor ORDER BY id LIMIT n, so every batch is an index
+range scan however far the send has got), and records a CampaignDelivery as
+each message is accepted by the mail server. The message is rendered once per
+campaign; only the unsubscribe link differs between recipients. Messages go
+out over a few long-lived connections, one per sending thread, throttled by a
+rate limit they share.
+
+A send that stops part way (crash, deploy, SMTP outage) is resumed by calling
+send_campaign() again: it continues from the campaign's cursor and skips
+subscribers that already have a delivery row.
+"""
+import os
+import smtplib
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.conf import settings
+from django.core import signing
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import DateTimeField, F, Q, Value
+from django.db.models.functions import Coalesce
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import Campaign, CampaignDelivery, NewsletterSubscriber
+
+
+BATCH_SIZE = 500
+
+# A campaign whose sender has not reported progress for this long is assumed
+# to belong to a dead process and may be taken over
+STALE_AFTER = timedelta(minutes=5)
+HEARTBEAT_INTERVAL = 30
+
+UNSUBSCRIBE_SALT = 'QbixSolutions.newsletter.unsubscribe'
+
+
+class CampaignLockLost(Exception):
+    """Another sender took over the campaign, e.g. after this one stalled"""
+
+
+class CampaignBusy(Exception):
+    """Another live sender is working on the campaign"""
+
+
+@dataclass
+class SendReport:
+    sent: int = 0
+    failed: int = 0
+    # Subscribers already handled by an earlier, interrupted run
+    skipped: int = 0
+
+    def __str__(self):
+        return f"{self.sent} sent, {self.failed} failed, {self.skipped} already done"
+
+
+def unsubscribe_token(subscriber_id):
+    return signing.Signer(salt=UNSUBSCRIBE_SALT).sign(str(subscriber_id))
+
+
+def subscriber_for_token(token):
+    """Subscriber id from an unsubscribe token; raises signing.BadSignature"""
+    return int(signing.Signer(salt=UNSUBSCRIBE_SALT).unsign(token))
+
+
+def unsubscribe_url(subscriber_id):
+    path = reverse('QbixSolutions:newsletter_unsubscribe', args=[unsubscribe_token(subscriber_id)])
+    return settings.SITE_URL.rstrip('/') + path
+
+
+class RateLimiter:
+    """
+    Token bucket shared by the sending threads: ``rate`` messages a second on
+    average, in bursts of at most ``burst``. A rate of 0 means no limit.
+    """
+
+    def __init__(self, rate, burst=1, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.sleep = sleep
+        self.tokens = burst
+        self.updated = clock()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        if not self.rate:
+            return
+        with self.lock:
+            now = self.clock()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            # Take a token now even if it is not there yet, then wait for it outside the lock
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0
+        if wait:
+            self.sleep(wait)
+
+
+class _Sender:
+    """Sends messages over one reused connection per thread"""
+
+    def __init__(self, limiter):
+        self.limiter = limiter
+        self.local = threading.local()
+        self.connections = []
+        self.lock = threading.Lock()
+
+    def connection(self):
+        connection = getattr(self.local, 'connection', None)
+        if connection is None:
+            connection = self.local.connection = get_connection(fail_silently=False)
+            connection.open()
+            with self.lock:
+                self.connections.append(connection)
+        return connection
+
+    def send(self, message):
+        """Send one message; returns (status, error) for its delivery row"""
+        self.limiter.acquire()
+        connection = self.connection()
+        try:
+            try:
+                connection.send_messages([message])
+            except smtplib.SMTPServerDisconnected:
+                # Servers drop idle or long-lived connections; reconnect once
+                connection.close()
+                connection.open()
+                connection.send_messages([message])
+        except smtplib.SMTPRecipientsRefused as exc:
+            return CampaignDelivery.FAILED, str(exc.recipients)
+        except smtplib.SMTPResponseException as exc:
+            if exc.smtp_code < 500:
+                raise  # Temporary; stop and let the send be resumed later
+            return CampaignDelivery.FAILED, f"{exc.smtp_code} {exc.smtp_error!r}"
+        return CampaignDelivery.SENT, ''
+
+    def close(self):
+        for connection in self.connections:
+            connection.close()
+
+
+def render(campaign):
+    """
+    (subject, body, marker): the campaign rendered once, with ``marker``
+    standing where each recipient's unsubscribe link goes
+    """
+    marker = f'[[unsubscribe-{uuid.uuid4().hex}]]'
+    post_url = None
+    if campaign.blog_post_id:
+        post_url = settings.SITE_URL.rstrip('/') + reverse(
+            'QbixSolutions:blog_detail', args=[campaign.blog_post.slug],
+        )
+    body = render_to_string('emails/campaign.txt', {
+        'campaign': campaign,
+        'post': campaign.blog_post,
+        'post_url': post_url,
+        'unsubscribe_url': marker,
+    })
+    return campaign.get_subject(), body.strip() + '\n', marker
+
+
+def _message(subject, body, marker, subscriber_id, email):
+    url = unsubscribe_url(subscriber_id)
+    return EmailMessage(
+        subject, body.replace(marker, url), settings.DEFAULT_FROM_EMAIL, [email],
+        headers={
+            # One-click unsubscribe from the mail client (RFC 8058)
+            'List-Unsubscribe': f'<{url}>',
+            'List-Unsubscribe-Post': 'List-Unsubscribe=One-Click',
+        },
+    )
+
+
+def _acquire(campaign_id, worker):
+    now = timezone.now()
+    return Campaign.objects.filter(pk=campaign_id).exclude(status=Campaign.SENT).filter(
+        Q(locked_by='') | Q(heartbeat_at__lt=now - STALE_AFTER),
+    ).update(
+        status=Campaign.SENDING, locked_by=worker, heartbeat_at=now,
+        started_at=Coalesce(F('started_at'), Value(now), output_field=DateTimeField()),
+    )
+
+
+def _heartbeat(campaign_id, worker, **fields):
+    if not Campaign.objects.filter(pk=campaign_id, locked_by=worker).update(heartbeat_at=timezone.now(), **fields):
+        raise CampaignLockLost(f"Campaign {campaign_id} was taken over by another sender")
+
+
+def send_campaign(campaign_id, batch_size=BATCH_SIZE, rate=None, concurrency=None, worker=None, heartbeat=None):
+    """
+    Send a campaign, or resume an interrupted send, and return a SendReport.
+
+    Returns None without sending if the campaign has already been sent or
+    another live sender is working on it. If sending fails part way the
+    error is raised and the campaign is left ready to resume. ``heartbeat``,
+    if given, is called whenever the send reports progress (e.g. jobs.heartbeat).
+    """
+    worker = worker or f'{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}'
+    if not _acquire(campaign_id, worker):
+        return None
+    heartbeat = heartbeat or (lambda: None)
+    heartbeat()
+    rate = settings.NEWSLETTER_SEND_RATE if rate is None else rate
+    concurrency = max(1, concurrency or settings.NEWSLETTER_SEND_CONCURRENCY)
+
+    campaign = Campaign.objects.select_related('blog_post').get(pk=campaign_id)
+    subject, body, marker = render(campaign)
+    sender = _Sender(RateLimiter(rate, burst=concurrency))
+    report = SendReport()
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='campaign') as pool:
+            cursor = campaign.cursor
+            last_heartbeat = time.monotonic()
+            while True:
+                batch = list(
+                    NewsletterSubscriber.objects.filter(active=True, pk__gt=cursor)
+                    .order_by('pk').values_list('pk', 'email')[:batch_size]
+                )
+                if not batch:
+                    break
+                done = set(CampaignDelivery.objects.filter(
+                    campaign_id=campaign_id, subscriber_id__in=[pk for pk, email in batch],
+                ).values_list('subscriber_id', flat=True))
+                report.skipped += len(done)
+                futures = {
+                    pool.submit(sender.send, _message(subject, body, marker, pk, email)): pk
+                    for pk, email in batch if pk not in done
+                }
+
+                error = None
+                for future in as_completed(futures):
+                    if future.cancelled():
+                        continue
+                    try:
+                        status, detail = future.result()
+                    except Exception as exc:
+                        # Stop starting new messages, but still record the ones
+                        # that went out, so a resumed send does not repeat them
+                        if error is None:
+                            error = exc
+                            for pending in futures:
+                                pending.cancel()
+                        continue
+                    CampaignDelivery.objects.create(
+                        campaign_id=campaign_id, subscriber_id=futures[future], status=status, error=detail,
+                    )
+                    if status == CampaignDelivery.SENT:
+                        report.sent += 1
+                    else:
+                        report.failed += 1
+                    if time.monotonic() - last_heartbeat > HEARTBEAT_INTERVAL:
+                        _heartbeat(campaign_id, worker)
+                        heartbeat()
+                        last_heartbeat = time.monotonic()
+                if error is not None:
+                    raise error
+
+                cursor = batch[-1][0]
+                _heartbeat(campaign_id, worker, cursor=cursor)
+                heartbeat()
+                last_heartbeat = time.monotonic()
+    except BaseException:
+        Campaign.objects.filter(pk=campaign_id, locked_by=worker).update(locked_by='', heartbeat_at=None)
+        raise
+    finally:
+        sender.close()
+
+    Campaign.objects.filter(pk=campaign_id, locked_by=worker).update(
+        status=Campaign.SENT, locked_by='', heartbeat_at=None, finished_at=timezone.now(),
+    )
+    return report
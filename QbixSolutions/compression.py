@@ -0,0 +1,280 @@
+"""
+HTML minification and Brotli/gzip compression of dynamic responses.
+
+CompressionMiddleware minifies text/html responses and compresses them for
+the encodings the client accepts. Pages served from cache_public_page() are
+minified and compressed once, when the cache is filled, and stored as a
+CompressedPage; a cache hit only picks the stored bytes for its encoding.
+
+Cached pages carry a per-visitor CSRF token, so their gzip form is stored as
+separately compressed segments around it: each hit compresses just the token
+and splices it in. A Brotli stream cannot be spliced that way, so pages with a
+token are stored as gzip only; Brotli is used for token-free cached pages and
+for responses compressed per request.
+"""
+import json
+import re
+import struct
+import zlib
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+
+# Bodies smaller than this are not worth a compression round-trip
+MIN_SIZE = 200
+
+# Per request, speed matters more than the last few percent
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+# Once per cache fill, squeeze harder
+CACHED_GZIP_LEVEL = 9
+CACHED_BROTLI_QUALITY = 11
+
+ENCODINGS = ('br', 'gzip') if brotli else ('gzip',)
+
+# Deflate can refer back at most this far
+WINDOW = 32 * 1024
+
+# Comments and the elements whose contents must be copied verbatim
+_VERBATIM = re.compile(rb'<!--.*?-->|<(pre|textarea|script|style)\b[^>]*>.*?</\1\s*>', re.S | re.I)
+_JSON_LD = re.compile(rb'(<script\b[^>]*type=["\']application/ld\+json["\'][^>]*>)(.*?)(</script\s*>)', re.S | re.I)
+_TAG = re.compile(rb'(</?([!a-zA-Z][\w-]*)[^>]*>)')
+
+# Whitespace next to these tags never renders, so it can go entirely;
+# elsewhere a run of whitespace still counts as one space
+_BLOCK_TAGS = frozenset(
+    b'!doctype html head body title meta link script style noscript base div section article aside header '
+    b'footer nav main p h1 h2 h3 h4 h5 h6 ul ol li dl dt dd table thead tbody tfoot tr th td form fieldset '
+    b'legend figure figcaption blockquote hr br option pre'.split()
+)
+
+
+def _minify_json_ld(match):
+    opening, body, closing = match.groups()
+    try:
+        data = json.loads(body)
+    except ValueError:
+        return match.group(0)
+    compact = json.dumps(data, ensure_ascii=False, separators=(',', ':')).replace('</', '<\\/')
+    return opening + compact.encode() + closing
+
+
+def _minify_text(html, starts_block, ends_block):
+    """
+    Collapse the whitespace between the tags of ``html``. Tags themselves,
+    and so attribute values, are left alone. ``starts_block`` and
+    ``ends_block`` say whether what precedes and follows it is block-level.
+    """
+    # [text, tag, tag name, text, tag, tag name, ..., text]
+    parts = _TAG.split(html)
+    last = len(parts) - 1
+    for index in range(0, last + 1, 3):
+        text = parts[index]
+        if not text:
+            continue
+        after_block = parts[index - 1].lower() in _BLOCK_TAGS if index else starts_block
+        before_block = parts[index + 2].lower() in _BLOCK_TAGS if index < last else ends_block
+        words = text.split()
+        if not words:
+            parts[index] = b'' if after_block or before_block else (b'\n' if b'\n' in text else b' ')
+            continue
+        collapsed = b' '.join(words)
+        if not after_block and text[:1].isspace():
+            collapsed = b' ' + collapsed
+        if not before_block and text[-1:].isspace():
+            collapsed += b' '
+        parts[index] = collapsed
+    del parts[2::3]
+    return b''.join(parts)
+
+
+def minify_html(content):
+    """
+    Collapse the whitespace and drop the comments in rendered HTML (bytes).
+
+    <pre>, <textarea>, <script> and <style> are copied verbatim, except that
+    JSON-LD is re-serialized without indentation.
+    """
+    out, text, position, starts_block = [], [], 0, True
+    for match in _VERBATIM.finditer(content):
+        text.append(content[position:match.start()])
+        position = match.end()
+        element = match.group(1)
+        if element is None:
+            # A comment; conditional comments are markup, not notes
+            if match.group(0).startswith(b'<!--[if'):
+                text.append(match.group(0))
+            continue
+        block = element.lower() in _BLOCK_TAGS
+        out.append(_minify_text(b''.join(text), starts_block, block))
+        text, starts_block = [], block
+        if element.lower() == b'script':
+            out.append(_JSON_LD.sub(_minify_json_ld, match.group(0)))
+        else:
+            out.append(match.group(0))
+    text.append(content[position:])
+    out.append(_minify_text(b''.join(text), starts_block, True))
+    return b''.join(out)
+
+
+def accepted_encoding(request, available=ENCODINGS):
+    """The first of ``available`` that the request's Accept-Encoding allows, or None"""
+    accepted = {}
+    for item in request.META.get('HTTP_ACCEPT_ENCODING', '').split(','):
+        name, _, params = item.strip().partition(';')
+        quality = 1.0
+        if params.strip().startswith('q='):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    for encoding in available:
+        if accepted.get(encoding, accepted.get('*', 0)) > 0:
+            return encoding
+    return None
+
+
+def compress(data, encoding, level=None):
+    if encoding == 'br':
+        return brotli.compress(data, mode=brotli.MODE_TEXT, quality=level or BROTLI_QUALITY)
+    return _gzip([_deflate(data, level or GZIP_LEVEL, final=True)], data)
+
+
+def _deflate(data, level, final, history=b''):
+    """
+    A raw deflate segment from a fresh compressor. A full flush leaves it
+    byte-aligned, so non-final segments can be concatenated into one stream.
+    ``history`` is what the decoder will already have output before it.
+    """
+    if history:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS, zdict=history[-WINDOW:])
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+    return compressor.compress(data) + compressor.flush(zlib.Z_FINISH if final else zlib.Z_FULL_FLUSH)
+
+
+def _gzip(segments, data):
+    # Fixed header: no file name or timestamp, so equal pages give equal bytes
+    header = b'\x1f\x8b\x08\x00\x00\x00\x00\x00\x00\xff'
+    trailer = struct.pack('<II', zlib.crc32(data), len(data) & 0xffffffff)
+    return header + b''.join(segments) + trailer
+
+
+class CompressedPage:
+    """
+    A minified page compressed once, to be served many times.
+
+    ``secret`` marks a per-visitor value in ``content`` (the CSRF placeholder)
+    that is ``secret_length`` bytes long once filled in; each response passes
+    its own value to content() and encoded(). The gzip form is stored as
+    segments between the secrets. Each may refer back to the page before it,
+    but the secrets stand in as NUL bytes that HTML never contains, so no
+    back-reference can reach into a value it did not see; the value itself is
+    compressed on its own, per response.
+    """
+
+    def __init__(self, content, secret=None, secret_length=0):
+        self.parts = content.split(secret) if secret else [content]
+        self.secret_length = secret_length
+        self.gzip = []
+        history = b''
+        for index, part in enumerate(self.parts):
+            if index:
+                history += b'\0' * secret_length
+            self.gzip.append(_deflate(part, CACHED_GZIP_LEVEL, index == len(self.parts) - 1, history))
+            history += part
+        self.br = None
+        if brotli and len(self.parts) == 1:
+            self.br = compress(content, 'br', CACHED_BROTLI_QUALITY)
+
+    @property
+    def encodings(self):
+        return ('br', 'gzip') if self.br is not None else ('gzip',)
+
+    def content(self, value=b''):
+        return value.join(self.parts)
+
+    def encoded(self, encoding, value=b''):
+        if encoding == 'br':
+            return self.br
+        if len(self.parts) == 1:
+            return _gzip(self.gzip, self.parts[0])
+        content = self.content(value)
+        if len(value) != self.secret_length:
+            # The stored segments' back-references assume the stored length
+            return compress(content, 'gzip')
+        between = _deflate(value, CACHED_GZIP_LEVEL, final=False)
+        segments = [self.gzip[0]]
+        for segment in self.gzip[1:]:
+            segments += [between, segment]
+        return _gzip(segments, content)
+
+
+def _is_html(response):
+    return (
+        not response.streaming
+        and not response.has_header('Content-Encoding')
+        and response.get('Content-Type', '').startswith('text/html')
+    )
+
+
+class CompressionMiddleware:
+    """
+    Minify and Brotli/gzip-compress HTML responses.
+
+    Place it right below WhiteNoiseMiddleware (which already serves static
+    files compressed), above anything that reads or changes the body.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.process_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.process_response(request, await self.get_response(request))
+
+    def process_response(self, request, response):
+        if not _is_html(response):
+            return response
+
+        # Set by cache_public_page(): (CompressedPage, this visitor's token)
+        page, value = getattr(response, 'compressed_page', (None, b''))
+        if page is None and getattr(settings, 'HTML_MINIFY', True):
+            response.content = minify_html(response.content)
+            if response.has_header('Content-Length'):
+                response['Content-Length'] = str(len(response.content))
+        if len(response.content) < MIN_SIZE:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = accepted_encoding(request, page.encodings if page else ENCODINGS)
+        if encoding is None:
+            return response
+        if page is not None:
+            response.content = page.encoded(encoding, value)
+        else:
+            response.content = compress(response.content, encoding)
+        response['Content-Length'] = str(len(response.content))
+        response['Content-Encoding'] = encoding
+        # The compressed bytes differ from the identity ones (RFC 9110 8.8.3)
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        return response
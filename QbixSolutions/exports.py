@@ -0,0 +1,131 @@
+"""
+Streaming CSV/JSON/NDJSON exports of form submissions.
+
+Rows are read with values_list().iterator(), so only one chunk of tuples is in
+memory at a time and no model instances are built; the serialized output is
+yielded line by line to a StreamingHttpResponse or a file.
+"""
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from .models import ContactSubmission, CareerApplication, NewsletterSubscriber
+
+
+CHUNK_SIZE = 2000
+
+# Model name -> (model, [(values_list path, column name)]). Related values are
+# read through the join in the same query (job__title), never per row.
+EXPORTS = {
+    'contactsubmission': (ContactSubmission, [
+        ('id', 'id'),
+        ('name', 'name'),
+        ('email', 'email'),
+        ('phone', 'phone'),
+        ('service', 'service'),
+        ('message', 'message'),
+        ('submitted_at', 'submitted_at'),
+    ]),
+    'careerapplication': (CareerApplication, [
+        ('id', 'id'),
+        ('job__title', 'job'),
+        ('name', 'name'),
+        ('email', 'email'),
+        ('phone', 'phone'),
+        ('portfolio_url', 'portfolio_url'),
+        ('resume', 'resume'),
+        ('cover_letter', 'cover_letter'),
+        ('submitted_at', 'submitted_at'),
+    ]),
+    'newslettersubscriber': (NewsletterSubscriber, [
+        ('id', 'id'),
+        ('email', 'email'),
+        ('active', 'active'),
+        ('subscribed_at', 'subscribed_at'),
+    ]),
+}
+
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'json': 'application/json',
+    'ndjson': 'application/x-ndjson',
+}
+
+# Spreadsheet apps run cells starting with these as formulas
+_FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+class _Echo:
+    """File-like object whose write() returns the value, for csv.writer"""
+
+    def write(self, value):
+        return value
+
+
+def _csv_value(value):
+    if value is None:
+        return ''
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    if isinstance(value, str) and value.startswith(_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def rows(queryset, chunk_size=CHUNK_SIZE):
+    """(column names, iterator of value tuples) for a queryset of an EXPORTS model"""
+    model, columns = EXPORTS[queryset.model._meta.model_name]
+    paths = [path for path, name in columns]
+    return [name for path, name in columns], queryset.values_list(*paths).iterator(chunk_size=chunk_size)
+
+
+def stream(queryset, export_format, chunk_size=CHUNK_SIZE):
+    """Yield the export of ``queryset`` as strings in 'csv', 'json' or 'ndjson' format"""
+    names, values = rows(queryset, chunk_size)
+    if export_format == 'csv':
+        writer = csv.writer(_Echo())
+        yield '\ufeff'  # BOM, so Excel reads the file as UTF-8
+        yield writer.writerow(names)
+        for row in values:
+            yield writer.writerow([_csv_value(value) for value in row])
+    elif export_format == 'ndjson':
+        for row in values:
+            yield json.dumps(dict(zip(names, row)), cls=DjangoJSONEncoder) + '\n'
+    elif export_format == 'json':
+        separator = '[\n'
+        for row in values:
+            yield separator + json.dumps(dict(zip(names, row)), cls=DjangoJSONEncoder)
+            separator = ',\n'
+        yield '[]\n' if separator == '[\n' else '\n]\n'
+    else:
+        raise ValueError(f"Unknown export format {export_format!r}")
+
+
+def filename(queryset, export_format):
+    stamp = timezone.localtime().strftime('%Y%m%d-%H%M')
+    return f'{queryset.model._meta.verbose_name_plural.replace(" ", "-")}-{stamp}.{export_format}'
+
+
+def _batched(chunks, size=64 * 1024):
+    """Join small pieces into blocks of about ``size`` characters so the server
+    writes a few large packets instead of one per row"""
+    buffer, length = [], 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        length += len(chunk)
+        if length >= size:
+            yield ''.join(buffer)
+            buffer, length = [], 0
+    if buffer:
+        yield ''.join(buffer)
+
+
+def export_response(queryset, export_format):
+    response = StreamingHttpResponse(
+        _batched(stream(queryset, export_format)), content_type=CONTENT_TYPES[export_format],
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename(queryset, export_format)}"'
+    return response
@@ -0,0 +1,39 @@
+from django.core.cache import cache
+from django.db.models import Count
+
+from .cache import FRAGMENT_CACHE_TIMEOUT, get_versions
+from .models import Portfolio, BlogPost, JobListing
+
+
+def _facet_counts(name, queryset, field):
+    """
+    Return [(value, count)] for one field, ordered by value.
+
+    The GROUP BY runs once per content version (i.e. once after each save or
+    delete of the model) and is served from the cache on every other request.
+    """
+    key = f'qbix:facet:{name}:{field}:{get_versions(name)[name]}'
+    counts = cache.get(key)
+    if counts is None:
+        counts = [
+            (row[field], row['count'])
+            for row in queryset.order_by(field).values(field).annotate(count=Count('pk'))
+        ]
+        cache.set(key, counts, FRAGMENT_CACHE_TIMEOUT)
+    return counts
+
+
+def portfolio_categories():
+    """[(code, display name, count)] for categories with projects, in CATEGORY_CHOICES order"""
+    counts = dict(_facet_counts('portfolio', Portfolio.objects.all(), 'category'))
+    return [(code, label, counts[code]) for code, label in Portfolio.CATEGORY_CHOICES if code in counts]
+
+
+def blog_categories():
+    """[(category, count)] for every blog category"""
+    return _facet_counts('blogpost', BlogPost.objects.all(), 'category')
+
+
+def job_departments():
+    """[(department, count)] over active job listings"""
+    return _facet_counts('joblisting', JobListing.objects.filter(active=True), 'department')
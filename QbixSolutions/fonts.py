@@ -0,0 +1,228 @@
+"""
+Self-hosted, subsetted web fonts: Font Awesome icons and Inter.
+
+``manage.py build_fonts`` finds the icons the site uses (in templates,
+scripts and Service.icon), cuts Font Awesome's webfonts down to just those
+glyphs, with --inter subsets an Inter variable font to Latin and the weights
+the site uses, and writes the results to static/fonts/ with a matching
+static/css/fonts.css. The output is committed, so serving the site needs none
+of the build tools and no third-party origin: the fonts come from our own,
+hashed and cached like any other static file.
+
+Building needs fonttools, brotli (for WOFF2) and the fontawesomefree package,
+all in requirements-build.txt; nothing is downloaded.
+"""
+import json
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from django.apps import apps
+
+from .assets import minify_css, parse_css
+
+
+STYLES = {
+    'solid': ('fa-solid-900', 'Font Awesome 6 Free', 900),
+    'regular': ('fa-regular-400', 'Font Awesome 6 Free', 400),
+    'brands': ('fa-brands-400', 'Font Awesome 6 Brands', 400),
+}
+STYLE_CLASSES = {
+    'fas': 'solid', 'fa-solid': 'solid',
+    'far': 'regular', 'fa-regular': 'regular',
+    'fab': 'brands', 'fa-brands': 'brands',
+}
+
+INTER_FILE = 'fonts/inter-latin.woff2'
+INTER_WEIGHTS = (300, 800)
+# Google Fonts' "latin" subset
+LATIN = (
+    'U+0000-00FF, U+0131, U+0152-0153, U+02BB-02BC, U+02C6, U+02DA, U+02DC, U+0304, U+0308, '
+    'U+0329, U+2000-206F, U+2074, U+20AC, U+2122, U+2191, U+2193, U+2212, U+2215, U+FEFF, U+FFFD'
+)
+
+CSS_FILE = 'css/fonts.css'
+
+_QUOTED = re.compile(r'"[^"\n]*"|\'[^\'\n]*\'')
+# Not followed by "." either, so font file names (fa-solid-900.woff2) are not read as classes
+_FA_CLASS = re.compile(r'(?<![\w-])(fa[srb]|fa-[a-z0-9-]+)(?![\w.-])')
+
+
+def static_directory():
+    return Path(apps.get_app_config('QbixSolutions').path) / 'static'
+
+
+def font_awesome_directory():
+    """Root of the fontawesomefree package's files; raises ImportError if it is not installed"""
+    import fontawesomefree
+    return Path(fontawesomefree.__file__).parent / 'static' / 'fontawesomefree'
+
+
+@dataclass
+class IconSet:
+    """Icons in use: {style: {name: codepoint}}, plus class names that matched no icon"""
+    icons: dict = field(default_factory=lambda: {style: {} for style in STYLES})
+    unknown: set = field(default_factory=set)
+
+    def __len__(self):
+        return sum(len(names) for names in self.icons.values())
+
+
+def icon_catalog(directory):
+    """{name or alias: (canonical name, codepoint, styles)} from Font Awesome's metadata"""
+    with open(directory / 'metadata' / 'icons.json', encoding='utf-8') as fh:
+        metadata = json.load(fh)
+    catalog = {}
+    for name, icon in metadata.items():
+        entry = (name, int(icon['unicode'], 16), icon['styles'])
+        catalog[name] = entry
+        for alias in icon.get('aliases', {}).get('names', []):
+            catalog.setdefault(alias, entry)
+    return catalog
+
+
+def used_icons(texts, catalog):
+    """
+    Collect the icons named in ``texts`` (template and script sources,
+    Service.icon values). Every quoted string or value is read as a class
+    list such as "fas fa-code" or "fa-brands fa-github fa-2x".
+    """
+    found = IconSet()
+    for text in texts:
+        for chunk in _QUOTED.findall(text) or [text]:
+            classes = _FA_CLASS.findall(chunk)
+            if not any(name.startswith('fa-') for name in classes):
+                continue
+            style = next((STYLE_CLASSES[c] for c in classes if c in STYLE_CLASSES), 'solid')
+            for cls in classes:
+                if cls in STYLE_CLASSES or not cls.startswith('fa-'):
+                    continue
+                entry = catalog.get(cls[3:])
+                if entry is None:
+                    continue  # a modifier such as fa-spin or fa-2x
+                name, codepoint, styles = entry
+                if style in styles:
+                    found.icons[style][cls[3:]] = codepoint
+                else:
+                    found.unknown.add(f'{cls} ({style})')
+    return found
+
+
+def icon_css(directory, icons):
+    """
+    Font Awesome's stylesheet reduced to the used icons: the base classes and
+    modifiers (fa-spin, fa-fw, ...) are kept, glyph rules only for ``icons``.
+    """
+    used = {name for names in icons.icons.values() for name in names}
+    # Brand glyphs are defined in brands.css; its @font-face is replaced by ours
+    css = ''.join(
+        minify_css((directory / 'css' / name).read_text(encoding='utf-8'))
+        for name in ('fontawesome.css', 'brands.css')
+    )
+    out = []
+    for prelude, body in parse_css(css):
+        if body is None or prelude.startswith(('@font-face', ':root')):
+            continue
+        glyphs = re.findall(r'\.fa-([a-z0-9-]+)::?before', prelude)
+        if glyphs and len(glyphs) == len(prelude.split(',')) and 'content:' in body:
+            if not used.intersection(glyphs):
+                continue
+        out.append(f'{prelude}{{{body}}}')
+    return ''.join(out)
+
+
+def missing_icons(classes):
+    """
+    Icon classes in ``classes`` (e.g. a Service.icon value) that the built
+    css/fonts.css has no rule for, i.e. that would render blank
+    """
+    css_file = static_directory() / CSS_FILE
+    css = css_file.read_text(encoding='utf-8') if css_file.exists() else ''
+    return [
+        name for name in _FA_CLASS.findall(classes)
+        if name.startswith('fa-') and name not in STYLE_CLASSES
+        and not re.search(r'\.%s(?![\w-])' % re.escape(name), css)
+    ]
+
+
+def font_face(family, path, weight, display, unicode_range=None):
+    rule = (
+        f'@font-face{{font-family:"{family}";font-style:normal;font-weight:{weight};'
+        f'font-display:{display};src:url("../{path}") format("woff2")'
+    )
+    if unicode_range:
+        rule += f';unicode-range:{unicode_range}'
+    return rule + '}'
+
+
+def stylesheet(directory, icons, with_inter):
+    """Contents of css/fonts.css"""
+    licenses = 'Font Awesome Free: fonts SIL OFL 1.1, icons CC BY 4.0.' + (' Inter: SIL OFL 1.1.' if with_inter else '')
+    parts = [f'/* Generated by manage.py build_fonts; do not edit. {licenses} */\n']
+    if with_inter:
+        parts.append(font_face('Inter', INTER_FILE, '%s %s' % INTER_WEIGHTS, 'swap', LATIN))
+    for style, (filename, family, weight) in STYLES.items():
+        if icons.icons[style]:
+            # "block": a moment of blank space rather than a wrong letter
+            parts.append(font_face(family, f'fonts/{filename}.woff2', weight, 'block'))
+            parts.append(f'.fa-{style},.fa{style[0]}{{font-weight:{weight}}}')
+    parts.append(icon_css(directory, icons))
+    return ''.join(parts) + '\n'
+
+
+def subset_font(source, destination, unicodes=None, axis_limits=None, unicode_range=None):
+    """Write a WOFF2 subset of ``source``; returns its size in bytes"""
+    from fontTools import subset
+    from fontTools.ttLib import TTFont
+
+    font = TTFont(source)
+    options = subset.Options()
+    options.flavor = 'woff2'
+    options.layout_features = ['*'] if unicode_range else []
+    options.name_IDs = ['*']
+    options.notdef_outline = True
+    if unicode_range:
+        unicodes = subset.parse_unicodes(unicode_range.replace(' ', ''))
+    subsetter = subset.Subsetter(options)
+    subsetter.populate(unicodes=unicodes)
+    subsetter.subset(font)
+    if axis_limits:
+        from fontTools.varLib import instancer
+        # After subsetting: the instancer leaves gvar without the glyphs it did
+        # not vary, which the subsetter then trips over. Axes not named (slant,
+        # optical size) are pinned to their defaults.
+        limits = {axis.axisTag: axis.defaultValue for axis in font['fvar'].axes}
+        limits.update(axis_limits)
+        font = instancer.instantiateVariableFont(font, limits)
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    font.flavor = 'woff2'
+    font.save(destination)
+    return destination.stat().st_size
+
+
+# base.html's font links, between these markers, are written by build_fonts
+BEGIN_MARKER = '<!-- fonts: generated by manage.py build_fonts -->'
+END_MARKER = '<!-- /fonts -->'
+
+
+def head_links(icons, with_inter, indent='    '):
+    """The font <link>s for base.html's <head>"""
+    lines = [BEGIN_MARKER]
+    if with_inter:
+        lines.append(f'<link rel="preload" href="{{% static \'{INTER_FILE}\' %}}" as="font" type="font/woff2" crossorigin>')
+    for style, (filename, family, weight) in STYLES.items():
+        if icons.icons[style]:
+            lines.append(
+                f'<link rel="preload" href="{{% static \'fonts/{filename}.woff2\' %}}" as="font" type="font/woff2" crossorigin>'
+            )
+    lines.append(f"{{% stylesheet '{CSS_FILE}' %}}")
+    lines.append(END_MARKER)
+    return '\n'.join(indent + line for line in lines)
+
+
+def rewrite_head(source, links):
+    """Replace the generated block in base.html's source"""
+    pattern = re.compile(r'[ \t]*' + re.escape(BEGIN_MARKER) + r'.*?' + re.escape(END_MARKER), re.S)
+    if not pattern.search(source):
+        raise ValueError(f"base.html has no {BEGIN_MARKER} block")
+    return pattern.sub(lambda match: links, source, count=1)
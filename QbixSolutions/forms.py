@@ -1,5 +1,6 @@
 from django import forms
 from .models import ContactSubmission, CareerApplication, NewsletterSubscriber
+from .uploads import MAX_RESUME_SIZE, TOO_LARGE, StreamedResume, check_signature, resume_storage
 import re
 
 
@@ -55,6 +56,10 @@ class ContactForm(forms.ModelForm):
         if len(name) < 2:
             raise forms.ValidationError("Name must be at least 2 characters long.")
         return name
+    
+    def clean_email(self):
+        # Stored lower-cased, so the admin's email prefix search finds it
+        return self.cleaned_data.get('email').lower()
 
 
 class CareerApplicationForm(forms.ModelForm):
@@ -94,17 +99,32 @@ class CareerApplicationForm(forms.ModelForm):
             }),
         }
     
+    def clean_email(self):
+        # Stored lower-cased, so the admin's email prefix search finds it
+        return self.cleaned_data.get('email').lower()
+    
     def clean_resume(self):
         resume = self.cleaned_data.get('resume')
+        if isinstance(resume, StreamedResume):
+            # Size and type were checked while streaming (views.career_apply)
+            if resume.error:
+                raise forms.ValidationError(resume.error)
+            existing = CareerApplication.objects.filter(resume_sha256=resume.sha256).values_list('resume', flat=True).first()
+            if existing and resume_storage().exists(existing):
+                resume.reuse(existing)
+            self.instance.resume_sha256 = resume.sha256
+            # Already in place; assigning the name stops the model copying it again
+            return resume.stored_name
         if resume:
             # Check file size (max 5MB)
-            if resume.size > 5 * 1024 * 1024:
-                raise forms.ValidationError("Resume file size must not exceed 5MB.")
+            if resume.size > MAX_RESUME_SIZE:
+                raise forms.ValidationError(TOO_LARGE)
             
-            # Check file extension
-            ext = resume.name.split('.')[-1].lower()
-            if ext not in ['pdf', 'doc', 'docx']:
-                raise forms.ValidationError("Only PDF, DOC, and DOCX files are allowed.")
+            # Check file extension and that the content matches it
+            error = check_signature(resume.name, resume.read(16))
+            resume.seek(0)
+            if error:
+                raise forms.ValidationError(error)
         return resume
     
     def clean_phone(self):
@@ -128,9 +148,14 @@ class NewsletterForm(forms.ModelForm):
         }
     
     def clean_email(self):
-        email = self.cleaned_data.get('email')
-        if NewsletterSubscriber.objects.filter(email=email, active=True).exists():
-            raise forms.ValidationError("This email is already subscribed to our newsletter.")
+        email = self.cleaned_data.get('email').strip().lower()
+        existing = NewsletterSubscriber.objects.filter(email=email).first()
+        if existing is not None:
+            if existing.active:
+                raise forms.ValidationError("This email is already subscribed to our newsletter.")
+            # Someone who unsubscribed earlier; save() reactivates their row
+            self.instance = existing
+            self.instance.active = True
         return email
 
 
@@ -180,9 +205,20 @@ class ConsultationForm(forms.Form):
         })
     )
     
+    def clean_email(self):
+        # Stored lower-cased, so the admin's email prefix search finds it
+        return self.cleaned_data.get('email').lower()
+    
     def clean_phone(self):
         phone = self.cleaned_data.get('phone')
         phone_digits = re.sub(r'\D', '', phone)
         if len(phone_digits) < 10:
             raise forms.ValidationError("Please enter a valid phone number.")
         return phone
+
+
+class SubscriberImportForm(forms.Form):
+    file = forms.FileField(
+        label='CSV file',
+        widget=forms.ClearableFileInput(attrs={'accept': '.csv,.txt'}),
+    )
@@ -0,0 +1,157 @@
+"""
+Responsive derivatives of uploaded images.
+
+Every image upload gets resized, re-encoded copies stored next to the original
+(``blog/photo.jpg`` -> ``blog/photo-640w.webp``, ``blog/photo-640w.jpg``, ...).
+What was generated is recorded in the model's ``image_derivatives`` field, which
+the {% responsive_image %} tag reads to build ``srcset``; until then the tag
+falls back to the original file.
+"""
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from .cache import bump_version
+from .models import TeamMember, Portfolio, BlogPost, Testimonial
+
+
+logger = logging.getLogger(__name__)
+
+IMAGE_MODELS = {model._meta.model_name: model for model in (TeamMember, Portfolio, BlogPost, Testimonial)}
+
+# Cards are 300-400 CSS px wide, so these cover 1x-3x screens; nothing is upscaled
+DERIVATIVE_WIDTHS = (320, 640, 960, 1280)
+
+# (extension, Pillow format, MIME type, save options), most efficient first.
+# The last entry is the <img> fallback every browser can decode.
+FORMATS = [
+    ('avif', 'AVIF', 'image/avif', {'quality': 60}),
+    ('webp', 'WEBP', 'image/webp', {'quality': 80, 'method': 4}),
+    ('jpg', 'JPEG', 'image/jpeg', {'quality': 82, 'optimize': True, 'progressive': True}),
+]
+MIME_TYPES = {extension: mime for extension, pillow_format, mime, options in FORMATS}
+
+# A single worker keeps encoding from competing with request threads for CPU
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='image-derivatives')
+
+
+def supported_formats():
+    """The FORMATS this Pillow build can write (AVIF needs Pillow 11.2+ with libavif)"""
+    Image.init()
+    return [entry for entry in FORMATS if entry[1] in Image.SAVE]
+
+
+def derivative_name(name, width, extension):
+    root, _ = os.path.splitext(name)
+    return f'{root}-{width}w.{extension}'
+
+
+def _flatten(image):
+    """JPEG has no alpha channel; composite transparent images onto white"""
+    if image.mode == 'RGB':
+        return image
+    background = Image.new('RGB', image.size, (255, 255, 255))
+    background.paste(image, mask=image.getchannel('A'))
+    return background
+
+
+def generate_derivatives(instance, force=False):
+    """
+    Write the derivatives of ``instance.image`` and record them on the row.
+
+    Returns the new ``image_derivatives`` value, or None when there is no image
+    or it cannot be decoded. Already up-to-date rows are skipped unless ``force``.
+    """
+    fieldfile = instance.image
+    if not fieldfile:
+        return None
+    if not force and instance.image_derivatives.get('source') == fieldfile.name:
+        return instance.image_derivatives
+
+    try:
+        fieldfile.open('rb')
+        try:
+            with Image.open(fieldfile) as original:
+                image = ImageOps.exif_transpose(original)
+                image.load()
+        finally:
+            fieldfile.close()
+    except OSError:  # missing file or not an image (UnidentifiedImageError)
+        logger.exception("Could not read %s for %s %s", fieldfile.name, instance._meta.model_name, instance.pk)
+        return None
+
+    if image.mode not in ('RGB', 'RGBA'):
+        has_alpha = 'A' in image.getbands() or 'transparency' in image.info
+        image = image.convert('RGBA' if has_alpha else 'RGB')
+
+    formats = supported_formats()
+    widths = sorted({min(width, image.width) for width in DERIVATIVE_WIDTHS})
+    storage = fieldfile.storage
+    for width in widths:
+        resized = image
+        if width != image.width:
+            resized = image.resize((width, max(1, round(image.height * width / image.width))), Image.LANCZOS)
+        for extension, pillow_format, mime, options in formats:
+            buffer = BytesIO()
+            (_flatten(resized) if pillow_format == 'JPEG' else resized).save(buffer, pillow_format, **options)
+            name = derivative_name(fieldfile.name, width, extension)
+            # Overwrite in place; the storage would otherwise pick a new name
+            if storage.exists(name):
+                storage.delete(name)
+            storage.save(name, ContentFile(buffer.getvalue()))
+
+    derivatives = {
+        'source': fieldfile.name,
+        'width': image.width,
+        'height': image.height,
+        'widths': widths,
+        'formats': [extension for extension, pillow_format, mime, options in formats],
+    }
+    model = type(instance)
+    # update() rather than save() so this does not schedule itself again; the
+    # image filter skips rows whose image was replaced in the meantime
+    updated = model.objects.filter(pk=instance.pk, image=fieldfile.name).update(
+        image_derivatives=derivatives, updated_at=timezone.now(),
+    )
+    if updated:
+        instance.image_derivatives = derivatives
+        bump_version(model._meta.model_name)
+    return derivatives
+
+
+def _generate(model, pk):
+    instance = model.objects.filter(pk=pk).first()
+    if instance is not None:
+        generate_derivatives(instance)
+
+
+def _generate_in_background(model, pk):
+    # Worker threads get their own connections; drop them like a request would
+    close_old_connections()
+    try:
+        _generate(model, pk)
+    except Exception:
+        logger.exception("Generating image derivatives failed for %s %s", model._meta.model_name, pk)
+    finally:
+        close_old_connections()
+
+
+def schedule_derivatives(instance):
+    """
+    Generate derivatives for ``instance`` once the current transaction commits.
+
+    With IMAGE_DERIVATIVES_ASYNC (the default) the work runs on a background
+    thread so the admin save that uploaded the image returns immediately.
+    """
+    model, pk = type(instance), instance.pk
+    if getattr(settings, 'IMAGE_DERIVATIVES_ASYNC', True):
+        transaction.on_commit(lambda: _executor.submit(_generate_in_background, model, pk))
+    else:
+        transaction.on_commit(lambda: _generate(model, pk))
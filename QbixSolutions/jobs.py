@@ -0,0 +1,151 @@
+"""
+A small database-backed job queue.
+
+Views call enqueue() instead of doing slow work (sending mail, calling other
+services) inline; ``manage.py run_worker`` claims due jobs and runs their
+handlers, retrying failures with exponential backoff. Handlers are plain
+functions registered with @handler and receive the job payload as keyword
+arguments; they must be safe to run more than once. Handlers that may run
+longer than STALE_AFTER call heartbeat() as they go.
+"""
+import logging
+import random
+import threading
+import traceback
+import uuid
+from datetime import timedelta
+
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+
+
+logger = logging.getLogger(__name__)
+
+HANDLERS = {}
+
+# Retry delays: 30s, 1m, 2m, 4m, ... capped at an hour, with jitter so jobs
+# that failed together (e.g. during an SMTP outage) do not retry together
+RETRY_BASE_DELAY = 30
+RETRY_MAX_DELAY = 60 * 60
+
+# A job still running after this long without a heartbeat() is assumed to
+# belong to a dead worker
+STALE_AFTER = timedelta(minutes=10)
+
+# The job being run by each thread, for heartbeat()
+_current = threading.local()
+
+
+def handler(name):
+    """Register a function as the handler for jobs called ``name``"""
+    def register(func):
+        HANDLERS[name] = func
+        return func
+    return register
+
+
+def enqueue(name, payload=None, delay=None, max_attempts=5):
+    """Queue a job to run as soon as a worker is free (or after ``delay``)"""
+    if name not in HANDLERS:
+        raise ValueError(f"No job handler registered for {name!r}")
+    run_at = timezone.now() + delay if delay else timezone.now()
+    return Job.objects.create(name=name, payload=payload or {}, run_at=run_at, max_attempts=max_attempts)
+
+
+def retry_delay(attempts):
+    delay = min(RETRY_BASE_DELAY * 2 ** (attempts - 1), RETRY_MAX_DELAY)
+    return timedelta(seconds=delay * random.uniform(0.75, 1.25))
+
+
+def claim(worker, limit=1):
+    """
+    Mark up to ``limit`` due jobs as running for ``worker`` and return them.
+
+    Claiming is a conditional UPDATE on the queued status, so when several
+    workers race for the same job exactly one of them gets it. Each claim is
+    recorded under its own token (``worker`` plus a random suffix), so a run
+    that was requeued as stale can tell it no longer owns the job even when
+    the same worker, in another thread, claimed it again.
+    """
+    now = timezone.now()
+    candidates = Job.objects.filter(status=Job.QUEUED, run_at__lte=now).order_by('run_at', 'id')
+    claimed = []
+    for pk in candidates.values_list('pk', flat=True)[:limit * 2]:
+        token = f'{worker}:{uuid.uuid4().hex[:12]}'
+        won = Job.objects.filter(pk=pk, status=Job.QUEUED).update(
+            status=Job.RUNNING, locked_by=token, locked_at=now, attempts=F('attempts') + 1,
+        )
+        if won:
+            claimed.append(Job.objects.get(pk=pk))
+            if len(claimed) == limit:
+                break
+    return claimed
+
+
+def run(job):
+    """Run a claimed job and record the outcome; returns True on success"""
+    func = HANDLERS.get(job.name)
+    _current.job = job
+    try:
+        if func is None:
+            raise LookupError(f"No job handler registered for {job.name!r}")
+        func(**job.payload)
+    except Exception:
+        error = traceback.format_exc()
+        if job.attempts >= job.max_attempts or func is None:
+            logger.error("Job %s failed permanently after %s attempts:\n%s", job, job.attempts, error)
+            _finish(job, Job.FAILED, last_error=error)
+        else:
+            logger.warning("Job %s failed (attempt %s of %s), retrying:\n%s", job, job.attempts, job.max_attempts, error)
+            _finish(job, Job.QUEUED, last_error=error, run_at=timezone.now() + retry_delay(job.attempts), finished_at=None)
+        return False
+    finally:
+        _current.job = None
+    _finish(job, Job.DONE, last_error='')
+    return True
+
+
+def heartbeat():
+    """
+    Record that the job running in this thread is still making progress, so
+    requeue_stale() leaves it alone. Does nothing outside a job.
+    """
+    job = getattr(_current, 'job', None)
+    if job is not None:
+        Job.objects.filter(pk=job.pk, status=Job.RUNNING, locked_by=job.locked_by).update(locked_at=timezone.now())
+
+
+def _finish(job, status, **fields):
+    fields.setdefault('finished_at', timezone.now())
+    # Guarded by locked_by so a job requeued as stale and claimed by another
+    # worker is not overwritten by the original, slow one
+    Job.objects.filter(pk=job.pk, status=Job.RUNNING, locked_by=job.locked_by).update(
+        status=status, locked_by='', locked_at=None, **fields,
+    )
+
+
+def requeue_stale(older_than=STALE_AFTER):
+    """Put jobs whose worker died mid-run back in the queue; returns the count"""
+    return Job.objects.filter(status=Job.RUNNING, locked_at__lt=timezone.now() - older_than).update(
+        status=Job.QUEUED, locked_by='', locked_at=None, run_at=timezone.now(),
+    )
+
+
+def purge_finished(older_than=timedelta(days=7)):
+    """Delete successful jobs finished before the cutoff; failed ones are kept for inspection"""
+    deleted, _ = Job.objects.filter(status=Job.DONE, finished_at__lt=timezone.now() - older_than).delete()
+    return deleted
+
+
+def run_pending(worker='inline', limit=100):
+    """Run due jobs in this thread until none are left (or ``limit`` ran); returns the count"""
+    count = 0
+    while count < limit:
+        jobs = claim(worker)
+        if not jobs:
+            break
+        run(jobs[0])
+        count += 1
+    return count
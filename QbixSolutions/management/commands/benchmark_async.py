@@ -0,0 +1,86 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from QbixSolutions.benchmarks import results_document, route_paths, run_load, start_gunicorn, write_results
+
+DEFAULT_ROUTES = 'home,about,blog,portfolio,careers'
+
+MODES = {
+    # mode: (ASGI?, gunicorn app, worker class)
+    'sync': ('0', 'company_site.wsgi', None),
+    'async': ('1', 'company_site.asgi', 'uvicorn_worker.UvicornWorker'),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare throughput of the sync views under gunicorn's WSGI workers with the "
+        "async views under uvicorn workers, with every query slowed by --delay-ms and "
+        "caching off. Run seed_benchmark_data and collectstatic first; needs "
+        "uvicorn and uvicorn-worker."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=2, help="gunicorn worker processes for both modes")
+        parser.add_argument('--threads', type=int, default=1, help="Threads per sync worker (gthread when > 1)")
+        parser.add_argument('--concurrency', type=int, default=16)
+        parser.add_argument('--duration', type=float, default=10.0, help="Seconds per mode")
+        parser.add_argument('--delay-ms', type=float, default=20.0, help="Added to every query")
+        parser.add_argument('--routes', default=DEFAULT_ROUTES, help="Comma-separated route names")
+        parser.add_argument('--output', help="Write the results to this JSON file")
+
+    def handle(self, *args, **options):
+        paths = route_paths()
+        names = options['routes'].split(',')
+        unknown = set(names) - set(paths)
+        if unknown:
+            raise CommandError(f"Unknown routes: {', '.join(sorted(unknown))}")
+        paths = {name: paths[name] for name in names}
+
+        measured = {}
+        for mode, (async_views, app, worker_class) in MODES.items():
+            env = {
+                'ASYNC_VIEWS': async_views,
+                'CACHE_BACKEND': 'dummy',
+                'BENCHMARK_QUERY_DELAY_MS': str(options['delay_ms']),
+            }
+            threads = options['threads'] if mode == 'sync' else 1
+            try:
+                server, url = start_gunicorn(options['workers'], env, app, worker_class, threads)
+            except RuntimeError as exc:
+                raise CommandError(str(exc))
+            try:
+                self.stdout.write(f"{mode}: {options['concurrency']} clients for {options['duration']:g}s ...")
+                measured[mode] = run_load(url, paths, options['concurrency'], options['duration'])
+            finally:
+                server.terminate()
+                server.wait(timeout=10)
+
+        self.stdout.write(
+            f"{'route':>12}  {'sync req/s':>10}  {'async req/s':>11}  {'speed-up':>8}  "
+            f"{'sync p95':>8}  {'async p95':>9}  {'errors':>6}"
+        )
+        results = {}
+        for name in [*paths, 'total']:
+            sync, asynchronous = (
+                measured[mode][1] if name == 'total' else measured[mode][0][name] for mode in MODES
+            )
+            errors = sync['errors'] + asynchronous['errors']
+            if not (sync['requests'] and asynchronous['requests']):
+                self.stdout.write(f"{name:>12}  {'-':>10}  {'-':>11}  {'':>8}  {'':>8}  {'':>9}  {errors:>6}")
+                continue
+            results[name] = {
+                'sync_rps': sync['rps'], 'async_rps': asynchronous['rps'],
+                'sync_p95_ms': sync['p95_ms'], 'async_p95_ms': asynchronous['p95_ms'], 'errors': errors,
+            }
+            self.stdout.write(
+                f"{name:>12}  {sync['rps']:>10.1f}  {asynchronous['rps']:>11.1f}  "
+                f"{asynchronous['rps'] / sync['rps']:>7.2f}x  {sync['p95_ms']:>8.1f}  "
+                f"{asynchronous['p95_ms']:>9.1f}  {errors:>6}"
+            )
+        if options['output']:
+            document = results_document(
+                'async', results, workers=options['workers'], threads=options['threads'],
+                concurrency=options['concurrency'], duration=options['duration'], delay_ms=options['delay_ms'],
+            )
+            write_results(options['output'], document)
+            self.stdout.write(f"Wrote {options['output']}")
@@ -0,0 +1,66 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from QbixSolutions.benchmarks import isolated_cache
+from QbixSolutions.compression import compress, minify_html
+
+MIDDLEWARE = 'QbixSolutions.compression.CompressionMiddleware'
+PAGES = ['home', 'about', 'services', 'portfolio', 'blog', 'careers', 'contact']
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare bytes on the wire and CPU per request for the public pages without "
+        "and with HTML minification and compression. Uses the configured database "
+        "and a private in-process cache, not the site's."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=200)
+        parser.add_argument('--accept-encoding', default='gzip, deflate, br')
+
+    @isolated_cache()
+    def handle(self, *args, **options):
+        repeat, accept = options['repeat'], options['accept_encoding']
+        without = [name for name in settings.MIDDLEWARE if name != MIDDLEWARE]
+
+        self.stdout.write(
+            f"{'page':>10}  {'before B':>9}  {'after B':>8}  {'enc':>4}  "
+            f"{'before ms':>9}  {'after ms':>8}  {'uncached +ms':>12}"
+        )
+        totals = [0, 0]
+        for name in PAGES:
+            path = reverse(f'QbixSolutions:{name}')
+            with override_settings(MIDDLEWARE=without, HTML_MINIFY=False):
+                before, before_ms = self._measure(path, accept, repeat)
+            after, after_ms = self._measure(path, accept, repeat)
+            # What a page that is not cached (or a cache fill) pays on top of rendering
+            encoding = after.get('Content-Encoding') or 'gzip'
+            extra_ms = self._time(repeat, lambda: compress(minify_html(before.content), encoding))
+            totals[0] += len(before.content)
+            totals[1] += len(after.content)
+            self.stdout.write(
+                f"{name:>10}  {len(before.content):>9}  {len(after.content):>8}  "
+                f"{after.get('Content-Encoding', '-'):>4}  {before_ms:>9.3f}  {after_ms:>8.3f}  {extra_ms:>12.3f}"
+            )
+        self.stdout.write(f"{'total':>10}  {totals[0]:>9}  {totals[1]:>8}  ({totals[1] / totals[0]:.0%} of before)")
+
+    def _measure(self, path, accept, repeat):
+        """The response, and CPU ms per request, for anonymous cache hits"""
+        cache.clear()
+        client = Client(HTTP_ACCEPT_ENCODING=accept, SERVER_NAME='localhost')
+        response = client.get(path)  # fill the page cache
+        return response, self._time(repeat, lambda: client.get(path))
+
+    def _time(self, repeat, func):
+        func()  # warm up
+        started = time.process_time()
+        for _ in range(repeat):
+            func()
+        return (time.process_time() - started) / repeat * 1000
@@ -0,0 +1,56 @@
+import os
+import resource
+import sys
+import time
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from QbixSolutions.exports import stream
+from QbixSolutions.models import ContactSubmission
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024
+
+
+class Command(BaseCommand):
+    help = (
+        "Export synthetic contact submissions in every format and report time and "
+        "peak memory. The rows are inserted inside a transaction that is rolled back, "
+        "so the database is left unchanged."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self._seed(options['rows'])
+            self.stdout.write(f"Peak RSS after seeding: {peak_rss_mb():.1f} MB")
+            self.stdout.write(f"{'format':>8}  {'seconds':>8}  {'rows/s':>9}  {'MB written':>10}  {'peak RSS MB':>11}")
+            queryset = ContactSubmission.objects.all()
+            for export_format in ('csv', 'json', 'ndjson'):
+                started = time.perf_counter()
+                written = 0
+                with open(os.devnull, 'w', encoding='utf-8') as output:
+                    for chunk in stream(queryset, export_format):
+                        written += output.write(chunk)
+                elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f"{export_format:>8}  {elapsed:>8.2f}  {options['rows'] / elapsed:>9.0f}  "
+                    f"{written / 1024 / 1024:>10.1f}  {peak_rss_mb():>11.1f}"
+                )
+            transaction.set_rollback(True)
+
+    def _seed(self, count, batch_size=5_000):
+        self.stdout.write(f"Seeding {count} submissions (rolled back afterwards)...")
+        for start in range(0, count, batch_size):
+            ContactSubmission.objects.bulk_create([
+                ContactSubmission(
+                    name=f'Visitor {i}', email=f'visitor{i}@example.com', phone='+91 98765 43210',
+                    service='Web Development', message='We would like a quote for a new website. ' * 4,
+                )
+                for i in range(start, min(start + batch_size, count))
+            ])
@@ -0,0 +1,67 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.core.paginator import Paginator
+from django.db import transaction
+from django.utils import timezone
+
+from QbixSolutions.models import BlogPost
+from QbixSolutions.pagination import KeysetPaginator
+from QbixSolutions.views import BLOG_KEYSET_ORDERING
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare offset (?page=N) and keyset (?cursor=) pagination latency at increasing "
+        "depths over synthetic blog posts. The posts are inserted inside a transaction "
+        "that is rolled back, so the database is left unchanged."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=100_000)
+        parser.add_argument('--per-page', type=int, default=9)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        posts, per_page, repeat = options['posts'], options['per_page'], options['repeat']
+        with transaction.atomic():
+            self._seed(posts)
+            last_page = (BlogPost.objects.count() + per_page - 1) // per_page
+            depths = sorted({1, 10, 100, 1_000, last_page // 2, last_page} & set(range(1, last_page + 1)))
+
+            self.stdout.write(f"{'page':>8}  {'offset ms':>10}  {'keyset ms':>10}")
+            for depth in depths:
+                offset_ms = self._time(repeat, lambda: list(
+                    Paginator(BlogPost.objects.all(), per_page).page(depth)
+                ))
+                keyset = KeysetPaginator(BlogPost.objects.all(), per_page, BLOG_KEYSET_ORDERING)
+                cursor = None
+                if depth > 1:
+                    anchor = BlogPost.objects.order_by(*BLOG_KEYSET_ORDERING)[(depth - 1) * per_page - 1]
+                    cursor = keyset.encode_cursor(anchor, 'next')
+                keyset_ms = self._time(repeat, lambda: list(keyset.get_page(cursor)))
+                self.stdout.write(f"{depth:>8}  {offset_ms:>10.3f}  {keyset_ms:>10.3f}")
+
+            transaction.set_rollback(True)
+
+    def _seed(self, count, batch_size=5_000):
+        now = timezone.now()
+        self.stdout.write(f"Seeding {count} posts (rolled back afterwards)...")
+        for start in range(0, count, batch_size):
+            BlogPost.objects.bulk_create([
+                BlogPost(
+                    title=f'Benchmark post {i}', slug=f'benchmark-post-{i}', excerpt='Excerpt',
+                    content='Content', author='Benchmark', category=f'Category {i % 8}',
+                    # Some posts share a timestamp so the id tie-breaker is exercised
+                    published_date=now - timedelta(minutes=i // 3),
+                )
+                for i in range(start, min(start + batch_size, count))
+            ])
+
+    def _time(self, repeat, func):
+        func()  # warm up
+        started = time.perf_counter()
+        for _ in range(repeat):
+            func()
+        return (time.perf_counter() - started) / repeat * 1000
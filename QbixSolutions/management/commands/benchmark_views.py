@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from QbixSolutions.benchmarks import measure_views, results_document, route_paths, write_results
+
+
+class Command(BaseCommand):
+    help = (
+        "Time every route in QbixSolutions/urls.py in process: median wall time with an "
+        "empty cache and with the page cache filled, query count and bytes rendered. "
+        "Run seed_benchmark_data first. Uses a private in-process cache, not the site's."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--output', help="Write the results to this JSON file")
+
+    def handle(self, *args, **options):
+        results = measure_views(route_paths(), repeat=options['repeat'])
+        self.stdout.write(
+            f"{'route':>22}  {'status':>6}  {'queries':>7}  {'warm q':>6}  {'bytes':>7}  "
+            f"{'cold ms':>8}  {'cold p95':>8}  {'warm ms':>8}"
+        )
+        for name, row in results.items():
+            self.stdout.write(
+                f"{name:>22}  {row['status']:>6}  {row['queries']:>7}  {row['warm_queries']:>6}  {row['bytes']:>7}  "
+                f"{row['cold_ms']:>8.2f}  {row['cold_p95_ms']:>8.2f}  {row['warm_ms']:>8.2f}"
+            )
+        if options['output']:
+            write_results(options['output'], results_document('views', results, repeat=options['repeat']))
+            self.stdout.write(f"Wrote {options['output']}")
@@ -0,0 +1,82 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError
+
+from QbixSolutions import fonts
+from QbixSolutions.models import Service
+
+
+class Command(BaseCommand):
+    help = (
+        "Subset Font Awesome to the icons the site uses (and, with --inter, Inter to "
+        "Latin) into static/fonts/, write static/css/fonts.css and update base.html "
+        "to load them. Re-run after using a new icon in a template or a service."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--inter', metavar='FONT',
+            help="Inter variable font (InterVariable.ttf from https://rsms.me/inter/) to subset and self-host",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            directory = fonts.font_awesome_directory()
+            import fontTools.subset  # noqa: F401
+            import brotli  # noqa: F401
+        except ImportError as exc:
+            raise CommandError(f"{exc}. Install the build tools: pip install -r requirements-build.txt")
+
+        app = Path(__file__).resolve().parents[2]
+        static = fonts.static_directory()
+        texts = [path.read_text(encoding='utf-8') for path in sorted((app / 'templates').rglob('*.html'))]
+        texts += [path.read_text(encoding='utf-8') for path in sorted(static.rglob('*.js'))]
+        try:
+            texts += list(Service.objects.values_list('icon', flat=True))
+        except DatabaseError as exc:
+            self.stdout.write(self.style.WARNING(f"Skipping Service.icon values, database unavailable: {exc}"))
+
+        icons = fonts.used_icons(texts, fonts.icon_catalog(directory))
+        for name in sorted(icons.unknown):
+            self.stdout.write(self.style.WARNING(f"No such icon: {name}"))
+
+        for style, (filename, family, weight) in fonts.STYLES.items():
+            destination = static / 'fonts' / f'{filename}.woff2'
+            if not icons.icons[style]:
+                destination.unlink(missing_ok=True)
+                continue
+            size = fonts.subset_font(
+                directory / 'webfonts' / f'{filename}.ttf', destination,
+                unicodes=sorted(icons.icons[style].values()),
+            )
+            self.stdout.write(f"{destination.relative_to(app)}: {len(icons.icons[style])} {style} icons, {size / 1024:.1f} KB")
+
+        inter = static / fonts.INTER_FILE
+        if options['inter']:
+            source = Path(options['inter'])
+            if not source.exists():
+                raise CommandError(f"No such file: {source}")
+            size = fonts.subset_font(
+                source, inter, axis_limits={'wght': fonts.INTER_WEIGHTS}, unicode_range=fonts.LATIN,
+            )
+            self.stdout.write(f"{inter.relative_to(app)}: Inter {fonts.INTER_WEIGHTS[0]}-{fonts.INTER_WEIGHTS[1]}, Latin, {size / 1024:.1f} KB")
+        elif not inter.exists():
+            self.stdout.write(self.style.WARNING(
+                f"No {fonts.INTER_FILE}; pages fall back to system fonts until --inter is given."
+            ))
+
+        css = static / fonts.CSS_FILE
+        css.write_text(fonts.stylesheet(directory, icons, inter.exists()), encoding='utf-8')
+        self.stdout.write(f"{css.relative_to(app)}: {css.stat().st_size / 1024:.1f} KB")
+
+        base = app / 'templates' / 'base.html'
+        source = base.read_text(encoding='utf-8')
+        try:
+            updated = fonts.rewrite_head(source, fonts.head_links(icons, inter.exists()))
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        if updated != source:
+            base.write_text(updated, encoding='utf-8')
+            self.stdout.write(f"Updated {base.relative_to(app)}")
+        self.stdout.write(self.style.SUCCESS(f"{len(icons)} icons in use."))
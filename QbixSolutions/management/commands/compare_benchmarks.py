@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from QbixSolutions.benchmarks import compare, read_results
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare two results files from benchmark_views or load_test and exit with an "
+        "error if any route regressed: slower by more than --threshold (and --min-ms), "
+        "fewer requests per second, or more queries."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('baseline')
+        parser.add_argument('current')
+        parser.add_argument('--threshold', type=float, default=0.25, help="Allowed relative slowdown (0.25 = 25%%)")
+        parser.add_argument('--min-ms', type=float, default=1.0, help="Ignore slowdowns smaller than this")
+
+    def handle(self, *args, **options):
+        baseline, current = read_results(options['baseline']), read_results(options['current'])
+        if baseline.get('kind') != current.get('kind'):
+            raise CommandError(f"Cannot compare {baseline.get('kind')} results with {current.get('kind')} results")
+
+        missing = sorted(set(baseline['results']) - set(current['results']))
+        if missing:
+            self.stdout.write(self.style.WARNING(f"Not in current results: {', '.join(missing)}"))
+        regressions = compare(baseline, current, options['threshold'], options['min_ms'])
+        if not regressions:
+            self.stdout.write(self.style.SUCCESS(f"No regressions across {len(current['results'])} routes."))
+            return
+        for route, metric, old, new in regressions:
+            self.stdout.write(f"{route:>22}  {metric:>12}  {old:>10}  ->  {new:>10}")
+        raise CommandError(f"{len(regressions)} regression(s)")
@@ -0,0 +1,58 @@
+from datetime import datetime, time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from QbixSolutions.exports import CHUNK_SIZE, EXPORTS, stream
+
+
+DATE_FIELDS = {
+    'contactsubmission': 'submitted_at',
+    'careerapplication': 'submitted_at',
+    'newslettersubscriber': 'subscribed_at',
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Export contact submissions, career applications or newsletter subscribers "
+        "as CSV, JSON or NDJSON. Rows are streamed, so memory use does not grow with the table."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('model', choices=sorted(EXPORTS))
+        parser.add_argument('--format', choices=['csv', 'json', 'ndjson'], default='csv')
+        parser.add_argument('--output', '-o', help="File to write (default: standard output)")
+        parser.add_argument('--since', type=self._date, help="Only rows submitted on or after YYYY-MM-DD")
+        parser.add_argument('--until', type=self._date, help="Only rows submitted before YYYY-MM-DD")
+        parser.add_argument('--active', action='store_true', help="Newsletter subscribers: only active ones")
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+
+    def _date(self, value):
+        date = parse_date(value)
+        if date is None:
+            raise CommandError(f"Invalid date {value!r}, expected YYYY-MM-DD")
+        return timezone.make_aware(datetime.combine(date, time.min))
+
+    def handle(self, *args, **options):
+        name = options['model']
+        model, columns = EXPORTS[name]
+        queryset = model.objects.all()
+        date_field = DATE_FIELDS[name]
+        if options['since']:
+            queryset = queryset.filter(**{f'{date_field}__gte': options['since']})
+        if options['until']:
+            queryset = queryset.filter(**{f'{date_field}__lt': options['until']})
+        if options['active']:
+            if name != 'newslettersubscriber':
+                raise CommandError("--active only applies to newslettersubscriber")
+            queryset = queryset.filter(active=True)
+
+        chunks = stream(queryset, options['format'], chunk_size=options['chunk_size'])
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8', newline='') as output:
+                output.writelines(chunks)
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
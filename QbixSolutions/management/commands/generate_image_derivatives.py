@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from QbixSolutions.images import IMAGE_MODELS, generate_derivatives
+
+
+class Command(BaseCommand):
+    help = "Generate responsive image derivatives for uploaded images that do not have them yet"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help="Regenerate derivatives that already exist")
+        parser.add_argument('--model', choices=sorted(IMAGE_MODELS), action='append',
+                            help="Only process this model (may be repeated)")
+
+    def handle(self, *args, **options):
+        generated = failed = 0
+        for name in options['model'] or sorted(IMAGE_MODELS):
+            for instance in IMAGE_MODELS[name].objects.exclude(image='').exclude(image=None).iterator():
+                current = instance.image_derivatives.get('source') == instance.image.name
+                if current and not options['force']:
+                    continue
+                if generate_derivatives(instance, force=options['force']) is None:
+                    failed += 1
+                    self.stderr.write(f"Could not process {name} {instance.pk}: {instance.image.name}")
+                else:
+                    generated += 1
+        self.stdout.write(self.style.SUCCESS(f"Generated derivatives for {generated} images ({failed} failed)."))
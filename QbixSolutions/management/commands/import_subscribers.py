@@ -0,0 +1,37 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from QbixSolutions.subscribers import BATCH_SIZE, import_subscribers, read_csv_emails
+
+
+class Command(BaseCommand):
+    help = (
+        "Import newsletter subscribers from CSV files (an 'email' column, or addresses "
+        "in the first column). Addresses are lower-cased and de-duplicated, new ones "
+        "are added and unsubscribed ones reactivated."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('files', nargs='+', help="CSV files to import, or - for standard input")
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument('--dry-run', action='store_true', help="Report what would change, then roll back")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        with transaction.atomic():
+            for path in options['files']:
+                try:
+                    source = sys.stdin if path == '-' else open(path, encoding='utf-8-sig', newline='')
+                except OSError as exc:
+                    raise CommandError(f"Cannot read {path}: {exc}")
+                with source:
+                    report = import_subscribers(read_csv_emails(source), batch_size=options['batch_size'])
+                self.stdout.write(f"{path}: {report}")
+            if options['dry_run']:
+                transaction.set_rollback(True)
+        elapsed = time.perf_counter() - started
+        suffix = " (dry run, nothing saved)" if options['dry_run'] else ""
+        self.stdout.write(self.style.SUCCESS(f"Done in {elapsed:.1f}s{suffix}."))
@@ -0,0 +1,64 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from QbixSolutions.benchmarks import results_document, route_paths, run_load, start_gunicorn, write_results
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test the public routes over HTTP and report p50/p95/p99 latency and "
+        "requests per second. Targets --url, or starts gunicorn on a free local port. "
+        "Run seed_benchmark_data and collectstatic first."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', help="Base URL of a running server, e.g. http://127.0.0.1:8000")
+        parser.add_argument('--workers', type=int, default=2, help="gunicorn workers when --url is not given")
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--duration', type=float, default=10.0, help="Seconds")
+        parser.add_argument('--routes', help="Comma-separated route names (default: all)")
+        parser.add_argument('--output', help="Write the results to this JSON file")
+
+    def handle(self, *args, **options):
+        paths = route_paths()
+        if options['routes']:
+            names = options['routes'].split(',')
+            unknown = set(names) - set(paths)
+            if unknown:
+                raise CommandError(f"Unknown routes: {', '.join(sorted(unknown))}")
+            paths = {name: paths[name] for name in names}
+
+        server = None
+        url = options['url']
+        if not url:
+            try:
+                server, url = start_gunicorn(options['workers'])
+            except RuntimeError as exc:
+                raise CommandError(str(exc))
+        try:
+            self.stdout.write(
+                f"{options['concurrency']} clients for {options['duration']:g}s against {url} ..."
+            )
+            results, overall = run_load(url, paths, options['concurrency'], options['duration'])
+        finally:
+            if server:
+                server.terminate()
+                server.wait(timeout=10)
+
+        self.stdout.write(
+            f"{'route':>22}  {'requests':>8}  {'errors':>6}  {'req/s':>7}  {'p50 ms':>7}  {'p95 ms':>7}  {'p99 ms':>7}"
+        )
+        for name, row in [*results.items(), ('total', overall)]:
+            if not row['requests']:
+                self.stdout.write(f"{name:>22}  {0:>8}  {row['errors']:>6}")
+                continue
+            self.stdout.write(
+                f"{name:>22}  {row['requests']:>8}  {row['errors']:>6}  {row['rps']:>7.1f}  "
+                f"{row['p50_ms']:>7.2f}  {row['p95_ms']:>7.2f}  {row['p99_ms']:>7.2f}"
+            )
+        if options['output']:
+            document = results_document(
+                'load', results, total=overall, url=url,
+                concurrency=options['concurrency'], duration=options['duration'],
+            )
+            write_results(options['output'], document)
+            self.stdout.write(f"Wrote {options['output']}")
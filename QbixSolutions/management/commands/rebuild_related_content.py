@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from QbixSolutions.related import RELATED_COUNT, rebuild_related
+
+
+class Command(BaseCommand):
+    help = "Recompute the related posts and projects shown on blog and portfolio detail pages"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=RELATED_COUNT, help="Related items stored per item")
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        updated = rebuild_related(count=options['count'], batch_size=options['batch_size'])
+        elapsed = time.perf_counter() - started
+        summary = ', '.join(f"{name}: {rows}" for name, rows in updated.items())
+        self.stdout.write(self.style.SUCCESS(f"Updated related items ({summary}) in {elapsed:.2f}s."))
@@ -0,0 +1,70 @@
+import os
+import signal
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from QbixSolutions import jobs
+
+
+class Command(BaseCommand):
+    help = (
+        "Run queued background jobs (notification and confirmation emails). "
+        "Several workers may run at once, on one or more machines."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=2, help="Jobs run in parallel by this worker")
+        parser.add_argument('--poll-interval', type=float, default=1.0, help="Seconds to sleep when the queue is empty")
+        parser.add_argument('--once', action='store_true', help="Run the jobs that are due now, then exit")
+
+    def handle(self, *args, **options):
+        self.worker = f'{socket.gethostname()}:{os.getpid()}'
+        self.stopping = threading.Event()
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, lambda signum, frame: self.stopping.set())
+        concurrency = max(1, options['concurrency'])
+
+        self.stdout.write(f"Worker {self.worker} started with concurrency {concurrency}")
+        running = set()
+        last_housekeeping = 0
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='job') as pool:
+            try:
+                while not self.stopping.is_set():
+                    running = {future for future in running if not future.done()}
+                    if time.monotonic() - last_housekeeping > 60:
+                        self._housekeeping()
+                        last_housekeeping = time.monotonic()
+
+                    claimed = jobs.claim(self.worker, limit=concurrency - len(running))
+                    running.update(pool.submit(self._run, job) for job in claimed)
+                    if len(running) >= concurrency:
+                        # Claim no more than can start; the rest stay free for other workers
+                        wait(running, return_when=FIRST_COMPLETED)
+                    elif not claimed:
+                        if options['once']:
+                            break
+                        self.stopping.wait(options['poll_interval'])
+            except KeyboardInterrupt:
+                pass
+            # Let jobs in progress finish; unstarted ones were never claimed
+            wait(running)
+        self.stdout.write(f"Worker {self.worker} stopped")
+
+    def _run(self, job):
+        close_old_connections()
+        try:
+            ok = jobs.run(job)
+            self.stdout.write(f"{'Finished' if ok else 'Failed'} {job}")
+        finally:
+            close_old_connections()
+
+    def _housekeeping(self):
+        requeued = jobs.requeue_stale()
+        if requeued:
+            self.stdout.write(self.style.WARNING(f"Requeued {requeued} stale jobs"))
+        jobs.purge_finished()
@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from QbixSolutions.benchmarks import DEFAULT_COUNTS, clear_seeded, seed
+
+
+class Command(BaseCommand):
+    help = (
+        "Insert synthetic content and submissions for benchmarking. Seeded rows use "
+        "'bench-' slugs and @bench.example.com addresses; --clear removes them again."
+    )
+
+    def add_arguments(self, parser):
+        for name, count in DEFAULT_COUNTS.items():
+            parser.add_argument(f'--{name}', type=int, default=count, help=f"Default {count}")
+        parser.add_argument('--clear', action='store_true', help="Only remove previously seeded rows")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        removed = clear_seeded()
+        if options['clear']:
+            self.stdout.write(self.style.SUCCESS(f"Removed {removed} seeded rows."))
+            return
+        counts = {name: options[name] for name in DEFAULT_COUNTS}
+        seed(counts)
+        summary = ', '.join(f"{count} {name}" for name, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(f"Seeded {summary} in {time.perf_counter() - started:.1f}s."))
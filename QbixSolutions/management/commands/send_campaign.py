@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from QbixSolutions.campaigns import BATCH_SIZE, send_campaign
+from QbixSolutions.models import Campaign
+
+
+class Command(BaseCommand):
+    help = (
+        "Send a newsletter campaign to every active subscriber, in this process. "
+        "Run it again to resume a send that was interrupted; nobody is emailed twice."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('campaign_id', type=int)
+        parser.add_argument('--rate', type=float, help="Messages per second (default NEWSLETTER_SEND_RATE, 0 for no limit)")
+        parser.add_argument('--concurrency', type=int, help="SMTP connections (default NEWSLETTER_SEND_CONCURRENCY)")
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        campaign = Campaign.objects.filter(pk=options['campaign_id']).first()
+        if campaign is None:
+            raise CommandError(f"No campaign with id {options['campaign_id']}")
+        if campaign.status == Campaign.SENT:
+            raise CommandError(f"Campaign {campaign.pk} has already been sent")
+
+        started = time.perf_counter()
+        report = send_campaign(
+            campaign.pk, batch_size=options['batch_size'], rate=options['rate'], concurrency=options['concurrency'],
+        )
+        if report is None:
+            raise CommandError(f"Campaign {campaign.pk} is being sent by another process")
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f"{campaign}: {report} in {elapsed:.1f}s."))
@@ -0,0 +1,102 @@
+# Generated by Django 5.2.8 on 2026-10-17 09:30
+
+from django.db import migrations, models
+
+
+SQLITE_FORWARD = [
+    # External-content FTS5 table: the text lives once, in the document table
+    """CREATE VIRTUAL TABLE qbix_search_fts USING fts5(
+        title, body,
+        content='QbixSolutions_searchdocument', content_rowid='id',
+        tokenize='porter unicode61'
+    )""",
+    """CREATE TRIGGER qbix_search_ai AFTER INSERT ON QbixSolutions_searchdocument BEGIN
+        INSERT INTO qbix_search_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END""",
+    """CREATE TRIGGER qbix_search_ad AFTER DELETE ON QbixSolutions_searchdocument BEGIN
+        INSERT INTO qbix_search_fts(qbix_search_fts, rowid, title, body) VALUES ('delete', old.id, old.title, old.body);
+    END""",
+    """CREATE TRIGGER qbix_search_au AFTER UPDATE ON QbixSolutions_searchdocument BEGIN
+        INSERT INTO qbix_search_fts(qbix_search_fts, rowid, title, body) VALUES ('delete', old.id, old.title, old.body);
+        INSERT INTO qbix_search_fts(rowid, title, body) VALUES (new.id, new.title, new.body);
+    END""",
+]
+
+SQLITE_BACKWARD = [
+    'DROP TRIGGER IF EXISTS qbix_search_au',
+    'DROP TRIGGER IF EXISTS qbix_search_ad',
+    'DROP TRIGGER IF EXISTS qbix_search_ai',
+    'DROP TABLE IF EXISTS qbix_search_fts',
+]
+
+# Must match QbixSolutions.search.PG_VECTOR exactly for the planner to use the index
+POSTGRESQL_FORWARD = [
+    """CREATE INDEX qbix_search_vector_idx ON "QbixSolutions_searchdocument" USING GIN ((
+        setweight(to_tsvector('english', "title"), 'A') || setweight(to_tsvector('english', "body"), 'B')
+    ))""",
+]
+
+POSTGRESQL_BACKWARD = [
+    'DROP INDEX IF EXISTS qbix_search_vector_idx',
+]
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    statements = {'sqlite': SQLITE_FORWARD, 'postgresql': POSTGRESQL_FORWARD}.get(vendor, [])
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    statements = {'sqlite': SQLITE_BACKWARD, 'postgresql': POSTGRESQL_BACKWARD}.get(vendor, [])
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def index_existing_content(apps, schema_editor):
+    SearchDocument = apps.get_model('QbixSolutions', 'SearchDocument')
+    documents = []
+    for post in apps.get_model('QbixSolutions', 'BlogPost').objects.all():
+        documents.append(SearchDocument(
+            kind='blogpost', object_id=post.pk, slug=post.slug, title=post.title,
+            body=f"{post.excerpt}\n{post.content}",
+        ))
+    for item in apps.get_model('QbixSolutions', 'Portfolio').objects.all():
+        documents.append(SearchDocument(
+            kind='portfolio', object_id=item.pk, slug=item.slug, title=item.title,
+            body=f"{item.description}\n{item.technologies}",
+        ))
+    for service in apps.get_model('QbixSolutions', 'Service').objects.all():
+        documents.append(SearchDocument(
+            kind='service', object_id=service.pk, slug=service.slug, title=service.title,
+            body=service.full_description,
+        ))
+    SearchDocument.objects.bulk_create(documents, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('QbixSolutions', '0003_content_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('blogpost', 'Blog Post'), ('portfolio', 'Portfolio Item'), ('service', 'Service')], max_length=20)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('slug', models.SlugField()),
+                ('title', models.CharField(max_length=200)),
+                ('body', models.TextField()),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('kind', 'object_id'), name='unique_search_document')],
+            },
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+        migrations.RunPython(index_existing_content, migrations.RunPython.noop),
+    ]
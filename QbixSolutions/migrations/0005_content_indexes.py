@@ -0,0 +1,69 @@
+# Generated by Django 5.2.8 on 2026-10-17 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('QbixSolutions', '0004_search_document'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='blogpost',
+            index=models.Index(fields=['-published_date'], name='blogpost_published_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='blogpost',
+            index=models.Index(fields=['category', '-published_date'], name='blogpost_category_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='blogpost',
+            index=models.Index(fields=['-featured', '-published_date'], name='blogpost_featured_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='careerapplication',
+            index=models.Index(fields=['-submitted_at', '-id'], name='application_submitted_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contactsubmission',
+            index=models.Index(fields=['-submitted_at', '-id'], name='contact_submitted_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contactsubmission',
+            index=models.Index(fields=['service'], name='contact_service_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='joblisting',
+            index=models.Index(condition=models.Q(('active', True)), fields=['-posted_date'], name='joblisting_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='joblisting',
+            index=models.Index(condition=models.Q(('active', True)), fields=['department', '-posted_date'], name='joblisting_department_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='newslettersubscriber',
+            index=models.Index(fields=['-subscribed_at', '-id'], name='subscriber_subscribed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='portfolio',
+            index=models.Index(fields=['-featured', 'order', '-completion_date'], name='portfolio_listing_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='portfolio',
+            index=models.Index(fields=['category', '-featured', 'order', '-completion_date'], name='portfolio_category_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='service',
+            index=models.Index(fields=['order', 'title'], name='service_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='teammember',
+            index=models.Index(fields=['order', 'name'], name='teammember_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='testimonial',
+            index=models.Index(condition=models.Q(('featured', True)), fields=['order', '-id'], name='testimonial_featured_idx'),
+        ),
+    ]
@@ -0,0 +1,82 @@
+# Generated by Django 5.2.8 on 2026-10-17 10:30
+
+from django.db import migrations, models
+from django.utils.text import slugify
+
+
+def split_comma_list(text):
+    return [item.strip() for item in (text or '').split(',') if item.strip()]
+
+
+def technology_slug(name):
+    return slugify(name.replace('+', ' plus').replace('#', ' sharp'))
+
+
+def populate_parsed_lists(apps, schema_editor):
+    Service = apps.get_model('QbixSolutions', 'Service')
+    Portfolio = apps.get_model('QbixSolutions', 'Portfolio')
+    Technology = apps.get_model('QbixSolutions', 'Technology')
+
+    services = list(Service.objects.all())
+    for service in services:
+        service.feature_list = split_comma_list(service.features)
+    Service.objects.bulk_update(services, ['feature_list'], batch_size=500)
+
+    projects = list(Portfolio.objects.all())
+    names = {}
+    for project in projects:
+        project.technology_list = split_comma_list(project.technologies)
+        for name in project.technology_list:
+            names.setdefault(technology_slug(name), name)
+    Portfolio.objects.bulk_update(projects, ['technology_list'], batch_size=500)
+
+    names.pop('', None)
+    Technology.objects.bulk_create(
+        [Technology(name=name, slug=slug) for slug, name in names.items()],
+        ignore_conflicts=True,
+    )
+    technologies = dict(Technology.objects.values_list('slug', 'pk'))
+    Through = Portfolio.technology_tags.through
+    Through.objects.bulk_create([
+        Through(portfolio_id=project.pk, technology_id=technologies[slug])
+        for project in projects
+        for slug in {technology_slug(name) for name in project.technology_list} - {''}
+    ], ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('QbixSolutions', '0005_content_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Technology',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('slug', models.SlugField(max_length=100, unique=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Technologies',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='portfolio',
+            name='technology_list',
+            field=models.JSONField(default=list, editable=False),
+        ),
+        migrations.AddField(
+            model_name='service',
+            name='feature_list',
+            field=models.JSONField(default=list, editable=False),
+        ),
+        migrations.AddField(
+            model_name='portfolio',
+            name='technology_tags',
+            field=models.ManyToManyField(blank=True, editable=False, related_name='projects', to='QbixSolutions.technology'),
+        ),
+        migrations.RunPython(populate_parsed_lists, migrations.RunPython.noop),
+    ]
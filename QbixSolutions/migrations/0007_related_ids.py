@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-17 11:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('QbixSolutions', '0006_parsed_list_fields'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blogpost',
+            name='related_ids',
+            field=models.JSONField(default=list, editable=False),
+        ),
+        migrations.AddField(
+            model_name='portfolio',
+            name='related_ids',
+            field=models.JSONField(default=list, editable=False),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.8 on 2026-10-17 12:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('QbixSolutions', '0007_related_ids'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blogpost',
+            name='image_derivatives',
+            field=models.JSONField(default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='portfolio',
+            name='image_derivatives',
+            field=models.JSONField(default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='teammember',
+            name='image_derivatives',
+            field=models.JSONField(default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='testimonial',
+            name='image_derivatives',
+            field=models.JSONField(default=dict, editable=False),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.8 on 2026-10-17 14:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('QbixSolutions', '0009_job_queue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='careerapplication',
+            name='resume_sha256',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.AddIndex(
+            model_name='careerapplication',
+            index=models.Index(fields=['resume_sha256'], name='application_resume_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.8 on 2026-10-17 14:40
+
+from django.db import migrations
+from django.db.models import F
+from django.db.models.functions import Lower
+
+
+def lowercase_emails(apps, schema_editor):
+    """Subscribers are now stored lower-cased; fold existing rows, merging case duplicates"""
+    NewsletterSubscriber = apps.get_model('QbixSolutions', 'NewsletterSubscriber')
+    mixed = NewsletterSubscriber.objects.annotate(folded=Lower('email')).exclude(folded=F('email'))
+    for subscriber in mixed.order_by('subscribed_at', 'pk'):
+        email = subscriber.email.lower()
+        existing = NewsletterSubscriber.objects.filter(email=email).first()
+        if existing is None:
+            subscriber.email = email
+            subscriber.save(update_fields=['email'])
+            continue
+        # Keep the lower-case row, subscribed if either of them was
+        if subscriber.active and not existing.active:
+            existing.active = True
+            existing.save(update_fields=['active'])
+        subscriber.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('QbixSolutions', '0010_resume_sha256'),
+    ]
+
+    operations = [
+        migrations.RunPython(lowercase_emails, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.8 on 2026-10-17 15:20
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('QbixSolutions', '0011_lowercase_subscriber_emails'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Campaign',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('subject', models.CharField(blank=True, help_text="Defaults to the blog post's title", max_length=200)),
+                ('body', models.TextField(blank=True, help_text='Plain text; used when no blog post is chosen')),
+                ('status', models.CharField(choices=[('draft', 'Draft'), ('sending', 'Sending'), ('sent', 'Sent')], default='draft', max_length=10)),
+                ('cursor', models.PositiveBigIntegerField(default=0, editable=False)),
+                ('locked_by', models.CharField(blank=True, editable=False, max_length=100)),
+                ('heartbeat_at', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, editable=False, null=True)),
+                ('blog_post', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='campaigns', to='QbixSolutions.blogpost')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='CampaignDelivery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('sent', 'Sent'), ('failed', 'Failed')], max_length=10)),
+                ('error', models.TextField(blank=True)),
+                ('sent_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('campaign', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='deliveries', to='QbixSolutions.campaign')),
+                ('subscriber', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='deliveries', to='QbixSolutions.newslettersubscriber')),
+            ],
+            options={
+                'verbose_name_plural': 'campaign deliveries',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='campaign',
+            index=models.Index(fields=['-created_at', '-id'], name='campaign_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='campaigndelivery',
+            index=models.Index(fields=['campaign', 'status'], name='delivery_status_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='campaigndelivery',
+            constraint=models.UniqueConstraint(fields=('campaign', 'subscriber'), name='unique_campaign_delivery'),
+        ),
+    ]
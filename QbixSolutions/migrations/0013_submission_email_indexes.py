@@ -0,0 +1,30 @@
+# Generated by Django 5.2.8 on 2026-10-18 09:10
+
+from django.db import migrations, models
+from django.db.models.functions import Lower
+
+
+def lowercase_emails(apps, schema_editor):
+    """Submissions are now stored with lower-cased emails, so the admin's prefix search finds them"""
+    for name in ('ContactSubmission', 'CareerApplication'):
+        model = apps.get_model('QbixSolutions', name)
+        model.objects.exclude(email=Lower('email')).update(email=Lower('email'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('QbixSolutions', '0012_newsletter_campaigns'),
+    ]
+
+    operations = [
+        migrations.RunPython(lowercase_emails, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='careerapplication',
+            index=models.Index(fields=['email'], name='application_email_idx', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='contactsubmission',
+            index=models.Index(fields=['email'], name='contact_email_idx', opclasses=['varchar_pattern_ops']),
+        ),
+    ]
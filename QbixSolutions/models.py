@@ -1,17 +1,29 @@
+from django.core.exceptions import ValidationError
 from django.db import models
 from django.utils import timezone
+from django.utils.text import slugify
 
 # Create your models here.
 
+def split_comma_list(text):
+    """Parse comma-separated admin input into a list of stripped, non-empty items"""
+    return [item.strip() for item in (text or '').split(',') if item.strip()]
+
 class TeamMember(models.Model):
     name = models.CharField(max_length=100)
     position = models.CharField(max_length=100)
     bio = models.TextField()
     image = models.ImageField(upload_to='team/', blank=True, null=True)
+    # Resized copies of image written by images.generate_derivatives
+    image_derivatives = models.JSONField(default=dict, editable=False)
     order = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['order', 'name']
+        indexes = [
+            models.Index(fields=['order', 'name'], name='teammember_order_idx'),
+        ]
     
     def __str__(self):
         return self.name
@@ -24,16 +36,54 @@ class Service(models.Model):
     short_description = models.CharField(max_length=300)
     full_description = models.TextField()
     features = models.TextField(help_text="Comma-separated features")
+    # Parsed from features on save so templates never split strings
+    feature_list = models.JSONField(default=list, editable=False)
     order = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['order', 'title']
+        indexes = [
+            models.Index(fields=['order', 'title'], name='service_order_idx'),
+        ]
     
     def __str__(self):
         return self.title
     
+    def save(self, *args, **kwargs):
+        self.feature_list = split_comma_list(self.features)
+        super().save(*args, **kwargs)
+    
     def get_features_list(self):
-        return [f.strip() for f in self.features.split(',') if f.strip()]
+        return self.feature_list
+
+
+class Technology(models.Model):
+    """A technology tag, normalized from Portfolio.technologies for indexed lookups"""
+    name = models.CharField(max_length=100)
+    slug = models.SlugField(max_length=100, unique=True)
+    
+    class Meta:
+        ordering = ['name']
+        verbose_name_plural = "Technologies"
+    
+    def __str__(self):
+        return self.name
+    
+    @staticmethod
+    def slug_for(name):
+        # Keep C, C++ and C# apart; slugify() alone would drop the symbols
+        return slugify(name.replace('+', ' plus').replace('#', ' sharp'))
+    
+    @classmethod
+    def for_names(cls, names):
+        """Return Technology rows for the given names, creating any that are missing"""
+        by_slug = {cls.slug_for(name): name for name in names if cls.slug_for(name)}
+        cls.objects.bulk_create(
+            [cls(name=name, slug=slug) for slug, name in by_slug.items()],
+            ignore_conflicts=True,
+        )
+        return cls.objects.filter(slug__in=by_slug)
 
 
 class Portfolio(models.Model):
@@ -56,22 +106,42 @@ class Portfolio(models.Model):
     category = models.CharField(max_length=100, choices=CATEGORY_CHOICES, default='Other')
     description = models.TextField()
     technologies = models.CharField(max_length=300)
+    # Both derived from technologies on save: the list for rendering, the tags
+    # for queries like Portfolio.objects.filter(technology_tags__slug='django')
+    technology_list = models.JSONField(default=list, editable=False)
+    technology_tags = models.ManyToManyField(Technology, related_name='projects', blank=True, editable=False)
+    # Most similar projects, best first; precomputed by rebuild_related_content
+    related_ids = models.JSONField(default=list, editable=False)
     image = models.ImageField(upload_to='portfolio/', blank=True, null=True)
+    # Resized copies of image written by images.generate_derivatives
+    image_derivatives = models.JSONField(default=dict, editable=False)
     project_url = models.URLField(blank=True)
     completion_date = models.DateField()
     featured = models.BooleanField(default=False)
     order = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['-featured', 'order', '-completion_date']
         verbose_name_plural = "Portfolio Items"
+        indexes = [
+            # Listing and home page (featured=True): the default ordering as-is
+            models.Index(fields=['-featured', 'order', '-completion_date'], name='portfolio_listing_idx'),
+            # Category filter and related projects
+            models.Index(fields=['category', '-featured', 'order', '-completion_date'], name='portfolio_category_idx'),
+        ]
     
     def __str__(self):
         return self.title
     
+    def save(self, *args, **kwargs):
+        self.technology_list = split_comma_list(self.technologies)
+        super().save(*args, **kwargs)
+        self.technology_tags.set(Technology.for_names(self.technology_list))
+    
     def get_technologies_list(self):
         """Return technologies as a list"""
-        return [tech.strip() for tech in self.technologies.split(',') if tech.strip()]
+        return self.technology_list
 
 
 class BlogPost(models.Model):
@@ -82,11 +152,23 @@ class BlogPost(models.Model):
     author = models.CharField(max_length=100)
     category = models.CharField(max_length=100)
     image = models.ImageField(upload_to='blog/', blank=True, null=True)
+    # Resized copies of image written by images.generate_derivatives
+    image_derivatives = models.JSONField(default=dict, editable=False)
     published_date = models.DateTimeField(default=timezone.now)
     featured = models.BooleanField(default=False)
+    # Most similar posts, best first; precomputed by rebuild_related_content
+    related_ids = models.JSONField(default=list, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['-published_date']
+        indexes = [
+            models.Index(fields=['-published_date'], name='blogpost_published_idx'),
+            # Category filter and related posts
+            models.Index(fields=['category', '-published_date'], name='blogpost_category_idx'),
+            # Home page (featured first) and the blog's featured posts
+            models.Index(fields=['-featured', '-published_date'], name='blogpost_featured_idx'),
+        ]
     
     def __str__(self):
         return self.title
@@ -99,11 +181,19 @@ class Testimonial(models.Model):
     testimonial = models.TextField()
     rating = models.IntegerField(default=5)
     image = models.ImageField(upload_to='testimonials/', blank=True, null=True)
+    # Resized copies of image written by images.generate_derivatives
+    image_derivatives = models.JSONField(default=dict, editable=False)
     featured = models.BooleanField(default=True)
     order = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['order', '-id']
+        indexes = [
+            # filter(featured=True) compiles to a bare WHERE "featured", which SQLite
+            # can only serve from a partial index with the same condition
+            models.Index(fields=['order', '-id'], condition=models.Q(featured=True), name='testimonial_featured_idx'),
+        ]
     
     def __str__(self):
         return f"{self.client_name} - {self.company}"
@@ -127,9 +217,16 @@ class JobListing(models.Model):
     responsibilities = models.TextField()
     posted_date = models.DateField(default=timezone.now)
     active = models.BooleanField(default=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['-posted_date']
+        indexes = [
+            # Partial indexes: only active listings are ever shown publicly
+            models.Index(fields=['-posted_date'], condition=models.Q(active=True), name='joblisting_active_idx'),
+            # Department filter and the department list
+            models.Index(fields=['department', '-posted_date'], condition=models.Q(active=True), name='joblisting_department_idx'),
+        ]
     
     def __str__(self):
         return self.title
@@ -145,6 +242,13 @@ class ContactSubmission(models.Model):
     
     class Meta:
         ordering = ['-submitted_at']
+        indexes = [
+            models.Index(fields=['-submitted_at', '-id'], name='contact_submitted_idx'),
+            # The admin's service filter lists DISTINCT service values
+            models.Index(fields=['service'], name='contact_service_idx'),
+            # The admin searches by email prefix (LIKE 'x%' on PostgreSQL)
+            models.Index(fields=['email'], name='contact_email_idx', opclasses=['varchar_pattern_ops']),
+        ]
     
     def __str__(self):
         return f"{self.name} - {self.submitted_at.strftime('%Y-%m-%d')}"
@@ -157,11 +261,18 @@ class CareerApplication(models.Model):
     phone = models.CharField(max_length=20)
     cover_letter = models.TextField()
     resume = models.FileField(upload_to='resumes/')
+    # SHA-256 of the résumé, so an identical re-upload reuses the stored file
+    resume_sha256 = models.CharField(max_length=64, blank=True, editable=False)
     portfolio_url = models.URLField(blank=True)
     submitted_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
         ordering = ['-submitted_at']
+        indexes = [
+            models.Index(fields=['-submitted_at', '-id'], name='application_submitted_idx'),
+            models.Index(fields=['resume_sha256'], name='application_resume_idx'),
+            models.Index(fields=['email'], name='application_email_idx', opclasses=['varchar_pattern_ops']),
+        ]
     
     def __str__(self):
         return f"{self.name} - {self.job.title}"
@@ -174,7 +285,157 @@ class NewsletterSubscriber(models.Model):
     
     class Meta:
         ordering = ['-subscribed_at']
+        indexes = [
+            models.Index(fields=['-subscribed_at', '-id'], name='subscriber_subscribed_idx'),
+        ]
     
     def __str__(self):
         return self.email
 
+
+
+class SearchDocument(models.Model):
+    """
+    Denormalized text of a searchable object, kept in sync by signals.
+
+    The full-text index over this table is created by migration 0004 for the
+    active database: an FTS5 table on SQLite, a GIN tsvector index on PostgreSQL.
+    """
+    KIND_CHOICES = [
+        ('blogpost', 'Blog Post'),
+        ('portfolio', 'Portfolio Item'),
+        ('service', 'Service'),
+    ]
+    
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    slug = models.SlugField()
+    title = models.CharField(max_length=200)
+    body = models.TextField()
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id'], name='unique_search_document'),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_kind_display()}: {self.title}"
+
+
+class Job(models.Model):
+    """
+    A unit of background work, run by ``manage.py run_worker``.
+
+    Enqueued with jobs.enqueue() in the same transaction as the data it refers
+    to, so a worker never sees a job whose row was rolled back.
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+    
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            # Workers poll for due jobs: WHERE status = 'queued' AND run_at <= now ORDER BY run_at
+            models.Index(fields=['status', 'run_at', 'id'], name='job_due_idx'),
+            models.Index(fields=['-created_at', '-id'], name='job_created_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
+
+
+class Campaign(models.Model):
+    """
+    A newsletter email to every active subscriber, sent by campaigns.send_campaign().
+
+    The message is either a blog post (its excerpt and a link to it) or a
+    custom body. Each recipient gets a CampaignDelivery row, so an
+    interrupted send can be resumed without emailing anyone twice.
+    """
+    DRAFT = 'draft'
+    SENDING = 'sending'
+    SENT = 'sent'
+    STATUS_CHOICES = [
+        (DRAFT, 'Draft'),
+        (SENDING, 'Sending'),
+        (SENT, 'Sent'),
+    ]
+    
+    subject = models.CharField(max_length=200, blank=True, help_text="Defaults to the blog post's title")
+    blog_post = models.ForeignKey(BlogPost, on_delete=models.SET_NULL, null=True, blank=True, related_name='campaigns')
+    body = models.TextField(blank=True, help_text="Plain text; used when no blog post is chosen")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=DRAFT)
+    # Highest subscriber id every delivery up to which has been recorded
+    cursor = models.PositiveBigIntegerField(default=0, editable=False)
+    locked_by = models.CharField(max_length=100, blank=True, editable=False)
+    heartbeat_at = models.DateTimeField(null=True, blank=True, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True, editable=False)
+    finished_at = models.DateTimeField(null=True, blank=True, editable=False)
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='campaign_created_idx'),
+        ]
+    
+    def __str__(self):
+        return self.get_subject()
+    
+    def get_subject(self):
+        if self.subject:
+            return self.subject
+        return self.blog_post.title if self.blog_post_id else 'Qbix Solutions newsletter'
+    
+    def clean(self):
+        if not self.blog_post_id and not self.body.strip():
+            raise ValidationError("Choose a blog post or write a body.")
+
+
+class CampaignDelivery(models.Model):
+    """Outcome of sending a campaign to one subscriber"""
+    SENT = 'sent'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (SENT, 'Sent'),
+        (FAILED, 'Failed'),
+    ]
+    
+    campaign = models.ForeignKey(Campaign, on_delete=models.CASCADE, related_name='deliveries')
+    subscriber = models.ForeignKey(NewsletterSubscriber, on_delete=models.CASCADE, related_name='deliveries')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES)
+    error = models.TextField(blank=True)
+    sent_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        verbose_name_plural = 'campaign deliveries'
+        constraints = [
+            # Also the index the sender uses to skip subscribers already handled
+            models.UniqueConstraint(fields=['campaign', 'subscriber'], name='unique_campaign_delivery'),
+        ]
+        indexes = [
+            models.Index(fields=['campaign', 'status'], name='delivery_status_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.campaign} to subscriber {self.subscriber_id} ({self.status})"
@@ -0,0 +1,164 @@
+from django.core import signing
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Max, Q
+from django.utils.functional import cached_property
+
+
+CURSOR_SALT = 'QbixSolutions.pagination.cursor'
+
+# Unfiltered tables estimated above this many rows are not counted exactly
+ESTIMATE_THRESHOLD = 10_000
+
+
+class KeysetPage:
+    """
+    One page of a KeysetPaginator.
+
+    Mirrors the parts of django.core.paginator.Page the templates use, but has
+    opaque previous/next cursors instead of page numbers.
+    """
+    is_keyset = True
+
+    def __init__(self, object_list, paginator, has_previous, has_next):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_previous = has_previous
+        self._has_next = has_next
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_next(self):
+        return self._has_next
+
+    def has_other_pages(self):
+        return self._has_previous or self._has_next
+
+    @property
+    def previous_cursor(self):
+        if not (self._has_previous and self.object_list):
+            return None
+        return self.paginator.encode_cursor(self.object_list[0], 'prev')
+
+    @property
+    def next_cursor(self):
+        if not (self._has_next and self.object_list):
+            return None
+        return self.paginator.encode_cursor(self.object_list[-1], 'next')
+
+
+class KeysetPaginator:
+    """
+    Cursor pagination that seeks past the last row seen instead of using OFFSET.
+
+    Every page is a single indexed range scan of per_page + 1 rows, so deep pages
+    cost the same as the first and no COUNT(*) is needed. ``ordering`` must be
+    unique (end it with the primary key) and should match an index.
+    """
+
+    def __init__(self, queryset, per_page, ordering):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.ordering = list(ordering)
+        self._keys = [(name.lstrip('-'), name.startswith('-')) for name in self.ordering]
+        opts = queryset.model._meta
+        self._fields = [opts.pk if name in ('pk', 'id') else opts.get_field(name) for name, desc in self._keys]
+
+    def encode_cursor(self, obj, direction):
+        values = [field.value_to_string(obj) for field in self._fields]
+        return signing.dumps({'v': values, 'd': direction}, salt=CURSOR_SALT, compress=True)
+
+    def decode_cursor(self, cursor):
+        """Return (values, direction), or None for a missing, tampered or stale cursor"""
+        if not cursor:
+            return None
+        try:
+            data = signing.loads(cursor, salt=CURSOR_SALT)
+            values = [field.to_python(value) for field, value in zip(self._fields, data['v'], strict=True)]
+        except (signing.BadSignature, KeyError, TypeError, ValueError, ValidationError):
+            return None
+        if data.get('d') not in ('next', 'prev'):
+            return None
+        return values, data['d']
+
+    def _seek(self, values, forward):
+        """Rows strictly after (forward) or before the given key, in ordering terms"""
+        condition = Q()
+        equal = {}
+        for (name, desc), value in zip(self._keys, values):
+            lookup = 'lt' if desc == forward else 'gt'
+            condition |= Q(**equal, **{f'{name}__{lookup}': value})
+            equal[name] = value
+        # Redundant bound on the leading column so the database can start a
+        # range scan on the index instead of filtering from the first row
+        name, desc = self._keys[0]
+        lead = 'lte' if desc == forward else 'gte'
+        return Q(**{f'{name}__{lead}': values[0]}) & condition
+
+    def get_page(self, cursor=None):
+        position = self.decode_cursor(cursor)
+        limit = self.per_page + 1
+
+        if position is None:
+            rows = list(self.queryset.order_by(*self.ordering)[:limit])
+            return KeysetPage(rows[:self.per_page], self, False, len(rows) > self.per_page)
+
+        values, direction = position
+        if direction == 'next':
+            rows = list(self.queryset.filter(self._seek(values, True)).order_by(*self.ordering)[:limit])
+            return KeysetPage(rows[:self.per_page], self, True, len(rows) > self.per_page)
+
+        reverse = [name[1:] if name.startswith('-') else f'-{name}' for name in self.ordering]
+        rows = list(self.queryset.filter(self._seek(values, False)).order_by(*reverse)[:limit])
+        return KeysetPage(rows[:self.per_page][::-1], self, len(rows) > self.per_page, True)
+
+
+def estimated_count(model, using='default'):
+    """
+    A cheap estimate of the number of rows in ``model``'s table, or None.
+
+    PostgreSQL's planner statistics are used when the table has been analyzed;
+    otherwise the largest primary key, an upper bound read from the end of
+    its index.
+    """
+    connection = connections[using]
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [model._meta.db_table])
+            row = cursor.fetchone()
+        if row and row[0] >= 0:
+            return row[0]
+    if model._meta.pk.get_internal_type() not in ('AutoField', 'BigAutoField', 'SmallAutoField'):
+        return None
+    return model._default_manager.using(using).aggregate(largest=Max('pk'))['largest'] or 0
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    A Paginator that does not run an exact COUNT(*) over large, unfiltered
+    tables, for admin changelists of tables that only grow.
+
+    Without filters or a search the table's estimated size is used once it is
+    over ESTIMATE_THRESHOLD; the last page may then come up short or empty.
+    Filtered querysets are counted exactly.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimated_count(queryset.model, queryset.db)
+            if estimate is not None and estimate > ESTIMATE_THRESHOLD:
+                return estimate
+        return super().count
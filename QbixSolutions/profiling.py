@@ -0,0 +1,236 @@
+"""
+Per-request render and query profiling (RENDER_PROFILING).
+
+When it is on, RenderProfileMiddleware times each request's templates, their
+{% block %}s and its database queries, adds the figures to the response as a
+Server-Timing header (shown in the browser's network panel) and keeps the last
+RENDER_PROFILE_SIZE requests in a ring buffer, which staff can read as JSON at
+/admin/render-profile/. The buffer is per process.
+
+Template and block times are inclusive: a template's time contains the
+templates it extends or includes, a block's the blocks nested in it. Queries
+are timed by an execute wrapper on every connection, so those run in other
+threads for the request (async_views.fan_out) are counted too.
+
+Off by default: the figures name templates and blocks, and the hooks cost a
+little on every render.
+"""
+import threading
+import time
+from collections import defaultdict, deque
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import JsonResponse
+from django.template.base import Template
+from django.template.loader_tags import BlockNode
+
+
+# Requests kept for the staff report
+RENDER_PROFILE_SIZE = getattr(settings, 'RENDER_PROFILE_SIZE', 500)
+
+# Templates and blocks named in the Server-Timing header, slowest first
+SERVER_TIMING_ENTRIES = 5
+
+profiles = deque(maxlen=RENDER_PROFILE_SIZE)
+
+_current = ContextVar('qbix_render_profile', default=None)
+_install_lock = threading.Lock()
+_installed = False
+
+
+class Profile:
+    """What one request spent, in seconds"""
+
+    def __init__(self):
+        self.templates = defaultdict(float)
+        self.blocks = defaultdict(float)
+        self.queries = 0
+        self.query_time = 0.0
+        self.lock = threading.Lock()
+
+    def add_query(self, duration):
+        with self.lock:
+            self.queries += 1
+            self.query_time += duration
+
+    def as_dict(self, request, response, total):
+        def milliseconds(timings):
+            ordered = sorted(timings.items(), key=lambda item: item[1], reverse=True)
+            return {name: round(seconds * 1000, 3) for name, seconds in ordered}
+        match = request.resolver_match
+        return {
+            'at': time.time(),
+            'method': request.method,
+            'path': request.path,
+            'view': match.view_name if match else None,
+            'status': response.status_code,
+            'total_ms': round(total * 1000, 3),
+            'queries': self.queries,
+            'query_ms': round(self.query_time * 1000, 3),
+            'templates': milliseconds(self.templates),
+            'blocks': milliseconds(self.blocks),
+        }
+
+
+def _time_query(execute, sql, params, many, context):
+    profile = _current.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.add_query(time.perf_counter() - started)
+
+
+def _instrument(sender=None, connection=None, **kwargs):
+    # Sent again each time the same DatabaseWrapper reconnects
+    if _time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_time_query)
+
+
+def _timed(method, record):
+    def wrapper(self, context):
+        profile = _current.get()
+        if profile is None:
+            return method(self, context)
+        started = time.perf_counter()
+        try:
+            return method(self, context)
+        finally:
+            record(profile, self, time.perf_counter() - started)
+    return wrapper
+
+
+def _record_template(profile, template, duration):
+    profile.templates[template.origin.template_name or template.name or '<string>'] += duration
+
+
+def _record_block(profile, node, duration):
+    profile.blocks[node.name] += duration
+
+
+def install():
+    """Hook template rendering and queries; idempotent"""
+    global _installed
+    with _install_lock:
+        if _installed:
+            return
+        # The same hook Django's test runner uses for template_rendered
+        Template._render = _timed(Template._render, _record_template)
+        BlockNode.render = _timed(BlockNode.render, _record_block)
+        connection_created.connect(_instrument, weak=False, dispatch_uid='qbix.profiling.instrument')
+        for connection in connections.all(initialized_only=True):
+            _instrument(connection=connection)
+        _installed = True
+
+
+def server_timing(record):
+    """The Server-Timing header value for a profile record"""
+    entries = [
+        f'total;dur={record["total_ms"]}',
+        f'db;dur={record["query_ms"]};desc="{record["queries"]} queries"',
+    ]
+    for prefix, timings in (('tpl', record['templates']), ('block', record['blocks'])):
+        for index, (name, duration) in enumerate(list(timings.items())[:SERVER_TIMING_ENTRIES]):
+            entries.append(f'{prefix}{index};dur={duration};desc="{name.replace(chr(34), "")}"')
+    return ', '.join(entries)
+
+
+class RenderProfileMiddleware:
+    """Profile each request when RENDER_PROFILING is on; place it below WhiteNoise"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'RENDER_PROFILING', False):
+            raise MiddlewareNotUsed
+        install()
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        profile, started = Profile(), time.perf_counter()
+        token = _current.set(profile)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, profile, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        profile, started = Profile(), time.perf_counter()
+        token = _current.set(profile)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, profile, time.perf_counter() - started)
+
+    def _finish(self, request, response, profile, total):
+        record = profile.as_dict(request, response, total)
+        profiles.append(record)
+        response['Server-Timing'] = server_timing(record)
+        return response
+
+
+def summarize(records):
+    """Per-template, per-block and per-view totals over ``records``, slowest first"""
+    def table(key):
+        rows = defaultdict(lambda: [0, 0.0])
+        for record in records:
+            for name, duration in record[key].items():
+                rows[name][0] += 1
+                rows[name][1] += duration
+        return sorted(
+            (
+                {'name': name, 'renders': count, 'total_ms': round(total, 3), 'mean_ms': round(total / count, 3)}
+                for name, (count, total) in rows.items()
+            ),
+            key=lambda row: row['total_ms'], reverse=True,
+        )
+
+    views = defaultdict(list)
+    for record in records:
+        views[record['view'] or record['path']].append(record)
+    return {
+        'templates': table('templates'),
+        'blocks': table('blocks'),
+        'views': sorted(
+            (
+                {
+                    'view': name,
+                    'requests': len(rows),
+                    'mean_ms': round(sum(row['total_ms'] for row in rows) / len(rows), 3),
+                    'mean_queries': round(sum(row['queries'] for row in rows) / len(rows), 2),
+                    'mean_query_ms': round(sum(row['query_ms'] for row in rows) / len(rows), 3),
+                }
+                for name, rows in views.items()
+            ),
+            key=lambda row: row['mean_ms'] * row['requests'], reverse=True,
+        ),
+    }
+
+
+@staff_member_required
+def report(request):
+    """The profiled requests in this process: totals, and the most recent ones"""
+    records = list(profiles)
+    if request.GET.get('view'):
+        records = [record for record in records if record['view'] == request.GET['view']]
+    return JsonResponse({
+        'enabled': getattr(settings, 'RENDER_PROFILING', False),
+        'requests': len(records),
+        **summarize(records),
+        'recent': records[-50:][::-1],
+    })
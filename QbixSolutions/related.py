@@ -0,0 +1,188 @@
+"""
+Precomputed "related items" for blog posts and portfolio projects.
+
+rebuild_related() scores every pair of items that share a category, a
+technology or a meaningful word and stores each item's best neighbours in its
+``related_ids`` field, so a detail page resolves them with a single primary key
+lookup. Run it from the rebuild_related_content management command (e.g. from
+cron); items saved since the last run fall back to a same-category query.
+"""
+import heapq
+import math
+import re
+from collections import Counter, defaultdict
+from operator import itemgetter
+
+from django.db import transaction
+
+from .cache import bump_version
+from .models import BlogPost, Portfolio, Technology
+
+
+RELATED_COUNT = 3
+
+# Each term is in [0, 1]; text similarity dominates, shared technologies and
+# the category break ties and rescue items with little text
+TEXT_WEIGHT = 1.0
+TAG_WEIGHT = 0.5
+CATEGORY_WEIGHT = 0.25
+
+# Words in more than this share of documents say nothing about similarity and
+# would make the candidate search quadratic
+MAX_DOCUMENT_FREQUENCY = 0.5
+# Only an item's most distinctive words are used to find and score candidates
+MAX_TERMS = 20
+
+_WORD = re.compile(r'[a-z0-9][a-z0-9+#]*')
+STOP_WORDS = frozenset("""
+    a about an and are as at be but by can for from has have how in into is it
+    its more new not of on or our that the their this to us we what when which
+    will with you your
+""".split())
+
+
+def _tokens(text):
+    return [word for word in _WORD.findall(text.lower()) if word not in STOP_WORDS and len(word) > 1]
+
+
+def _tfidf(texts):
+    """
+    L2-normalised sparse TF-IDF vectors ({term: weight}) for a list of texts.
+
+    Terms that occur in a single document can never contribute to a match, so
+    they are dropped along with the over-common ones, and each vector keeps only
+    its MAX_TERMS heaviest terms.
+    """
+    counts = [Counter(_tokens(text)) for text in texts]
+    frequency = Counter(term for doc in counts for term in doc)
+    total = len(texts)
+    limit = max(2, total * MAX_DOCUMENT_FREQUENCY)
+    idf = {
+        term: math.log(total / df) + 1.0
+        for term, df in frequency.items() if 1 < df <= limit
+    }
+    vectors = []
+    for doc in counts:
+        weights = ((term, (1.0 + math.log(tf)) * idf[term]) for term, tf in doc.items() if term in idf)
+        vector = dict(heapq.nlargest(MAX_TERMS, weights, key=itemgetter(1)))
+        norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+        vectors.append({term: weight / norm for term, weight in vector.items()} if norm else {})
+    return vectors
+
+
+def compute_neighbours(items, count=RELATED_COUNT):
+    """
+    Return {pk: [pk, ...]} with the ``count`` most similar items for each item.
+
+    ``items`` is a sequence of (pk, category, tags, text) in display preference
+    order (e.g. newest first), used when topping up from the same category.
+    Candidates are found through inverted indexes on terms and tags, so the cost
+    grows with the number of overlapping pairs rather than with n squared.
+    """
+    items = list(items)
+    vectors = _tfidf([text for pk, category, tags, text in items])
+    categories = [item[1] for item in items]
+    tags = [frozenset(item[2]) for item in items]
+
+    postings = defaultdict(list)
+    for index, vector in enumerate(vectors):
+        for term, weight in vector.items():
+            postings[term].append((index, weight))
+    tagged = defaultdict(list)
+    for index, item_tags in enumerate(tags):
+        for tag in item_tags:
+            tagged[tag].append(index)
+    by_category = defaultdict(list)
+    for index, category in enumerate(categories):
+        by_category[category].append(index)
+
+    neighbours = {}
+    for index, (pk, category, item_tags, text) in enumerate(items):
+        scores = defaultdict(float)
+        for term, weight in vectors[index].items():
+            weight *= TEXT_WEIGHT
+            for other, other_weight in postings[term]:
+                scores[other] += weight * other_weight
+
+        shared = Counter(other for tag in tags[index] for other in tagged[tag])
+        for other, overlap in shared.items():
+            union = len(tags[index]) + len(tags[other]) - overlap
+            scores[other] += TAG_WEIGHT * overlap / union
+
+        scores.pop(index, None)
+        for other in scores:
+            if categories[other] == category:
+                scores[other] += CATEGORY_WEIGHT
+
+        chosen = heapq.nlargest(count, scores, key=scores.__getitem__)
+        # Top up from the same category when too few items overlap at all
+        for other in by_category[category]:
+            if len(chosen) >= count:
+                break
+            if other != index and other not in scores:
+                chosen.append(other)
+        neighbours[pk] = [items[other][0] for other in chosen]
+    return neighbours
+
+
+def _blog_items():
+    rows = BlogPost.objects.order_by('-published_date', 'id').values_list('pk', 'category', 'title', 'excerpt')
+    # The title is repeated so its words weigh more than the excerpt's
+    return [(pk, category, (), f'{title} {title} {excerpt}') for pk, category, title, excerpt in rows]
+
+
+def _portfolio_items():
+    rows = Portfolio.objects.order_by('-featured', 'order', '-completion_date', 'id').values_list(
+        'pk', 'category', 'technology_list', 'title', 'description',
+    )
+    return [
+        (pk, category, {Technology.slug_for(name) for name in technologies}, f'{title} {title} {description}')
+        for pk, category, technologies, title, description in rows
+    ]
+
+
+REBUILDERS = {
+    'blogpost': (BlogPost, _blog_items),
+    'portfolio': (Portfolio, _portfolio_items),
+}
+
+
+def rebuild_related(count=RELATED_COUNT, batch_size=500):
+    """
+    Recompute related items for every blog post and portfolio project.
+
+    Only rows whose neighbours changed are written, and only their related_ids:
+    the content itself did not change, so updated_at (the sitemap's lastmod)
+    is left alone. Bumping the model's cache version is enough for cached
+    pages and ETags to pick up the new links. Returns {model name: number of
+    rows updated}.
+    """
+    updated = {}
+    for name, (model, load_items) in REBUILDERS.items():
+        neighbours = compute_neighbours(load_items(), count)
+        current = dict(model.objects.values_list('pk', 'related_ids'))
+        changed = [
+            model(pk=pk, related_ids=related)
+            for pk, related in neighbours.items() if current.get(pk) != related
+        ]
+        with transaction.atomic():
+            # bulk_update() does not run auto_now, so updated_at keeps its value
+            model.objects.bulk_update(changed, ['related_ids'], batch_size=batch_size)
+        if changed:
+            bump_version(name)
+        updated[name] = len(changed)
+    return updated
+
+
+def related_items(obj, count=RELATED_COUNT):
+    """
+    The precomputed related items for a blog post or portfolio project, best
+    first, fetched with one primary key lookup. Falls back to the newest items
+    in the same category until the next rebuild covers ``obj``.
+    """
+    model = type(obj)
+    if obj.related_ids:
+        wanted = obj.related_ids[:count]
+        found = model.objects.in_bulk(wanted)
+        return [found[pk] for pk in wanted if pk in found]
+    return list(model.objects.exclude(pk=obj.pk).filter(category=obj.category)[:count])
@@ -0,0 +1,150 @@
+"""
+Read-replica routing for the public content models.
+
+ReplicaRouter sends reads of the content models (services, portfolio, blog,
+testimonials, team, jobs) to the aliases in settings.READ_REPLICAS, round-robin,
+skipping a replica that cannot be connected to for REPLICA_RETRY_SECONDS.
+Everything else, and every write, uses the primary ("default").
+
+Reads go to the primary instead when the replica could be behind what the
+reader expects:
+
+* for REPLICA_PIN_SECONDS after a client's POST (PrimaryPinMiddleware sets a
+  cookie), so the redirect after a form or admin save sees its own write;
+* for the rest of a request, or a worker thread, once it has written;
+* in the admin, and inside ``with use_primary():``.
+"""
+import itertools
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DatabaseError, connections
+from django.urls import reverse
+
+
+PRIMARY = 'default'
+
+# Seconds a client reads from the primary after it POSTs
+REPLICA_PIN_SECONDS = getattr(settings, 'REPLICA_PIN_SECONDS', 5)
+
+# Seconds an unreachable replica is left out before it is tried again
+REPLICA_RETRY_SECONDS = getattr(settings, 'REPLICA_RETRY_SECONDS', 30)
+
+PIN_COOKIE = 'qbix_primary'
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+ROUTED_MODELS = frozenset([
+    'service', 'technology', 'portfolio', 'blogpost', 'testimonial', 'teammember', 'joblisting',
+])
+
+_pinned = ContextVar('qbix_replica_pinned', default=False)
+
+
+@contextmanager
+def use_primary():
+    """Read everything from the primary inside the block"""
+    token = _pinned.set(True)
+    try:
+        yield
+    finally:
+        _pinned.reset(token)
+
+
+class ReplicaRouter:
+    def __init__(self):
+        self._turn = itertools.count()
+        # alias -> time.monotonic() before which it is not tried
+        self._down = {}
+
+    def _replica(self):
+        replicas = list(getattr(settings, 'READ_REPLICAS', ()))
+        if not replicas:
+            return None
+        start = next(self._turn)
+        now = time.monotonic()
+        for offset in range(len(replicas)):
+            alias = replicas[(start + offset) % len(replicas)]
+            if self._down.get(alias, 0) > now:
+                continue
+            try:
+                connections[alias].ensure_connection()
+            except DatabaseError:
+                self._down[alias] = now + REPLICA_RETRY_SECONDS
+                continue
+            self._down.pop(alias, None)
+            return alias
+        return None
+
+    def db_for_read(self, model, **hints):
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            # Follow a relation on the database the object came from
+            return instance._state.db
+        if model._meta.model_name not in ROUTED_MODELS or _pinned.get():
+            return PRIMARY
+        return self._replica() or PRIMARY
+
+    def db_for_write(self, model, **hints):
+        # Later reads in this request (or thread) must see the write
+        _pinned.set(True)
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {PRIMARY, *getattr(settings, 'READ_REPLICAS', ())}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+
+class PrimaryPinMiddleware:
+    """
+    Pin a request to the primary when it writes (any method but GET/HEAD/
+    OPTIONS), is in the admin, or comes from a client that wrote in the last
+    REPLICA_PIN_SECONDS.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.admin_prefix = reverse('admin:index')
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = _pinned.set(self._pins(request))
+        try:
+            response = self.get_response(request)
+        finally:
+            _pinned.reset(token)
+        return self._pin_client(request, response)
+
+    async def __acall__(self, request):
+        token = _pinned.set(self._pins(request))
+        try:
+            response = await self.get_response(request)
+        finally:
+            _pinned.reset(token)
+        return self._pin_client(request, response)
+
+    def _pins(self, request):
+        return (
+            request.method not in SAFE_METHODS
+            or PIN_COOKIE in request.COOKIES
+            or request.path.startswith(self.admin_prefix)
+        )
+
+    def _pin_client(self, request, response):
+        if request.method not in SAFE_METHODS:
+            response.set_cookie(
+                PIN_COOKIE, '1', max_age=REPLICA_PIN_SECONDS, httponly=True, samesite='Lax',
+                secure=request.is_secure(),
+            )
+        return response
@@ -0,0 +1,220 @@
+import re
+from dataclasses import dataclass
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.urls import reverse
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import Service, Portfolio, BlogPost, SearchDocument
+
+
+# Highlight markers used inside the database and swapped for <mark> after escaping,
+# so indexed text can never inject markup into the results page
+_START, _STOP = '\x02', '\x03'
+
+# Must match the expression indexed by migration 0004
+PG_VECTOR = (
+    "setweight(to_tsvector('english', \"title\"), 'A') || "
+    "setweight(to_tsvector('english', \"body\"), 'B')"
+)
+
+# The kinds the public search returns. Services stay indexed, but are left out
+# until service_detail.html exists: their detail pages fail without it.
+DETAIL_URLS = {
+    'blogpost': 'QbixSolutions:blog_detail',
+    'portfolio': 'QbixSolutions:portfolio_detail',
+}
+
+
+def document_fields(obj):
+    """Return (kind, title, body) for a searchable object"""
+    if isinstance(obj, BlogPost):
+        return 'blogpost', obj.title, f"{obj.excerpt}\n{obj.content}"
+    if isinstance(obj, Portfolio):
+        return 'portfolio', obj.title, f"{obj.description}\n{obj.technologies}"
+    if isinstance(obj, Service):
+        return 'service', obj.title, obj.full_description
+    raise TypeError(f"{type(obj).__name__} is not searchable")
+
+
+def index_object(obj):
+    kind, title, body = document_fields(obj)
+    SearchDocument.objects.update_or_create(
+        kind=kind, object_id=obj.pk,
+        defaults={'slug': obj.slug, 'title': title, 'body': body},
+    )
+
+
+def remove_object(obj):
+    kind = document_fields(obj)[0]
+    SearchDocument.objects.filter(kind=kind, object_id=obj.pk).delete()
+
+
+def rebuild_index(batch_size=500):
+    """Re-create every search document from the content tables; returns the count"""
+    SearchDocument.objects.all().delete()
+    count = 0
+    for model in (BlogPost, Portfolio, Service):
+        documents = []
+        for obj in model.objects.iterator(chunk_size=batch_size):
+            kind, title, body = document_fields(obj)
+            documents.append(SearchDocument(kind=kind, object_id=obj.pk, slug=obj.slug, title=title, body=body))
+            if len(documents) >= batch_size:
+                SearchDocument.objects.bulk_create(documents)
+                count += len(documents)
+                documents = []
+        SearchDocument.objects.bulk_create(documents)
+        count += len(documents)
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute("INSERT INTO qbix_search_fts(qbix_search_fts) VALUES ('optimize')")
+    return count
+
+
+def _terms(query):
+    return re.findall(r'\w+', query or '')
+
+
+def _fts5_query(terms):
+    # Quote every term so user input can never be parsed as FTS5 syntax;
+    # the trailing * gives prefix matching for search-as-you-type
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def _highlight(text):
+    return mark_safe(escape(text).replace(_START, '<mark>').replace(_STOP, '</mark>'))
+
+
+@dataclass
+class SearchHit:
+    kind: str
+    object_id: int
+    slug: str
+    title: str
+    snippet: str
+
+    @property
+    def url(self):
+        return reverse(DETAIL_URLS[self.kind], args=[self.slug])
+
+    def get_kind_display(self):
+        return dict(SearchDocument.KIND_CHOICES)[self.kind]
+
+
+class SearchResults:
+    """
+    Lazy, ranked search results.
+
+    Supports count() and slicing so it can be handed straight to Paginator;
+    each page is one ranked LIMIT/OFFSET query against the full-text index.
+    """
+    def __init__(self, query, kinds=None):
+        self.terms = _terms(query)
+        self.kinds = list(kinds) if kinds else None
+        self._count = None
+
+    def _from_where(self):
+        """Return (sql, params) for the FROM/WHERE clause matching documents, aliased d"""
+        table = connection.ops.quote_name(SearchDocument._meta.db_table)
+        if connection.vendor == 'sqlite':
+            sql = f"FROM qbix_search_fts JOIN {table} d ON d.id = qbix_search_fts.rowid WHERE qbix_search_fts MATCH %s"
+            params = [_fts5_query(self.terms)]
+        else:
+            sql = f"FROM {table} d, websearch_to_tsquery('english', %s) q WHERE ({PG_VECTOR}) @@ q"
+            params = [' '.join(self.terms)]
+        if self.kinds:
+            sql += f" AND d.kind IN ({', '.join(['%s'] * len(self.kinds))})"
+            params += self.kinds
+        return sql, params
+
+    def _indexed(self):
+        return connection.vendor in ('sqlite', 'postgresql')
+
+    def _execute(self, sql, params):
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+
+    def count(self):
+        if self._count is None:
+            if not self.terms:
+                self._count = 0
+            elif not self._indexed():
+                self._count = self._fallback_queryset().count()
+            else:
+                from_where, params = self._from_where()
+                self._count = self._execute(f"SELECT count(*) {from_where}", params)[0][0]
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        start = index.start or 0
+        stop = index.stop if index.stop is not None else self.count()
+        if not self.terms or stop <= start:
+            return []
+        return self._fetch(start, stop - start)
+
+    def object_ids(self):
+        """
+        Object ids of every match, without ranking or highlighting, as a
+        subquery for ``pk__in`` so the ids never travel through Python
+        """
+        if not self.terms:
+            return SearchDocument.objects.none().values('object_id')
+        if not self._indexed():
+            return self._fallback_queryset().values('object_id')
+        from_where, params = self._from_where()
+        return RawSQL(f"SELECT d.object_id {from_where}", params)
+
+    def _fetch(self, offset, limit):
+        if not self._indexed():
+            return [
+                SearchHit(doc.kind, doc.object_id, doc.slug, escape(doc.title), escape(doc.body[:200]))
+                for doc in self._fallback_queryset()[offset:offset + limit]
+            ]
+        from_where, params = self._from_where()
+        if connection.vendor == 'sqlite':
+            # bm25 weights: a title match counts ten times a body match
+            select = (
+                "highlight(qbix_search_fts, 0, %s, %s), snippet(qbix_search_fts, 1, %s, %s, '…', 24)"
+            )
+            select_params = [_START, _STOP, _START, _STOP]
+            order = "bm25(qbix_search_fts, 10.0, 1.0)"
+        else:
+            options = f'StartSel={_START}, StopSel={_STOP}, MaxWords=35, MinWords=15'
+            select = "ts_headline('english', d.title, q, %s), ts_headline('english', d.body, q, %s)"
+            select_params = [options, options]
+            order = f"ts_rank({PG_VECTOR}, q) DESC"
+        rows = self._execute(
+            f"SELECT d.kind, d.object_id, d.slug, {select} {from_where} ORDER BY {order} LIMIT %s OFFSET %s",
+            [*select_params, *params, limit, offset],
+        )
+        return [
+            SearchHit(kind, object_id, slug, _highlight(title), _highlight(snippet))
+            for kind, object_id, slug, title, snippet in rows
+        ]
+
+    def _fallback_queryset(self):
+        # Databases without a full-text index; correct but unranked
+        queryset = SearchDocument.objects.all()
+        for term in self.terms:
+            queryset = queryset.filter(Q(title__icontains=term) | Q(body__icontains=term))
+        if self.kinds:
+            queryset = queryset.filter(kind__in=self.kinds)
+        return queryset.order_by('kind', 'object_id')
+
+
+def search(query, kinds=None):
+    return SearchResults(query, kinds or tuple(DETAIL_URLS))
+
+
+def matching_ids(kind, query):
+    """Subquery of the primary keys of all objects of one kind matching query, for admin search"""
+    return SearchResults(query, kinds=[kind]).object_ids()
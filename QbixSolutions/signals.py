@@ -0,0 +1,43 @@
+from django.db.models.signals import post_save, post_delete
+
+from . import images, search
+from .cache import VERSIONED_MODELS, bump_version
+from .models import Service, Portfolio, BlogPost
+
+
+def invalidate_content_fragments(sender, **kwargs):
+    """Bump the fragment version of a content model whenever a row is saved or deleted"""
+    if kwargs.get('raw'):
+        # Fixture loading; nothing has been rendered from this data yet
+        return
+    bump_version(sender._meta.model_name)
+
+
+for _model in VERSIONED_MODELS.values():
+    post_save.connect(invalidate_content_fragments, sender=_model, dispatch_uid=f'fragments_save_{_model._meta.model_name}')
+    post_delete.connect(invalidate_content_fragments, sender=_model, dispatch_uid=f'fragments_delete_{_model._meta.model_name}')
+
+
+def update_search_document(sender, instance, **kwargs):
+    search.index_object(instance)
+
+
+def delete_search_document(sender, instance, **kwargs):
+    search.remove_object(instance)
+
+
+for _model in (BlogPost, Portfolio, Service):
+    post_save.connect(update_search_document, sender=_model, dispatch_uid=f'search_save_{_model._meta.model_name}')
+    post_delete.connect(delete_search_document, sender=_model, dispatch_uid=f'search_delete_{_model._meta.model_name}')
+
+
+def queue_image_derivatives(sender, instance, raw=False, **kwargs):
+    """Resize a newly uploaded or replaced image once the save has committed"""
+    if raw or not instance.image:
+        return
+    if instance.image_derivatives.get('source') != instance.image.name:
+        images.schedule_derivatives(instance)
+
+
+for _model in images.IMAGE_MODELS.values():
+    post_save.connect(queue_image_derivatives, sender=_model, dispatch_uid=f'images_save_{_model._meta.model_name}')
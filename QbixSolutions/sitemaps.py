@@ -0,0 +1,158 @@
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib.sitemaps import Sitemap
+from django.contrib.sitemaps import views as sitemap_views
+from django.db.models import Max
+from django.http import Http404
+from django.urls import reverse
+
+from .cache import VERSIONED_MODELS, cache_public_page, conditional_content, get_content_state
+from .models import Portfolio, BlogPost, JobListing
+
+
+# Sitemap pages are selected with ?p=N
+SITEMAP_PARAMS = ('p',)
+
+
+class SiteSitemap(Sitemap):
+    """
+    URLs on SITE_URL rather than on the Host the sitemap was requested with,
+    so every crawler sees the canonical address whatever host it used
+    """
+
+    @property
+    def protocol(self):
+        return urlsplit(settings.SITE_URL).scheme
+
+    def get_domain(self, site=None):
+        return urlsplit(settings.SITE_URL).netloc
+
+
+class StaticViewSitemap(SiteSitemap):
+    """Top-level pages; lastmod is the latest edit to the content they list"""
+
+    # (url name, priority, changefreq, content models shown on the page)
+    pages = [
+        ('home', 1.0, 'daily', ('service', 'portfolio', 'testimonial', 'blogpost')),
+        ('about', 0.9, 'weekly', ('teammember',)),
+        ('services', 0.9, 'weekly', ('service',)),
+        ('portfolio', 0.8, 'weekly', ('portfolio',)),
+        ('blog', 0.8, 'daily', ('blogpost',)),
+        ('careers', 0.7, 'weekly', ('joblisting',)),
+        ('contact', 0.7, 'monthly', ()),
+    ]
+
+    def items(self):
+        return self.pages
+
+    def location(self, item):
+        return reverse(f'QbixSolutions:{item[0]}')
+
+    def priority(self, item):
+        return item[1]
+
+    def changefreq(self, item):
+        return item[2]
+
+    def lastmod(self, item):
+        timestamps = [latest for count, latest in get_content_state(*item[3]) if latest]
+        return max(timestamps) if timestamps else None
+
+    def get_latest_lastmod(self):
+        timestamps = [latest for count, latest in get_content_state(*VERSIONED_MODELS) if latest]
+        return max(timestamps) if timestamps else None
+
+
+class ContentSitemap(SiteSitemap):
+    """One URL per row of a content model, paged at the protocol's 50,000 URL limit"""
+    model = None
+    url_name = None
+
+    def items(self):
+        # Only the columns the sitemap needs, in a stable order for pagination
+        return self.model.objects.only('slug', 'updated_at').order_by('pk')
+
+    def location(self, obj):
+        return reverse(self.url_name, args=[obj.slug])
+
+    def lastmod(self, obj):
+        return obj.updated_at
+
+    def get_latest_lastmod(self):
+        # Sitemap's default walks every item in Python; let the database do it
+        return self.items().aggregate(latest=Max('updated_at'))['latest']
+
+
+class PortfolioSitemap(ContentSitemap):
+    model = Portfolio
+    url_name = 'QbixSolutions:portfolio_detail'
+    priority = 0.7
+    changefreq = 'monthly'
+
+
+class BlogPostSitemap(ContentSitemap):
+    model = BlogPost
+    url_name = 'QbixSolutions:blog_detail'
+    priority = 0.7
+    changefreq = 'weekly'
+
+
+class JobListingSitemap(ContentSitemap):
+    model = JobListing
+    url_name = 'QbixSolutions:career_apply'
+    priority = 0.6
+    changefreq = 'weekly'
+
+    def items(self):
+        return super().items().filter(active=True)
+
+
+sitemaps = {
+    'pages': StaticViewSitemap,
+    # No per-service section: service_detail.html is not in the tree yet, so
+    # those pages fail; the services page itself is listed under 'pages'
+    'portfolio': PortfolioSitemap,
+    'blog': BlogPostSitemap,
+    'careers': JobListingSitemap,
+}
+
+
+def _cached(view_func, names):
+    return conditional_content(*names, params=SITEMAP_PARAMS)(
+        cache_public_page(*names, params=SITEMAP_PARAMS)(view_func)
+    )
+
+
+# Each section is cached under its own model's version, so saving a blog post
+# regenerates only the blog section (and the index that lists its lastmod).
+_section_views = {
+    section: _cached(
+        sitemap_views.sitemap,
+        tuple(VERSIONED_MODELS) if section == 'pages' else (site.model._meta.model_name,),
+    )
+    for section, site in sitemaps.items()
+}
+
+def _site_index(request, **kwargs):
+    """sitemap_views.index, pointing at the sections on SITE_URL"""
+    response = sitemap_views.index(request, **kwargs)
+    root = settings.SITE_URL.rstrip('/')
+    for item in response.context_data['sitemaps']:
+        item.location = root + urlsplit(item.location)._replace(scheme='', netloc='').geturl()
+    return response
+
+
+_index_view = _cached(_site_index, tuple(VERSIONED_MODELS))
+
+
+def index(request):
+    """sitemap.xml: an index pointing at every section and page of the sitemap"""
+    return _index_view(request, sitemaps=sitemaps, sitemap_url_name='sitemap_section')
+
+
+def section(request, section):
+    """sitemap-<section>.xml"""
+    if section not in sitemaps:
+        raise Http404(f'No sitemap available for section: {section!r}')
+    return _section_views[section](request, sitemaps=sitemaps, section=section)
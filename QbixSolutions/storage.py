@@ -0,0 +1,66 @@
+"""
+Static files storage for collectstatic.
+
+whitenoise's compressed, manifest-hashed storage (every file gets a content
+hash in its name, so whitenoise serves it with a far-future immutable
+Cache-Control header), with the build steps from assets.py added: the site's
+own CSS and JS are minified before they are hashed, and a critical stylesheet
+is written for each page afterwards.
+"""
+import os
+import posixpath
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+from . import assets
+
+
+MINIFIERS = {'.css': assets.minify_css, '.js': assets.minify_js}
+
+# Only the site's own files; third-party ones (the admin's) are left as shipped
+MINIFY_DIRECTORIES = ('css/', 'js/')
+
+
+class StaticFilesStorage(CompressedManifestStaticFilesStorage):
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            # Not collected: collectstatic has not been run here (development,
+            # tests) or a template names a file that does not exist. Link the
+            # plain name, as a non-hashing storage would, instead of failing
+            # the whole page.
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        if not dry_run:
+            paths = dict(paths)
+            for name, (storage, path) in paths.items():
+                minify = MINIFIERS.get(os.path.splitext(name)[1])
+                if minify is None or not name.startswith(MINIFY_DIRECTORIES) or '.min.' in name:
+                    continue
+                with storage.open(path) as source:
+                    self._replace(name, minify(source.read().decode('utf-8')))
+                # Hash (and compress) the minified copy rather than the source
+                paths[name] = (self, name)
+
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+
+        if not dry_run:
+            for name, css in assets.critical_stylesheets(self._read_stylesheet).items():
+                self._replace(name, css)
+                yield name, name, True
+
+    def _read_stylesheet(self, path):
+        """Collected (hashed) stylesheet text and the URL it is served from"""
+        with self.open(self.stored_name(path)) as stylesheet:
+            css = stylesheet.read().decode('utf-8')
+        return css, posixpath.join(settings.STATIC_URL, posixpath.dirname(path), '')
+
+    def _replace(self, name, text):
+        if self.exists(name):
+            self.delete(name)
+        self._save(name, ContentFile(text.encode('utf-8')))
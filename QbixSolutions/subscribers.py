@@ -0,0 +1,133 @@
+"""
+Bulk import of newsletter subscribers.
+
+import_subscribers() reads addresses from any iterable (e.g. a CSV file),
+normalizes them and writes them in batches: one SELECT ... IN per batch finds
+the addresses already known, and one bulk INSERT ... ON CONFLICT both adds the
+new ones and reactivates unsubscribed ones. Memory use is bounded by the batch
+size, not the size of the list.
+"""
+import csv
+from dataclasses import dataclass
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import connection
+from django.utils import timezone
+
+from .models import NewsletterSubscriber
+
+
+BATCH_SIZE = 5000
+
+
+def normalize_email(value):
+    """Lower-cased, trimmed address, or None if it is not a valid email"""
+    email = value.strip().lower()
+    try:
+        validate_email(email)
+    except ValidationError:
+        return None
+    return email
+
+
+@dataclass
+class ImportReport:
+    inserted: int = 0
+    reactivated: int = 0
+    already_subscribed: int = 0
+    # Repeats within one batch; later repeats count as already subscribed
+    duplicates: int = 0
+    invalid: int = 0
+
+    @property
+    def skipped(self):
+        return self.already_subscribed + self.duplicates + self.invalid
+
+    def __str__(self):
+        return (
+            f"{self.inserted} inserted, {self.reactivated} reactivated, {self.skipped} skipped "
+            f"({self.already_subscribed} already subscribed, {self.duplicates} duplicates, {self.invalid} invalid)"
+        )
+
+
+def read_csv_emails(lines):
+    """
+    Yield the email column of a CSV file (an iterable of text lines).
+
+    Uses the column headed "email" when there is one, otherwise the first
+    column, treating the first row as data.
+    """
+    reader = csv.reader(lines)
+    first = next(reader, None)
+    if first is None:
+        return
+    headers = [cell.strip().lower() for cell in first]
+    if 'email' in headers:
+        column = headers.index('email')
+    else:
+        column = 0
+        if first:
+            yield first[0]
+    for row in reader:
+        if len(row) > column:
+            yield row[column]
+
+
+def _batches(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def _upsert(emails):
+    """
+    Insert active subscribers, reactivating any that already exist.
+
+    ON CONFLICT also covers rows added by someone else since the batch was
+    checked. On SQLite and PostgreSQL this is a raw executemany(): building
+    model instances for bulk_create() costs more than the database work.
+    """
+    if connection.vendor not in ('sqlite', 'postgresql'):
+        NewsletterSubscriber.objects.bulk_create(
+            [NewsletterSubscriber(email=email, active=True) for email in emails],
+            update_conflicts=True, unique_fields=['email'], update_fields=['active'],
+        )
+        return
+    opts, quote = NewsletterSubscriber._meta, connection.ops.quote_name
+    email, subscribed_at, active = (quote(opts.get_field(name).column) for name in ('email', 'subscribed_at', 'active'))
+    sql = (
+        f'INSERT INTO {quote(opts.db_table)} ({email}, {subscribed_at}, {active}) VALUES (%s, %s, %s) '
+        f'ON CONFLICT ({email}) DO UPDATE SET {active} = EXCLUDED.{active}'
+    )
+    now = connection.ops.adapt_datetimefield_value(timezone.now())
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, [(address, now, True) for address in emails])
+
+
+def import_subscribers(emails, batch_size=BATCH_SIZE):
+    """Subscribe every address in ``emails`` and return an ImportReport"""
+    report = ImportReport()
+    # Keep the IN list within the database's bound parameter limit (999 on SQLite)
+    batch_size = min(batch_size, connection.features.max_query_params or batch_size)
+    for raw_batch in _batches(emails, batch_size):
+        batch = set()
+        for raw in raw_batch:
+            email = normalize_email(raw)
+            if email is None:
+                report.invalid += 1
+            elif email in batch:
+                report.duplicates += 1
+            else:
+                batch.add(email)
+
+        known = dict(NewsletterSubscriber.objects.filter(email__in=batch).values_list('email', 'active'))
+        new = [email for email in batch if email not in known]
+        inactive = [email for email, active in known.items() if not active]
+        report.already_subscribed += len(known) - len(inactive)
+        if new or inactive:
+            _upsert(new + inactive)
+        report.inserted += len(new)
+        report.reactivated += len(inactive)
+    return report
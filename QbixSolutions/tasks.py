@@ -0,0 +1,64 @@
+"""
+Background job handlers for the site's forms.
+
+Each handler loads its row by id and returns quietly if it has been deleted
+since the job was queued.
+"""
+from django.conf import settings
+from django.core.mail import mail_managers, send_mail
+from django.template.loader import render_to_string
+
+from . import campaigns, jobs
+from .jobs import handler
+from .models import Campaign, ContactSubmission, CareerApplication, NewsletterSubscriber
+
+
+NOTIFY_CONTACT_SUBMISSION = 'notify_contact_submission'
+ACKNOWLEDGE_APPLICATION = 'acknowledge_career_application'
+CONFIRM_SUBSCRIBER = 'confirm_newsletter_subscriber'
+SEND_CAMPAIGN = 'send_newsletter_campaign'
+
+
+def _render(template, context):
+    """First line of the template is the subject, the rest is the body"""
+    subject, _, body = render_to_string(template, context).strip().partition('\n')
+    return subject.strip(), body.strip() + '\n'
+
+
+@handler(NOTIFY_CONTACT_SUBMISSION)
+def notify_contact_submission(submission_id):
+    submission = ContactSubmission.objects.filter(pk=submission_id).first()
+    if submission is None:
+        return
+    subject, body = _render('emails/contact_notification.txt', {'submission': submission})
+    mail_managers(subject, body, fail_silently=False)
+
+
+@handler(ACKNOWLEDGE_APPLICATION)
+def acknowledge_career_application(application_id):
+    application = CareerApplication.objects.select_related('job').filter(pk=application_id).first()
+    if application is None:
+        return
+    subject, body = _render('emails/application_acknowledgement.txt', {'application': application})
+    send_mail(subject, body, settings.DEFAULT_FROM_EMAIL, [application.email])
+
+
+@handler(CONFIRM_SUBSCRIBER)
+def confirm_newsletter_subscriber(subscriber_id):
+    subscriber = NewsletterSubscriber.objects.filter(pk=subscriber_id, active=True).first()
+    if subscriber is None:
+        return
+    subject, body = _render('emails/newsletter_confirmation.txt', {'subscriber': subscriber})
+    send_mail(subject, body, settings.DEFAULT_FROM_EMAIL, [subscriber.email])
+
+
+@handler(SEND_CAMPAIGN)
+def send_newsletter_campaign(campaign_id):
+    # Resumes where an earlier attempt stopped, keeping the job alive for as
+    # long as the send makes progress
+    if campaigns.send_campaign(campaign_id, heartbeat=jobs.heartbeat) is not None:
+        return
+    if Campaign.objects.filter(pk=campaign_id).exclude(status=Campaign.SENT).exists():
+        # Another worker is still sending it; it may yet fail, so retry
+        # rather than report the campaign as done
+        raise campaigns.CampaignBusy(f"Campaign {campaign_id} is being sent by another worker")
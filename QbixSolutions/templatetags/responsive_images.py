@@ -0,0 +1,46 @@
+from django import template
+from django.forms.utils import flatatt
+from django.utils.html import format_html, format_html_join
+
+from ..images import MIME_TYPES, derivative_name
+
+
+register = template.Library()
+
+
+@register.simple_tag
+def responsive_image(image, alt='', sizes='100vw', **attrs):
+    """
+    Render an uploaded image as a <picture> with AVIF/WebP sources and a JPEG
+    <img> fallback, each with a width-descriptor srcset.
+
+        {% responsive_image post.image alt=post.title sizes="(max-width: 768px) 100vw, 400px" loading="lazy" %}
+
+    Extra keyword arguments become <img> attributes. Images whose derivatives
+    have not been generated yet are rendered as a plain <img> of the original.
+    """
+    if not image:
+        return ''
+    attributes = flatatt({'alt': alt, **attrs})
+    derivatives = getattr(image.instance, 'image_derivatives', None) or {}
+    if derivatives.get('source') != image.name:
+        return format_html('<img src="{}"{}>', image.url, attributes)
+
+    storage, widths = image.storage, derivatives['widths']
+
+    def srcset(extension):
+        return ', '.join(f'{storage.url(derivative_name(image.name, width, extension))} {width}w' for width in widths)
+
+    *preferred, fallback = derivatives['formats']
+    sources = format_html_join(
+        '', '<source type="{}" srcset="{}" sizes="{}">',
+        ((MIME_TYPES[extension], srcset(extension), sizes) for extension in preferred),
+    )
+    # Intrinsic size of the fallback so the browser reserves space before load
+    width = widths[-1]
+    height = round(derivatives['height'] * width / derivatives['width'])
+    return format_html(
+        '<picture>{}<img src="{}" srcset="{}" sizes="{}" width="{}" height="{}"{}></picture>',
+        sources, storage.url(derivative_name(image.name, width, fallback)), srcset(fallback), sizes,
+        width, height, attributes,
+    )
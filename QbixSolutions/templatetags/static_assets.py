@@ -0,0 +1,53 @@
+from functools import lru_cache
+
+from django import template
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.templatetags.static import static
+from django.utils.html import format_html
+from django.utils.safestring import mark_safe
+
+from ..assets import critical_name
+
+
+register = template.Library()
+
+
+@lru_cache(maxsize=None)
+def page_critical_css(template_name):
+    """Critical CSS written by collectstatic for a page, or '' if there is none"""
+    try:
+        with staticfiles_storage.open(critical_name(template_name)) as stylesheet:
+            return stylesheet.read().decode('utf-8')
+    except (FileNotFoundError, NotImplementedError):
+        return ''
+
+
+def _page(context):
+    return context.template.name if context.template else ''
+
+
+@register.simple_tag(takes_context=True)
+def critical_css(context):
+    """Inline the critical CSS for the page being rendered, if collectstatic wrote one"""
+    css = page_critical_css(_page(context))
+    if not css:
+        return ''
+    return format_html('<style>{}</style>', mark_safe(css.replace('</', '<\\/')))
+
+
+@register.simple_tag(takes_context=True)
+def stylesheet(context, path):
+    """
+    Link a stylesheet. Pages with inlined critical CSS load it without
+    blocking rendering; others link it normally.
+
+        {% stylesheet 'css/blog.css' %}
+    """
+    url = static(path)
+    if not page_critical_css(_page(context)):
+        return format_html('<link rel="stylesheet" href="{}">', url)
+    return format_html(
+        '<link rel="preload" href="{0}" as="style" onload="this.onload=null;this.rel=\'stylesheet\'">'
+        '<noscript><link rel="stylesheet" href="{0}"></noscript>',
+        url,
+    )
@@ -1,3 +1,2088 @@
-from django.test import TestCase
+import contextvars
+import gzip
+import hashlib
+import importlib
+import json
+import re
+import shutil
+import smtplib
+import tempfile
+import threading
+from contextlib import contextmanager
+from io import BytesIO, StringIO
+from pathlib import Path
+from datetime import date, timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.files.uploadhandler import StopFutureHandlers, StopUpload
+from django.core.management import CommandError, call_command
+from django.core import mail
+from django.core.mail.backends import locmem
+from django.core.cache import cache
+from django.db import connection, connections
+from django.template import Context, Template
+from django.template.loader import render_to_string
+from django.test import AsyncClient, Client, LiveServerTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import clear_url_caches, reverse
+from django.utils import timezone
+
+from asgiref.sync import async_to_sync
+from PIL import Image
+
+from .cache import CSRF_PLACEHOLDER, get_versions
+from .images import derivative_name, generate_derivatives
+from . import async_views, benchmarks, jobs, profiling, tasks, urls, views
+from .forms import CareerApplicationForm, ContactForm, NewsletterForm
+from .exports import stream as export_stream
+from .subscribers import import_subscribers, read_csv_emails
+from .campaigns import RateLimiter, send_campaign, unsubscribe_token
+from .assets import critical_css, minify_css, minify_js, page_templates
+from .templatetags.static_assets import page_critical_css
+from . import fonts
+from . import compression
+from .compression import CompressedPage, minify_html
+from .uploads import MAX_RESUME_SIZE, MISLABELED, TOO_LARGE, WRONG_TYPE, ResumeUploadHandler
+from .models import (
+    Service, Portfolio, BlogPost, Testimonial, TeamMember, JobListing,
+    ContactSubmission, CareerApplication, NewsletterSubscriber, SearchDocument, Technology, Job,
+    Campaign, CampaignDelivery,
+)
+from .pagination import KeysetPaginator
+from .replicas import PIN_COOKIE, ReplicaRouter
+from . import pagination
+from .facets import portfolio_categories, blog_categories, job_departments
+from .search import search, rebuild_index
+from .related import compute_neighbours, rebuild_related, related_items
+from .views import BLOG_KEYSET_ORDERING, PORTFOLIO_KEYSET_ORDERING
+from .sitemaps import BlogPostSitemap
+
+
+LOCMEM_CACHE = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'qbix-tests',
+    }
+}
+
+
+def create_content():
+    service = Service.objects.create(
+        title='Web Development', slug='web-development', icon='fas fa-code',
+        short_description='Websites', full_description='Full', features='Fast, Secure',
+    )
+    portfolio = Portfolio.objects.create(
+        title='Shop', slug='shop', category='E-commerce', description='An online shop',
+        technologies='Django, React', completion_date=date(2025, 1, 1), featured=True,
+    )
+    testimonial = Testimonial.objects.create(
+        client_name='Alex', company='Acme', position='CEO', testimonial='Great work',
+    )
+    post = BlogPost.objects.create(
+        title='Hello', slug='hello', excerpt='Intro', content='Body',
+        author='Ravi', category='News',
+    )
+    return service, portfolio, testimonial, post
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class HomeFragmentCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.service, self.portfolio, self.testimonial, self.post = create_content()
+
+    def test_warm_home_page_runs_no_content_queries(self):
+        self.client.get(reverse('QbixSolutions:home'))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('QbixSolutions:home'))
+        self.assertContains(response, 'Web Development')
+        self.assertContains(response, 'Shop')
+
+    def test_save_invalidates_only_its_own_fragment(self):
+        self.client.get(reverse('QbixSolutions:home'))
+        before = get_versions()
+
+        self.service.title = 'Mobile Apps'
+        self.service.save()
+
+        after = get_versions()
+        self.assertNotEqual(before['service'], after['service'])
+        for name in ('portfolio', 'testimonial', 'blogpost'):
+            self.assertEqual(before[name], after[name])
+
+        # Only the services section is re-rendered, so only the service table is read
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('QbixSolutions:home'))
+        self.assertTrue(queries.captured_queries)
+        for query in queries.captured_queries:
+            self.assertIn('"QbixSolutions_service"', query['sql'])
+        self.assertContains(response, 'Mobile Apps')
+
+    def test_delete_invalidates_fragment(self):
+        self.client.get(reverse('QbixSolutions:home'))
+        self.testimonial.delete()
+        response = self.client.get(reverse('QbixSolutions:home'))
+        self.assertContains(response, 'No testimonials available yet.')
+
+    def test_unrelated_model_does_not_invalidate(self):
+        sections = ('service', 'portfolio', 'testimonial', 'blogpost')
+        before = get_versions(*sections)
+        TeamMember.objects.create(name='Sam', position='Dev', bio='Bio')
+        self.assertEqual(before, get_versions(*sections))
+
+    def test_admin_edit_invalidates_fragment(self):
+        admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.get(reverse('QbixSolutions:home'))
+        before = get_versions()
+
+        self.client.force_login(admin)
+        response = self.client.post(
+            reverse('admin:QbixSolutions_blogpost_change', args=[self.post.pk]),
+            {
+                'title': 'Edited in admin', 'slug': 'hello', 'excerpt': 'Intro',
+                'content': 'Body', 'author': 'Ravi', 'category': 'News',
+                'published_date_0': '2025-01-01', 'published_date_1': '10:00:00',
+            },
+        )
+        self.assertEqual(response.status_code, 302)
+        self.client.logout()
+
+        after = get_versions()
+        self.assertNotEqual(before['blogpost'], after['blogpost'])
+        self.assertEqual(before['service'], after['service'])
+        self.assertContains(self.client.get(reverse('QbixSolutions:home')), 'Edited in admin')
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class PublicPageCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        create_content()
+
+    def test_anonymous_get_is_served_from_cache(self):
+        self.client.get(reverse('QbixSolutions:blog'))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('QbixSolutions:blog'))
+        self.assertContains(response, 'Hello')
+
+    def test_query_params_are_normalized(self):
+        url = reverse('QbixSolutions:portfolio')
+        self.client.get(url, {'category': 'E-commerce'})
+        with self.assertNumQueries(0):
+            self.client.get(url, {'category': 'E-commerce', 'page': '1', 'utm_source': 'mail'})
+        # A different filter is a different page
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url, {'category': 'SaaS'})
+        self.assertTrue(queries.captured_queries)
+
+    @override_settings(ALLOWED_HOSTS=['testserver', 'evil.example'], SITE_URL='https://example.com')
+    def test_foreign_host_and_params_cannot_poison_the_cache(self):
+        url = reverse('QbixSolutions:blog_detail', args=['hello'])
+        poisoned = self.client.get(url, {'utm': 'evil'}, HTTP_HOST='evil.example')
+        self.assertNotContains(poisoned, 'evil')
+        # Neither the other host nor the unknown parameter filled the cache
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertTrue(queries.captured_queries)
+        self.assertContains(response, 'https%3A%2F%2Fexample.com%2Fblog%2Fhello%2F')
+        self.assertNotContains(response, 'evil')
+
+    def test_content_save_invalidates_page(self):
+        self.client.get(reverse('QbixSolutions:blog_detail', args=['hello']))
+        BlogPost.objects.filter(slug='hello').update(title='Stale')
+        self.assertContains(self.client.get(reverse('QbixSolutions:blog_detail', args=['hello'])), 'Hello')
+
+        post = BlogPost.objects.get(slug='hello')
+        post.title = 'Fresh'
+        post.save()
+        self.assertContains(self.client.get(reverse('QbixSolutions:blog_detail', args=['hello'])), 'Fresh')
+
+    def test_cached_page_carries_the_visitors_own_csrf_token(self):
+        url = reverse('QbixSolutions:home')
+        Client().get(url)
+
+        client = Client(enforce_csrf_checks=True)
+        response = client.get(url)
+        self.assertNotIn(CSRF_PLACEHOLDER, response.content)
+        self.assertIsNone(response.context)
+        token = re.search(rb'name="csrfmiddlewaretoken" value="([^"]+)"', response.content).group(1)
+
+        response = client.post(url, {
+            'consultation_submit': '1', 'csrfmiddlewaretoken': token.decode(),
+            'name': 'Jo', 'email': 'jo@example.com', 'phone': '0123456789',
+            'service': 'Consulting', 'message': 'Hi',
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(ContactSubmission.objects.count(), 1)
+
+    def test_pending_messages_bypass_cache(self):
+        url = reverse('QbixSolutions:home')
+        self.client.get(url)
+        response = self.client.post(url, {
+            'consultation_submit': '1', 'name': 'Jo', 'email': 'jo@example.com',
+            'phone': '0123456789', 'service': 'Consulting', 'message': 'Hi',
+        }, follow=True)
+        self.assertContains(response, 'Thank you! We will contact you soon')
+        # The flash was consumed, so the next visit is the plain cached page again
+        self.assertNotContains(self.client.get(url), 'Thank you! We will contact you soon')
+
+    def test_logged_in_users_bypass_cache(self):
+        admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.get(reverse('QbixSolutions:about'))
+        self.client.force_login(admin)
+        response = self.client.get(reverse('QbixSolutions:about'))
+        self.assertIsNotNone(response.context)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class ConditionalResponseTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.service, self.portfolio, self.testimonial, self.post = create_content()
+
+    def test_unchanged_page_answers_304(self):
+        url = reverse('QbixSolutions:blog_detail', args=['hello'])
+        response = self.client.get(url)
+        self.assertTrue(response.has_header('ETag'))
+        self.assertTrue(response.has_header('Last-Modified'))
+
+        response = self.client.get(url, headers={'If-None-Match': response['ETag']})
+        self.assertEqual(response.status_code, 304)
+
+    def test_edit_changes_validators(self):
+        url = reverse('QbixSolutions:portfolio')
+        etag = self.client.get(url)['ETag']
+        self.portfolio.title = 'Renamed'
+        self.portfolio.save()
+        response = self.client.get(url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Renamed')
+
+    def test_delete_changes_validators(self):
+        Service.objects.create(
+            title='Apps', slug='apps', icon='fas fa-mobile', short_description='Apps',
+            full_description='Full', features='Native',
+        )
+        url = reverse('QbixSolutions:services')
+        etag = self.client.get(url)['ETag']
+        # Deleting the oldest row leaves MAX(updated_at) unchanged; the count still moves
+        self.service.delete()
+        self.assertEqual(self.client.get(url, headers={'If-None-Match': etag}).status_code, 200)
+
+    def test_delete_moves_last_modified(self):
+        # Posts last edited an hour ago; deleting the newest moves MAX(updated_at) back
+        BlogPost.objects.update(updated_at=timezone.now() - timedelta(hours=1))
+        older = BlogPost.objects.create(
+            title='Older', slug='older', excerpt='e', content='c', author='a', category='News',
+        )
+        BlogPost.objects.filter(pk=older.pk).update(updated_at=timezone.now() - timedelta(hours=2))
+        cache.clear()
+        url = reverse('QbixSolutions:blog')
+        last_modified = self.client.get(url)['Last-Modified']
+        self.post.delete()
+        response = self.client.get(url, headers={'If-Modified-Since': last_modified})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, self.post.title)
+
+    def test_query_params_are_part_of_etag(self):
+        url = reverse('QbixSolutions:blog')
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(url, {'category': 'News'}, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+
+    def test_pending_messages_never_get_304(self):
+        url = reverse('QbixSolutions:home')
+        etag = self.client.get(url)['ETag']
+        self.client.cookies['messages'] = 'pending'
+        response = self.client.get(url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('ETag'))
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class SitemapTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        create_content()
+        JobListing.objects.create(
+            title='Django Developer', slug='django-developer', department='Engineering',
+            employment_type='full-time', location='Remote', description='d',
+            requirements='r', responsibilities='r',
+        )
+        JobListing.objects.create(
+            title='Closed Role', slug='closed-role', department='Engineering',
+            employment_type='full-time', location='Remote', description='d',
+            requirements='r', responsibilities='r', active=False,
+        )
+
+    def test_index_lists_every_section(self):
+        response = self.client.get('/sitemap.xml')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/xml')
+        for section in ('pages', 'portfolio', 'blog', 'careers'):
+            self.assertContains(response, f'/sitemap-{section}.xml')
+        # service_detail.html does not exist, so its pages are not advertised
+        self.assertNotContains(response, '/sitemap-services.xml')
+
+    @override_settings(ALLOWED_HOSTS=['testserver', 'evil.example'], SITE_URL='https://example.com')
+    def test_urls_are_on_site_url_whatever_the_host(self):
+        for path in ('/sitemap.xml', '/sitemap-blog.xml', '/sitemap-pages.xml'):
+            response = self.client.get(path, HTTP_HOST='evil.example')
+            self.assertNotContains(response, 'evil.example')
+            self.assertContains(response, '<loc>https://example.com/')
+            self.assertNotContains(self.client.get(path), 'evil.example')
+
+    def test_sections_list_objects_with_lastmod(self):
+        post = BlogPost.objects.get(slug='hello')
+        response = self.client.get('/sitemap-blog.xml')
+        self.assertContains(response, '/blog/hello/')
+        self.assertContains(response, f'<lastmod>{post.updated_at.date().isoformat()}</lastmod>')
+
+        response = self.client.get('/sitemap-careers.xml')
+        self.assertContains(response, '/careers/apply/django-developer/')
+        self.assertNotContains(response, 'closed-role')
+
+        response = self.client.get('/sitemap-pages.xml')
+        self.assertContains(response, '/about/')
+        self.assertContains(response, '/contact/')
+
+    def test_unknown_section_is_404(self):
+        self.assertEqual(self.client.get('/sitemap-nope.xml').status_code, 404)
+
+    def test_sections_are_cached_and_regenerated_on_save(self):
+        self.client.get('/sitemap-blog.xml')
+        with self.assertNumQueries(0):
+            self.client.get('/sitemap-blog.xml')
+
+        BlogPost.objects.create(
+            title='Second', slug='second', excerpt='e', content='c', author='a', category='News',
+        )
+        self.assertContains(self.client.get('/sitemap-blog.xml'), '/blog/second/')
+
+    def test_conditional_get(self):
+        response = self.client.get('/sitemap-portfolio.xml')
+        self.assertTrue(response.has_header('Last-Modified'))
+        response = self.client.get('/sitemap-portfolio.xml', headers={'If-None-Match': response['ETag']})
+        self.assertEqual(response.status_code, 304)
+
+    def test_index_splits_sections_over_the_url_limit(self):
+        BlogPost.objects.create(
+            title='Second', slug='second', excerpt='e', content='c', author='a', category='News',
+        )
+        with mock.patch.object(BlogPostSitemap, 'limit', 1):
+            self.assertContains(self.client.get('/sitemap.xml'), '/sitemap-blog.xml?p=2')
+            self.assertContains(self.client.get('/sitemap-blog.xml', {'p': '2'}), '/blog/')
+            self.assertEqual(self.client.get('/sitemap-blog.xml', {'p': '3'}).status_code, 404)
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        self.service, self.portfolio, self.testimonial, self.post = create_content()
+        BlogPost.objects.create(
+            title='Scaling Django', slug='scaling-django', excerpt='Caching and indexes',
+            content='How we tuned PostgreSQL for a busy shop.', author='Ravi', category='Tech',
+        )
+
+    def test_documents_follow_saves_and_deletes(self):
+        self.assertEqual(SearchDocument.objects.count(), 4)
+        self.post.content = 'Now about kubernetes'
+        self.post.save()
+        self.assertEqual(search('kubernetes').count(), 1)
+        self.post.delete()
+        self.assertEqual(search('kubernetes').count(), 0)
+
+    def test_results_are_ranked_and_highlighted(self):
+        hits = search('django')[:10]
+        # The title match outranks the portfolio item mentioning Django in technologies
+        self.assertEqual([hit.kind for hit in hits], ['blogpost', 'portfolio'])
+        self.assertEqual(hits[0].url, reverse('QbixSolutions:blog_detail', args=['scaling-django']))
+        self.assertIn('<mark>Django</mark>', hits[0].title)
+
+    def test_prefix_and_stemmed_matching(self):
+        self.assertEqual(search('postgres').count(), 1)
+        self.assertEqual(search('tune').count(), 1)
+
+    def test_query_syntax_and_markup_are_neutralized(self):
+        BlogPost.objects.create(
+            title='<script>alert(1)</script> shop', slug='xss', excerpt='e', content='c',
+            author='a', category='News',
+        )
+        self.assertEqual(search('"shop*" (').count(), 3)
+        titles = ' '.join(hit.title for hit in search('alert')[:10])
+        self.assertNotIn('<script>', titles)
+
+    def test_services_are_not_returned(self):
+        # Indexed, but service_detail.html does not exist to link to
+        self.assertTrue(SearchDocument.objects.filter(kind='service').exists())
+        self.assertEqual(search('web development').count(), 0)
+        self.assertNotContains(
+            self.client.get(reverse('QbixSolutions:search'), {'q': 'web'}), '/services/web-development/',
+        )
+
+    def test_search_page_paginates(self):
+        response = self.client.get(reverse('QbixSolutions:search'), {'q': 'shop'})
+        self.assertContains(response, '2 results')
+        self.assertContains(self.client.get(reverse('QbixSolutions:search')), 'Search')
+
+    def test_rebuild_index(self):
+        SearchDocument.objects.all().delete()
+        self.assertEqual(search('django').count(), 0)
+        self.assertEqual(rebuild_index(), 4)
+        self.assertEqual(search('django').count(), 2)
+
+    def test_admin_blog_search_uses_index(self):
+        admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.force_login(admin)
+        url = reverse('admin:QbixSolutions_blogpost_changelist')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {'q': 'postgresql'})
+        self.assertContains(response, 'Scaling Django')
+        self.assertNotContains(response, '>Hello<')
+        for query in queries.captured_queries:
+            self.assertNotIn('"content" LIKE', query['sql'])
+        # The matches are a subquery, not an id list built in Python
+        listing = [q['sql'] for q in queries.captured_queries if 'qbix_search_fts' in q['sql']]
+        self.assertTrue(listing)
+        self.assertTrue(all('"QbixSolutions_blogpost"' in sql for sql in listing))
+        # Author still matches through search_fields
+        self.assertContains(self.client.get(url, {'q': 'Ravi'}), 'Scaling Django')
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}})
+class QueryPlanTests(TestCase):
+    """Every listing query must be answered from an index, never by sorting the table"""
+
+    def setUp(self):
+        create_content()
+        JobListing.objects.create(
+            title='Django Developer', slug='django-developer', department='Engineering',
+            employment_type='full-time', location='Remote', description='d',
+            requirements='r', responsibilities='r',
+        )
+
+    def assertQueriesUseIndexes(self, queries):
+        with connection.cursor() as cursor:
+            for query in queries:
+                sql = query['sql']
+                if not sql.startswith('SELECT') or 'ORDER BY' not in sql and 'DISTINCT' not in sql:
+                    continue
+                cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+                plan = ' / '.join(row[-1] for row in cursor.fetchall())
+                self.assertNotIn('TEMP B-TREE', plan, f'{sql}\n{plan}')
+
+    def test_public_views_use_indexes(self):
+        urls = [
+            reverse('QbixSolutions:home'),
+            reverse('QbixSolutions:about'),
+            reverse('QbixSolutions:services'),
+            reverse('QbixSolutions:portfolio'),
+            reverse('QbixSolutions:portfolio') + '?category=E-commerce',
+            reverse('QbixSolutions:portfolio_detail', args=['shop']),
+            reverse('QbixSolutions:blog'),
+            reverse('QbixSolutions:blog') + '?category=News',
+            reverse('QbixSolutions:blog_detail', args=['hello']),
+            reverse('QbixSolutions:careers'),
+            reverse('QbixSolutions:careers') + '?department=Engineering',
+        ]
+        for url in urls:
+            with self.subTest(url=url), CaptureQueriesContext(connection) as queries:
+                self.assertEqual(self.client.get(url).status_code, 200)
+            self.assertQueriesUseIndexes(queries.captured_queries)
+
+    def test_service_detail_queries_use_indexes(self):
+        # service_detail.html is not in the tree yet, so run the view's queries directly
+        with CaptureQueriesContext(connection) as queries:
+            list(Service.objects.exclude(slug='web-development')[:3])
+        self.assertQueriesUseIndexes(queries.captured_queries)
+
+    def test_admin_changelists_use_indexes(self):
+        admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.force_login(admin)
+        for model in ('contactsubmission', 'careerapplication', 'newslettersubscriber', 'job'):
+            with self.subTest(model=model), CaptureQueriesContext(connection) as queries:
+                self.client.get(reverse(f'admin:QbixSolutions_{model}_changelist'))
+            # date_hierarchy's DISTINCT over truncated dates reads the covering
+            # index but has to de-duplicate the computed buckets itself
+            self.assertQueriesUseIndexes([
+                query for query in queries.captured_queries
+                if f'FROM "QbixSolutions_{model}"' in query['sql'] and 'django_datetime_trunc' not in query['sql']
+            ])
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        published = timezone.now()
+        for i in range(20):
+            # Pairs of posts share a timestamp to exercise the id tie-breaker
+            BlogPost.objects.create(
+                title=f'Post {i}', slug=f'post-{i}', excerpt='e', content='c', author='a',
+                category='Even' if i % 2 == 0 else 'Odd', published_date=published - timedelta(hours=i // 2),
+            )
+        for i in range(12):
+            Portfolio.objects.create(
+                title=f'Project {i}', slug=f'project-{i}', category='SaaS', description='d',
+                technologies='Django', completion_date=date(2025, 1, 1) + timedelta(days=i // 3),
+                featured=i % 4 == 0, order=i % 3,
+            )
+
+    def walk(self, paginator):
+        pages, page = [], paginator.get_page()
+        while True:
+            pages.append(list(page))
+            if not page.has_next():
+                return pages, page
+            page = paginator.get_page(page.next_cursor)
+
+    def test_forward_walk_matches_offset_order(self):
+        for model, ordering in ((BlogPost, BLOG_KEYSET_ORDERING), (Portfolio, PORTFOLIO_KEYSET_ORDERING)):
+            with self.subTest(model=model.__name__):
+                pages, _ = self.walk(KeysetPaginator(model.objects.all(), 3, ordering))
+                walked = [obj.pk for page in pages for obj in page]
+                self.assertEqual(walked, list(model.objects.order_by(*ordering).values_list('pk', flat=True)))
+
+    def test_backward_walk_returns_the_same_pages(self):
+        paginator = KeysetPaginator(BlogPost.objects.all(), 3, BLOG_KEYSET_ORDERING)
+        pages, page = self.walk(paginator)
+        backwards = [list(page)]
+        while page.has_previous():
+            page = paginator.get_page(page.previous_cursor)
+            backwards.append(list(page))
+        self.assertEqual(backwards[::-1], pages)
+        self.assertFalse(page.has_previous())
+
+    def test_each_page_is_one_query(self):
+        paginator = KeysetPaginator(BlogPost.objects.all(), 3, BLOG_KEYSET_ORDERING)
+        cursor = paginator.get_page().next_cursor
+        with self.assertNumQueries(1):
+            list(paginator.get_page(cursor))
+
+    def test_tampered_cursor_falls_back_to_first_page(self):
+        paginator = KeysetPaginator(BlogPost.objects.all(), 3, BLOG_KEYSET_ORDERING)
+        first = list(paginator.get_page())
+        cursor = paginator.get_page().next_cursor
+        self.assertEqual(list(paginator.get_page(cursor[:-2] + 'xx')), first)
+        self.assertEqual(list(paginator.get_page('garbage')), first)
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}})
+    def test_blog_view_supports_cursors_and_page_numbers(self):
+        url = reverse('QbixSolutions:blog')
+        # Numbered pages keep working
+        response = self.client.get(url, {'page': 2})
+        self.assertEqual(response.context['blog_posts'].number, 2)
+
+        with self.settings(KEYSET_PAGINATION=True):
+            response = self.client.get(url, {'category': 'Even'})
+            page = response.context['blog_posts']
+            self.assertTrue(page.is_keyset)
+            self.assertContains(response, 'rel="next"')
+
+            response = self.client.get(url, {'category': 'Even', 'cursor': page.next_cursor})
+            self.assertEqual([post.title for post in response.context['blog_posts']], ['Post 18'])
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class FacetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.service, self.portfolio, self.testimonial, self.post = create_content()
+        Portfolio.objects.create(
+            title='Bookings', slug='bookings', category='Booking', description='d',
+            technologies='Django', completion_date=date(2025, 2, 1),
+        )
+        Portfolio.objects.create(
+            title='Store', slug='store', category='E-commerce', description='d',
+            technologies='Django', completion_date=date(2025, 3, 1),
+        )
+        for slug, department, active in (('a', 'Design', True), ('b', 'Engineering', True), ('c', 'Sales', False)):
+            JobListing.objects.create(
+                title=slug, slug=slug, department=department, employment_type='full-time',
+                location='Remote', description='d', requirements='r', responsibilities='r', active=active,
+            )
+
+    def test_counts_follow_choice_order_and_active_flag(self):
+        self.assertEqual(portfolio_categories(), [
+            ('E-commerce', 'E-commerce Project', 2),
+            ('Booking', 'Booking System', 1),
+        ])
+        self.assertEqual(blog_categories(), [('News', 1)])
+        self.assertEqual(job_departments(), [('Design', 1), ('Engineering', 1)])
+
+    def test_counts_are_cached_until_content_changes(self):
+        portfolio_categories()
+        with self.assertNumQueries(0):
+            portfolio_categories()
+
+        self.portfolio.delete()
+        self.assertEqual(portfolio_categories(), [
+            ('E-commerce', 'E-commerce Project', 1),
+            ('Booking', 'Booking System', 1),
+        ])
+        BlogPost.objects.create(title='T', slug='t', excerpt='e', content='c', author='a', category='Tips')
+        self.assertEqual(blog_categories(), [('News', 1), ('Tips', 1)])
+
+    def test_listing_pages_show_counts(self):
+        self.assertContains(self.client.get(reverse('QbixSolutions:portfolio')), 'E-commerce Project <span class="filter-count">(2)</span>')
+        self.assertContains(self.client.get(reverse('QbixSolutions:careers')), 'All Departments <span class="filter-count">(2)</span>')
+
+
+class ParsedListFieldTests(TestCase):
+    def setUp(self):
+        self.service, self.portfolio, self.testimonial, self.post = create_content()
+
+    def test_lists_are_parsed_on_save(self):
+        self.assertEqual(self.service.feature_list, ['Fast', 'Secure'])
+        self.portfolio.technologies = ' Django ,, PostgreSQL, C++ , C#'
+        self.portfolio.save()
+        portfolio = Portfolio.objects.get(pk=self.portfolio.pk)
+        self.assertEqual(portfolio.technology_list, ['Django', 'PostgreSQL', 'C++', 'C#'])
+        self.assertEqual(
+            sorted(portfolio.technology_tags.values_list('slug', flat=True)),
+            ['c-plus-plus', 'c-sharp', 'django', 'postgresql'],
+        )
+
+    def test_accessors_do_not_query_or_parse(self):
+        service = Service.objects.get(pk=self.service.pk)
+        portfolio = Portfolio.objects.get(pk=self.portfolio.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(service.get_features_list(), ['Fast', 'Secure'])
+            self.assertEqual(portfolio.get_technologies_list(), ['Django', 'React'])
+
+    def test_projects_by_technology(self):
+        Portfolio.objects.create(
+            title='Blog', slug='blog', category='CMS', description='d',
+            technologies='Wagtail, django', completion_date=date(2025, 2, 1),
+        )
+        Portfolio.objects.create(
+            title='App', slug='app', category='Mobile App', description='d',
+            technologies='Flutter', completion_date=date(2025, 2, 1),
+        )
+        # Tags are shared case-insensitively; the first spelling seen is kept
+        self.assertEqual(Technology.objects.filter(slug='django').count(), 1)
+        projects = Portfolio.objects.filter(technology_tags__slug='django').order_by('slug')
+        self.assertEqual([project.slug for project in projects], ['blog', 'shop'])
+
+    def test_removed_technologies_are_untagged(self):
+        self.portfolio.technologies = 'Vue'
+        self.portfolio.save()
+        self.assertFalse(Portfolio.objects.filter(technology_tags__slug='django').exists())
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class RelatedContentTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.service, self.portfolio, self.testimonial, self.post = create_content()
+
+    def post_about(self, slug, title, category='News', excerpt='Intro'):
+        return BlogPost.objects.create(
+            title=title, slug=slug, excerpt=excerpt, content='Body', author='Ravi', category=category,
+        )
+
+    def test_text_and_tags_outrank_category(self):
+        neighbours = compute_neighbours([
+            (1, 'Web', {'django'}, 'Scaling Django with PostgreSQL'),
+            (2, 'Web', set(), 'Office party photos'),
+            (3, 'Data', {'django', 'postgresql'}, 'Django PostgreSQL indexing tips'),
+            (4, 'Mobile', set(), 'Flutter state management'),
+            (5, 'Mobile', set(), 'Flutter animations'),
+        ], count=2)
+        self.assertEqual(neighbours[1], [3, 2])
+        # An item alone in its category still gets related items through its words
+        self.assertEqual(neighbours[3], [1])
+        self.assertEqual(neighbours[4], [5])
+
+    def test_rebuild_stores_neighbours_and_invalidates_pages(self):
+        near = self.post_about('django-caching', 'Caching Django sites', category='Engineering')
+        self.post_about('django-caching-2', 'Django caching in depth', category='Engineering')
+        far = self.post_about('team-outing', 'Team outing', category='Engineering')
+        version = get_versions('blogpost')['blogpost']
+        url = reverse('QbixSolutions:blog_detail', args=['django-caching'])
+        etag = self.client.get(url)['ETag']
+        touched = near.updated_at
+
+        updated = rebuild_related()
+        near.refresh_from_db()
+        # 'hello' shares nothing with the others and keeps its empty list
+        self.assertEqual(updated['blogpost'], 3)
+        self.assertEqual(near.related_ids[0], BlogPost.objects.get(slug='django-caching-2').pk)
+        self.assertIn(far.pk, near.related_ids)
+        self.assertNotEqual(version, get_versions('blogpost')['blogpost'])
+        # The posts' text did not change, so neither does their updated_at;
+        # the version alone moves the ETag
+        self.assertEqual(near.updated_at, touched)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        # Nothing changed, so nothing is written and cached pages stay valid
+        version = get_versions('blogpost')['blogpost']
+        self.assertEqual(rebuild_related()['blogpost'], 0)
+        self.assertEqual(version, get_versions('blogpost')['blogpost'])
+
+    def test_detail_page_shows_precomputed_items(self):
+        other = self.post_about('other', 'Hello again', category='Elsewhere')
+        rebuild_related()
+        response = self.client.get(reverse('QbixSolutions:blog_detail', args=['hello']))
+        self.assertEqual(list(response.context['related_posts']), [other])
+
+        post = BlogPost.objects.get(pk=self.post.pk)
+        with CaptureQueriesContext(connection) as queries:
+            related_items(post)
+        self.assertEqual(len(queries), 1)
+
+    def test_falls_back_to_category_until_rebuilt(self):
+        newer = self.post_about('news-2', 'Unrelated', category='News')
+        self.assertEqual(related_items(self.post), [newer])
+
+    def test_deleted_neighbours_are_skipped(self):
+        other = self.post_about('other', 'Hello again')
+        rebuild_related()
+        other.delete()
+        self.post.refresh_from_db()
+        self.assertEqual(related_items(self.post), [])
+
+
+def use_temporary_media(test):
+    """Point MEDIA_ROOT at a directory removed after the test"""
+    media_root = tempfile.mkdtemp()
+    test.addCleanup(shutil.rmtree, media_root)
+    media = override_settings(MEDIA_ROOT=media_root)
+    media.enable()
+    test.addCleanup(media.disable)
+
+
+def image_upload(name='photo.png', size=(2000, 1000), mode='RGBA'):
+    buffer = BytesIO()
+    Image.new(mode, size, (200, 30, 30, 128) if mode == 'RGBA' else (200, 30, 30)).save(buffer, 'PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/png')
+
+
+@override_settings(CACHES=LOCMEM_CACHE, IMAGE_DERIVATIVES_ASYNC=False)
+class ImageDerivativeTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        use_temporary_media(self)
+
+    def create_post(self, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            return BlogPost.objects.create(
+                title='Photo', slug='photo', excerpt='Intro', content='Body', author='Ravi', category='News',
+                **kwargs,
+            )
+
+    def render(self, post):
+        return Template(
+            '{% load responsive_images %}{% responsive_image post.image alt=post.title sizes="50vw" loading="lazy" %}'
+        ).render(Context({'post': post}))
+
+    def test_upload_generates_derivatives(self):
+        version = get_versions('blogpost')['blogpost']
+        post = BlogPost.objects.get(pk=self.create_post(image=image_upload()).pk)
+        derivatives = post.image_derivatives
+        self.assertEqual(derivatives['source'], post.image.name)
+        self.assertEqual(derivatives['widths'], [320, 640, 960, 1280])
+        self.assertIn('webp', derivatives['formats'])
+        self.assertEqual(derivatives['formats'][-1], 'jpg')
+        self.assertNotEqual(version, get_versions('blogpost')['blogpost'])
+
+        storage = post.image.storage
+        for extension in derivatives['formats']:
+            self.assertTrue(storage.exists(derivative_name(post.image.name, 640, extension)))
+        with storage.open(derivative_name(post.image.name, 640, 'jpg')) as fh, Image.open(fh) as jpeg:
+            self.assertEqual((jpeg.format, jpeg.size, jpeg.mode), ('JPEG', (640, 320), 'RGB'))
+
+    def test_small_images_are_not_upscaled(self):
+        post = self.create_post(image=image_upload(size=(200, 100), mode='RGB'))
+        post.refresh_from_db()
+        self.assertEqual(post.image_derivatives['widths'], [200])
+
+    def test_tag_renders_picture_with_srcset(self):
+        post = BlogPost.objects.get(pk=self.create_post(image=image_upload()).pk)
+        html = self.render(post)
+        webp = derivative_name(post.image.url, 320, 'webp')
+        self.assertIn('<picture><', html)
+        self.assertIn(f'<source type="image/webp" srcset="{webp} 320w, ', html)
+        self.assertIn(f'src="{derivative_name(post.image.url, 1280, "jpg")}"', html)
+        self.assertIn('sizes="50vw" width="1280" height="640" alt="Photo" loading="lazy"', html)
+
+    def test_tag_falls_back_to_original_until_generated(self):
+        with override_settings(IMAGE_DERIVATIVES_ASYNC=True), mock.patch('QbixSolutions.images._executor') as executor:
+            post = self.create_post(image=image_upload())
+        executor.submit.assert_called_once()
+        self.assertEqual(self.render(post), f'<img src="{post.image.url}" alt="Photo" loading="lazy">')
+        self.assertEqual(self.render(BlogPost(title='None')), '')
+
+    def test_backfill_command(self):
+        post = self.create_post(image=image_upload())
+        BlogPost.objects.filter(pk=post.pk).update(image_derivatives={})
+        out = StringIO()
+        call_command('generate_image_derivatives', stdout=out)
+        self.assertIn('Generated derivatives for 1 images (0 failed)', out.getvalue())
+        post.refresh_from_db()
+        self.assertEqual(post.image_derivatives['source'], post.image.name)
+
+    def test_unreadable_image_is_skipped(self):
+        with self.assertLogs('QbixSolutions.images', 'ERROR'):
+            post = self.create_post(image=SimpleUploadedFile('broken.jpg', b'not an image'))
+        post.refresh_from_db()
+        self.assertEqual(post.image_derivatives, {})
+        with self.assertLogs('QbixSolutions.images', 'ERROR'):
+            self.assertIsNone(generate_derivatives(post))
+
+
+CONTACT_POST = {
+    'name': 'Alex Doe', 'email': 'alex@example.com', 'phone': '+91 98765 43210',
+    'service': 'Web Development', 'message': 'We need a new site',
+}
+
+
+@override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+class JobQueueTests(TestCase):
+    def test_form_posts_queue_jobs_instead_of_sending_mail(self):
+        use_temporary_media(self)
+        job_listing = JobListing.objects.create(
+            title='Django Developer', slug='django-developer', department='Engineering',
+            employment_type='full-time', location='Remote', description='d',
+            requirements='r', responsibilities='r',
+        )
+        self.client.post(reverse('QbixSolutions:contact'), CONTACT_POST)
+        self.client.post(reverse('QbixSolutions:newsletter_subscribe'), {'email': 'reader@example.com'})
+        self.client.post(
+            reverse('QbixSolutions:career_apply', args=[job_listing.slug]),
+            {**CONTACT_POST, 'cover_letter': 'Hire me', 'resume': SimpleUploadedFile('cv.pdf', b'%PDF-1.4 cv')},
+        )
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(
+            sorted(Job.objects.values_list('name', flat=True)),
+            [tasks.ACKNOWLEDGE_APPLICATION, tasks.CONFIRM_SUBSCRIBER, tasks.NOTIFY_CONTACT_SUBMISSION],
+        )
+
+        self.assertEqual(jobs.run_pending(), 3)
+        self.assertEqual(Job.objects.filter(status=Job.DONE).count(), 3)
+        recipients = sorted(address for message in mail.outbox for address in message.to)
+        self.assertEqual(recipients, ['alex@example.com', 'info@qbixsolution.com', 'reader@example.com'])
+        notification = next(message for message in mail.outbox if 'info@qbixsolution.com' in message.to)
+        self.assertIn('New enquiry from Alex Doe', notification.subject)
+        self.assertIn('We need a new site', notification.body)
+
+    def test_failures_are_retried_with_backoff(self):
+        calls = []
+
+        @jobs.handler('flaky')
+        def flaky(**payload):
+            calls.append(payload)
+            raise ConnectionError('SMTP down')
+        self.addCleanup(jobs.HANDLERS.pop, 'flaky')
+
+        job = jobs.enqueue('flaky', {'n': 1}, max_attempts=2)
+        with self.assertLogs('QbixSolutions.jobs', 'WARNING'):
+            self.assertEqual(jobs.run_pending(), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.QUEUED, 1))
+        self.assertIn('SMTP down', job.last_error)
+        self.assertGreater(job.run_at, timezone.now() + timedelta(seconds=20))
+        # Not due yet
+        self.assertEqual(jobs.run_pending(), 0)
+
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        with self.assertLogs('QbixSolutions.jobs', 'ERROR'):
+            jobs.run_pending()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 2))
+        self.assertEqual(calls, [{'n': 1}, {'n': 1}])
+
+    def test_a_job_is_claimed_once(self):
+        job = jobs.enqueue(tasks.CONFIRM_SUBSCRIBER, {'subscriber_id': 0})
+        [first] = jobs.claim('worker-1', limit=5)
+        self.assertEqual(first.pk, job.pk)
+        self.assertEqual(jobs.claim('worker-2', limit=5), [])
+
+        # Each claim has its own token, even from another thread of the same worker
+        jobs.enqueue(tasks.CONFIRM_SUBSCRIBER, {'subscriber_id': 0})
+        [second] = jobs.claim('worker-1')
+        self.assertTrue(second.locked_by.startswith('worker-1:'))
+        self.assertNotEqual(second.locked_by, first.locked_by)
+
+    def test_stale_jobs_are_requeued(self):
+        job = jobs.enqueue(tasks.CONFIRM_SUBSCRIBER, {'subscriber_id': 0})
+        jobs.claim('dead-worker')
+        Job.objects.filter(pk=job.pk).update(locked_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(jobs.requeue_stale(), 1)
+        self.assertEqual(jobs.run_pending(), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.DONE, 2))
+
+    def test_unknown_jobs_are_rejected(self):
+        with self.assertRaises(ValueError):
+            jobs.enqueue('no-such-job')
+
+
+@override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+class RunWorkerCommandTests(TransactionTestCase):
+    def test_worker_drains_queue(self):
+        for i in range(4):
+            subscriber = NewsletterSubscriber.objects.create(email=f'reader{i}@example.com')
+            jobs.enqueue(tasks.CONFIRM_SUBSCRIBER, {'subscriber_id': subscriber.pk})
+        out = StringIO()
+        call_command('run_worker', '--once', '--concurrency', '2', stdout=out)
+        self.assertEqual(Job.objects.filter(status=Job.DONE).count(), 4)
+        self.assertEqual(len(mail.outbox), 4)
+        self.assertIn('stopped', out.getvalue())
+
+
+PDF = b'%PDF-1.7\n' + b'0' * 1000
+
+
+@override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+class ResumeUploadTests(TestCase):
+    def setUp(self):
+        use_temporary_media(self)
+        self.job = JobListing.objects.create(
+            title='Django Developer', slug='django-developer', department='Engineering',
+            employment_type='full-time', location='Remote', description='d',
+            requirements='r', responsibilities='r',
+        )
+        self.url = reverse('QbixSolutions:career_apply', args=[self.job.slug])
+
+    def apply(self, name, content, **fields):
+        data = {**CONTACT_POST, 'cover_letter': 'Hire me', 'resume': SimpleUploadedFile(name, content), **fields}
+        return self.client.post(self.url, data)
+
+    def stored_files(self):
+        return default_storage.listdir('resumes')[1] if default_storage.exists('resumes') else []
+
+    def test_valid_resume_is_written_in_place(self):
+        self.assertEqual(self.apply('cv.pdf', PDF).status_code, 302)
+        application = CareerApplication.objects.get()
+        self.assertEqual(application.resume.name, 'resumes/cv.pdf')
+        self.assertEqual(application.resume_sha256, hashlib.sha256(PDF).hexdigest())
+        with application.resume.open('rb') as fh:
+            self.assertEqual(fh.read(), PDF)
+        self.assertEqual(self.stored_files(), ['cv.pdf'])
+
+    def test_identical_resumes_share_a_file(self):
+        self.apply('cv.pdf', PDF)
+        self.apply('my-cv.pdf', PDF, email='second@example.com')
+        first, second = CareerApplication.objects.order_by('pk')
+        self.assertEqual(first.resume.name, second.resume.name)
+        self.assertEqual(self.stored_files(), ['cv.pdf'])
+
+    def test_oversized_upload_is_rejected(self):
+        response = self.apply('cv.pdf', PDF + b'0' * MAX_RESUME_SIZE)
+        self.assertEqual(response.status_code, 200)
+        self.assertFormError(response.context['form'], 'resume', TOO_LARGE)
+        self.assertFalse(CareerApplication.objects.exists())
+        self.assertEqual(self.stored_files(), [])
+
+    def test_mislabeled_uploads_are_rejected(self):
+        cases = [
+            ('cv.pdf', b'PK\x03\x04 a zip', MISLABELED.format('PDF')),
+            ('cv.docx', b'%PDF-1.7 a pdf', MISLABELED.format('DOCX')),
+            ('cv.doc', b'MZ\x90\x00 an exe', MISLABELED.format('DOC')),
+            ('cv.exe', b'MZ\x90\x00 an exe', WRONG_TYPE),
+            ('cv.pdf', b'%PD', MISLABELED.format('PDF')),
+        ]
+        for name, content, error in cases:
+            with self.subTest(name=name, content=content):
+                response = self.apply(name, content)
+                self.assertFormError(response.context['form'], 'resume', error)
+        self.assertEqual(self.stored_files(), [])
+
+    def test_resume_is_removed_when_other_fields_are_invalid(self):
+        response = self.apply('cv.pdf', PDF, phone='123')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.stored_files(), [])
+
+    def test_handler_stops_reading_past_the_limit(self):
+        handler = ResumeUploadHandler()
+        handler.handle_raw_input(None, {}, 1000, b'boundary')  # a lying Content-Length
+        with self.assertRaises(StopFutureHandlers):
+            handler.new_file('resume', 'cv.pdf', 'application/pdf', None)
+        chunk = PDF[:64] + b'0' * (handler.chunk_size - 64)
+        position = 0
+        with self.assertRaises(StopUpload) as stopped:
+            while position <= MAX_RESUME_SIZE:
+                self.assertIsNone(handler.receive_data_chunk(chunk, position))
+                position += len(chunk)
+        # The rest of the body is left unread
+        self.assertTrue(stopped.exception.connection_reset)
+        self.assertEqual(handler.error, TOO_LARGE)
+        self.assertLessEqual(position, MAX_RESUME_SIZE)
+        self.assertEqual(self.stored_files(), [])
+        self.assertEqual(handler.upload.error, TOO_LARGE)
+
+    def test_declared_oversized_body_is_not_read(self):
+        handler = ResumeUploadHandler()
+        handler.handle_raw_input(None, {}, MAX_RESUME_SIZE * 2, b'boundary')
+        with self.assertRaises(StopUpload):
+            handler.new_file('resume', 'cv.pdf', 'application/pdf', None)
+        self.assertEqual(handler.upload.error, TOO_LARGE)
+
+    def test_resume_is_removed_when_csrf_check_fails(self):
+        client = Client(enforce_csrf_checks=True)
+        data = {**CONTACT_POST, 'cover_letter': 'Hire me', 'resume': SimpleUploadedFile('cv.pdf', PDF)}
+        self.assertEqual(client.post(self.url, data).status_code, 403)
+        self.assertEqual(self.stored_files(), [])
+
+    def test_resume_is_removed_when_saving_fails(self):
+        with mock.patch('QbixSolutions.jobs.enqueue', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                self.apply('cv.pdf', PDF)
+        self.assertFalse(CareerApplication.objects.exists())
+        self.assertEqual(self.stored_files(), [])
+
+    def test_form_checks_content_of_ordinary_uploads(self):
+        form = CareerApplicationForm(
+            {**CONTACT_POST, 'cover_letter': 'Hire me'},
+            {'resume': SimpleUploadedFile('cv.pdf', b'not a pdf')},
+        )
+        self.assertFormError(form, 'resume', MISLABELED.format('PDF'))
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.job = JobListing.objects.create(
+            title='Django Developer', slug='django-developer', department='Engineering',
+            employment_type='full-time', location='Remote', description='d',
+            requirements='r', responsibilities='r',
+        )
+        for i in range(3):
+            CareerApplication.objects.create(
+                job=self.job, name=f'Applicant {i}', email=f'a{i}@example.com', phone='1234567890',
+                cover_letter='=HYPERLINK("http://evil")' if i == 0 else 'Hello, "world"', resume='resumes/cv.pdf',
+            )
+
+    def test_formats(self):
+        queryset = CareerApplication.objects.order_by('pk')
+        csv_text = ''.join(export_stream(queryset, 'csv'))
+        lines = csv_text.lstrip('\ufeff').splitlines()
+        self.assertEqual(lines[0], 'id,job,name,email,phone,portfolio_url,resume,cover_letter,submitted_at')
+        self.assertEqual(len(lines), 4)
+        # Formula-looking cells are neutralised, quotes escaped
+        self.assertIn(',"\'=HYPERLINK(""http://evil"")",', lines[1])
+        self.assertIn('Django Developer', lines[2])
+
+        records = [json.loads(line) for line in ''.join(export_stream(queryset, 'ndjson')).splitlines()]
+        self.assertEqual([record['name'] for record in records], ['Applicant 0', 'Applicant 1', 'Applicant 2'])
+        self.assertEqual(records[1]['job'], 'Django Developer')
+        self.assertEqual(json.loads(''.join(export_stream(queryset, 'json'))), records)
+        self.assertEqual(json.loads(''.join(export_stream(queryset.none(), 'json'))), [])
+
+    def test_export_is_one_query_regardless_of_size(self):
+        with self.assertNumQueries(1):
+            ''.join(export_stream(CareerApplication.objects.all(), 'csv', chunk_size=2))
+
+    def test_admin_action_streams_selection(self):
+        admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.force_login(admin)
+        selected = CareerApplication.objects.order_by('pk')[:2]
+        response = self.client.post(reverse('admin:QbixSolutions_careerapplication_changelist'), {
+            'action': 'export_ndjson', '_selected_action': [application.pk for application in selected],
+        })
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertIn('attachment; filename="career-applications-', response['Content-Disposition'])
+        body = b''.join(response.streaming_content).decode()
+        self.assertEqual(len(body.splitlines()), 2)
+
+    def test_command_filters_and_writes_file(self):
+        NewsletterSubscriber.objects.create(email='on@example.com')
+        NewsletterSubscriber.objects.create(email='off@example.com', active=False)
+        out = StringIO()
+        call_command('export_submissions', 'newslettersubscriber', '--format', 'ndjson', '--active', stdout=out)
+        self.assertEqual([json.loads(line)['email'] for line in out.getvalue().splitlines()], ['on@example.com'])
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = f'{directory}/applications.csv'
+            call_command('export_submissions', 'careerapplication', '--output', path, '--since', '2000-01-01')
+            with open(path, encoding='utf-8-sig') as fh:
+                self.assertEqual(len(fh.read().splitlines()), 4)
+
+
+class AdminChangelistTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'password'))
+        self.jobs = [
+            JobListing.objects.create(
+                title=f'Job {i}', slug=f'job-{i}', department='Engineering', employment_type='full-time',
+                location='Remote', description='d', requirements='r', responsibilities='r',
+            )
+            for i in range(3)
+        ]
+
+    def add_rows(self, count):
+        start = CareerApplication.objects.count()
+        for i in range(start, start + count):
+            job = self.jobs[i % len(self.jobs)]
+            CareerApplication.objects.create(
+                job=job, name=f'Applicant {i}', email=f'a{i}@example.com', phone='1234567890',
+                cover_letter='c', resume='resumes/cv.pdf',
+            )
+            ContactSubmission.objects.create(
+                name=f'Contact {i}', email=f'c{i}@example.com', phone='1234567890', service='Consulting', message='m',
+            )
+            NewsletterSubscriber.objects.create(email=f's{i}@example.com')
+
+    def changelist_queries(self, model, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse(f'admin:QbixSolutions_{model}_changelist'), params)
+        self.assertEqual(response.status_code, 200)
+        return response, [query['sql'] for query in queries.captured_queries]
+
+    def test_queries_do_not_grow_with_rows(self):
+        models = ['careerapplication', 'contactsubmission', 'newslettersubscriber']
+        self.add_rows(2)
+        before = {model: len(self.changelist_queries(model)[1]) for model in models}
+        self.add_rows(30)
+        after = {model: len(self.changelist_queries(model)[1]) for model in models}
+        self.assertEqual(after, before)
+
+    def test_large_unfiltered_table_is_estimated(self):
+        self.add_rows(5)
+        with mock.patch.object(pagination, 'ESTIMATE_THRESHOLD', 3):
+            response, queries = self.changelist_queries('careerapplication')
+            self.assertFalse([sql for sql in queries if 'COUNT(' in sql.upper()])
+            self.assertGreaterEqual(response.context['cl'].result_count, 5)
+            # A search is counted exactly
+            response, queries = self.changelist_queries('careerapplication', q='a1')
+        self.assertEqual(response.context['cl'].result_count, 1)
+
+    def test_search_is_email_prefix(self):
+        self.add_rows(12)
+        response, queries = self.changelist_queries('contactsubmission', q=' C1')
+        self.assertEqual(
+            sorted(row.email for row in response.context['cl'].result_list),
+            ['c10@example.com', 'c11@example.com', 'c1@example.com'],
+        )
+        # Not a substring match, and the message column is not searched
+        response, queries = self.changelist_queries('contactsubmission', q='example')
+        self.assertEqual(response.context['cl'].result_count, 0)
+
+    def test_forms_store_lower_cased_email(self):
+        form = ContactForm(data={
+            'name': 'Jane', 'email': 'Jane@Example.COM', 'phone': '1234567890', 'service': 'Consulting', 'message': 'm',
+        })
+        self.assertTrue(form.is_valid(), form.errors)
+        self.assertEqual(form.cleaned_data['email'], 'jane@example.com')
+
+        self.client.post(reverse('QbixSolutions:home'), {
+            'consultation_submit': '1', 'name': 'Jo', 'email': 'Jo@Example.COM',
+            'phone': '1234567890', 'service': 'Consulting', 'message': 'm',
+        })
+        self.assertEqual(ContactSubmission.objects.get(name='Jo').email, 'jo@example.com')
+
+
+class SubscriberImportTests(TestCase):
+    def setUp(self):
+        NewsletterSubscriber.objects.create(email='active@example.com')
+        NewsletterSubscriber.objects.create(email='gone@example.com', active=False)
+
+    def test_import_counts_and_state(self):
+        emails = [
+            'New@Example.com', ' new@example.com ', 'other@example.com', 'not-an-email', '',
+            'ACTIVE@example.com', 'gone@example.com',
+        ]
+        report = import_subscribers(emails)
+        self.assertEqual(
+            (report.inserted, report.reactivated, report.already_subscribed, report.duplicates, report.invalid),
+            (2, 1, 1, 1, 2),
+        )
+        self.assertEqual(report.skipped, 4)
+        self.assertEqual(
+            dict(NewsletterSubscriber.objects.values_list('email', 'active')),
+            {'active@example.com': True, 'gone@example.com': True, 'new@example.com': True, 'other@example.com': True},
+        )
+
+    def test_two_queries_per_batch(self):
+        emails = [f'reader{i}@example.com' for i in range(6)] + ['gone@example.com']
+        with self.assertNumQueries(8):
+            report = import_subscribers(emails, batch_size=2)
+        self.assertEqual((report.inserted, report.reactivated), (6, 1))
+
+    def test_csv_columns(self):
+        self.assertEqual(list(read_csv_emails(['name,Email', 'Alex,a@example.com', 'Sam'])), ['a@example.com'])
+        self.assertEqual(list(read_csv_emails(['a@example.com', 'b@example.com,x'])), ['a@example.com', 'b@example.com'])
+        self.assertEqual(list(read_csv_emails([])), [])
+
+    def test_command_reports_and_dry_run(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = f'{directory}/list.csv'
+            with open(path, 'w', encoding='utf-8') as fh:
+                fh.write('\ufeffemail\nfirst@example.com\ngone@example.com\n')
+            out = StringIO()
+            call_command('import_subscribers', path, '--dry-run', stdout=out)
+            self.assertIn('1 inserted, 1 reactivated, 0 skipped', out.getvalue())
+            self.assertFalse(NewsletterSubscriber.objects.filter(email='first@example.com').exists())
+            call_command('import_subscribers', path, stdout=StringIO())
+            self.assertTrue(NewsletterSubscriber.objects.filter(email='first@example.com').exists())
+
+    def test_admin_upload(self):
+        admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.force_login(admin)
+        url = reverse('admin:QbixSolutions_newslettersubscriber_import')
+        self.assertContains(self.client.get(reverse('admin:QbixSolutions_newslettersubscriber_changelist')), url)
+        upload = SimpleUploadedFile('list.csv', b'email\nfresh@example.com\nactive@example.com\n')
+        response = self.client.post(url, {'file': upload}, follow=True)
+        self.assertContains(response, '1 inserted, 0 reactivated, 1 skipped')
+        self.assertTrue(NewsletterSubscriber.objects.filter(email='fresh@example.com').exists())
+
+        response = self.client.post(url, {'file': SimpleUploadedFile('list.csv', b'\xff\xfe\x00bad')})
+        self.assertFormError(response.context['form'], 'file', "Upload a UTF-8 encoded CSV file.")
+
+    def test_form_normalizes_and_reactivates(self):
+        form = NewsletterForm({'email': 'Gone@Example.com'})
+        self.assertTrue(form.is_valid(), form.errors)
+        subscriber = form.save()
+        self.assertEqual((subscriber.email, subscriber.active), ('gone@example.com', True))
+        self.assertEqual(NewsletterSubscriber.objects.count(), 2)
+        self.assertFalse(NewsletterForm({'email': 'ACTIVE@example.com'}).is_valid())
+
+
+class FlakyEmailBackend(locmem.EmailBackend):
+    """locmem backend whose server refuses some recipients and is down for others"""
+    refused = set()
+    unavailable = set()
+
+    def send_messages(self, messages):
+        for message in messages:
+            if set(message.to) & self.refused:
+                raise smtplib.SMTPRecipientsRefused({message.to[0]: (550, b'No such user')})
+            if set(message.to) & self.unavailable:
+                raise smtplib.SMTPResponseException(451, b'Try again later')
+        return super().send_messages(messages)
+
+
+@override_settings(NEWSLETTER_SEND_RATE=0, SITE_URL='https://example.com')
+class CampaignTests(TestCase):
+    def setUp(self):
+        self.subscribers = [NewsletterSubscriber.objects.create(email=f'reader{i}@example.com') for i in range(7)]
+        NewsletterSubscriber.objects.create(email='gone@example.com', active=False)
+        self.post = BlogPost.objects.create(
+            title='Scaling Django', slug='scaling-django', excerpt='How we cut response times.',
+            content='Body', author='Author', category='Engineering',
+        )
+        self.campaign = Campaign.objects.create(blog_post=self.post, body='Our latest article:')
+
+    def tearDown(self):
+        FlakyEmailBackend.refused = set()
+        FlakyEmailBackend.unavailable = set()
+
+    def test_sends_once_to_each_active_subscriber(self):
+        with mock.patch('QbixSolutions.campaigns.render_to_string', wraps=render_to_string) as render:
+            report = send_campaign(self.campaign.pk, batch_size=3, concurrency=3)
+        self.assertEqual(render.call_count, 1)
+        self.assertEqual((report.sent, report.failed, report.skipped), (7, 0, 0))
+        self.assertEqual(sorted(m.to[0] for m in mail.outbox), sorted(s.email for s in self.subscribers))
+
+        message = next(m for m in mail.outbox if m.to == ['reader0@example.com'])
+        url = 'https://example.com' + reverse(
+            'QbixSolutions:newsletter_unsubscribe', args=[unsubscribe_token(self.subscribers[0].pk)],
+        )
+        self.assertEqual(message.subject, 'Scaling Django')
+        self.assertIn('Our latest article:', message.body)
+        self.assertIn('https://example.com/blog/scaling-django/', message.body)
+        self.assertIn(f'Unsubscribe: {url}', message.body)
+        self.assertEqual(message.extra_headers['List-Unsubscribe'], f'<{url}>')
+
+        self.campaign.refresh_from_db()
+        self.assertEqual(self.campaign.status, Campaign.SENT)
+        self.assertEqual(self.campaign.locked_by, '')
+        self.assertEqual(self.campaign.cursor, self.subscribers[-1].pk)
+        self.assertEqual(CampaignDelivery.objects.filter(campaign=self.campaign, status=CampaignDelivery.SENT).count(), 7)
+        self.assertIsNone(send_campaign(self.campaign.pk))
+        self.assertEqual(len(mail.outbox), 7)
+
+    @override_settings(EMAIL_BACKEND='QbixSolutions.tests.FlakyEmailBackend')
+    def test_interrupted_send_resumes_without_duplicates(self):
+        FlakyEmailBackend.refused = {'reader1@example.com'}
+        FlakyEmailBackend.unavailable = {'reader4@example.com'}
+        with self.assertRaises(smtplib.SMTPResponseException):
+            send_campaign(self.campaign.pk, batch_size=3, concurrency=1)
+        self.campaign.refresh_from_db()
+        self.assertEqual((self.campaign.status, self.campaign.locked_by), (Campaign.SENDING, ''))
+        self.assertEqual(self.campaign.cursor, self.subscribers[2].pk)
+        delivered = {m.to[0] for m in mail.outbox}
+        self.assertEqual(
+            set(CampaignDelivery.objects.filter(status=CampaignDelivery.SENT).values_list('subscriber__email', flat=True)),
+            delivered,
+        )
+
+        # Messages sent after the last completed batch; the resumed send skips them by their rows
+        past_cursor = CampaignDelivery.objects.filter(subscriber_id__gt=self.campaign.cursor).count()
+        self.assertGreaterEqual(past_cursor, 1)
+
+        FlakyEmailBackend.unavailable = set()
+        report = send_campaign(self.campaign.pk, batch_size=3)
+        self.assertEqual(report.skipped, past_cursor)
+        recipients = [m.to[0] for m in mail.outbox]
+        self.assertEqual(len(recipients), len(set(recipients)))
+        self.assertEqual(len(recipients), 6)
+        failed = CampaignDelivery.objects.get(status=CampaignDelivery.FAILED)
+        self.assertEqual(failed.subscriber.email, 'reader1@example.com')
+        self.assertIn('550', failed.error)
+
+    def test_live_sender_keeps_the_campaign(self):
+        Campaign.objects.filter(pk=self.campaign.pk).update(
+            status=Campaign.SENDING, locked_by='other', heartbeat_at=timezone.now(),
+        )
+        self.assertIsNone(send_campaign(self.campaign.pk))
+        self.assertEqual(mail.outbox, [])
+
+        Campaign.objects.filter(pk=self.campaign.pk).update(heartbeat_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(send_campaign(self.campaign.pk).sent, 7)
+
+    def test_job_retries_while_another_sender_holds_the_campaign(self):
+        Campaign.objects.filter(pk=self.campaign.pk).update(
+            status=Campaign.SENDING, locked_by='other', heartbeat_at=timezone.now(),
+        )
+        job = jobs.enqueue(tasks.SEND_CAMPAIGN, {'campaign_id': self.campaign.pk}, max_attempts=10)
+        with self.assertLogs('QbixSolutions.jobs', 'WARNING'):
+            jobs.run_pending()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.QUEUED)
+        self.assertIn('CampaignBusy', job.last_error)
+
+    @mock.patch('QbixSolutions.campaigns.HEARTBEAT_INTERVAL', -1)
+    def test_long_send_is_not_requeued_as_stale(self):
+        job = jobs.enqueue(tasks.SEND_CAMPAIGN, {'campaign_id': self.campaign.pk}, max_attempts=10)
+        [job] = jobs.claim('worker')
+        # Claimed longer ago than the queue's STALE_AFTER
+        Job.objects.filter(pk=job.pk).update(locked_at=timezone.now() - timedelta(hours=1))
+
+        requeued = []
+        create = CampaignDelivery.objects.create
+
+        def create_delivery(**fields):
+            # The worker's housekeeping runs while the send is in flight
+            requeued.append(jobs.requeue_stale())
+            return create(**fields)
+
+        with mock.patch.object(CampaignDelivery.objects, 'create', side_effect=create_delivery):
+            self.assertTrue(jobs.run(job))
+        self.assertEqual(requeued, [0] * 7)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.DONE)
+        self.assertEqual(len(mail.outbox), 7)
+
+    def test_rate_limiter(self):
+        clock, waits = [0.0], []
+        limiter = RateLimiter(2, clock=lambda: clock[0], sleep=waits.append)
+        for _ in range(3):
+            limiter.acquire()
+        self.assertEqual(waits, [0.5, 1.0])
+        clock[0] = 10.0
+        limiter.acquire()
+        self.assertEqual(waits, [0.5, 1.0])
+
+    def test_unsubscribe(self):
+        subscriber = self.subscribers[0]
+        url = reverse('QbixSolutions:newsletter_unsubscribe', args=[unsubscribe_token(subscriber.pk)])
+        self.assertContains(self.client.get(url), 'Unsubscribe</button>')
+        subscriber.refresh_from_db()
+        self.assertTrue(subscriber.active)
+
+        # One-click unsubscribe comes from the mail provider, without a CSRF token
+        response = Client(enforce_csrf_checks=True).post(url, {'List-Unsubscribe': 'One-Click'})
+        self.assertContains(response, 'You have been unsubscribed')
+        subscriber.refresh_from_db()
+        self.assertFalse(subscriber.active)
+
+        bad = reverse('QbixSolutions:newsletter_unsubscribe', args=[f'{subscriber.pk}:forged'])
+        self.assertEqual(self.client.post(bad).status_code, 404)
+
+    def test_admin_action_queues_a_job(self):
+        admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.force_login(admin)
+        response = self.client.post(reverse('admin:QbixSolutions_campaign_changelist'), {
+            'action': 'send_campaigns', '_selected_action': [self.campaign.pk],
+        }, follow=True)
+        self.assertContains(response, '1 campaign(s) queued')
+        self.assertEqual(Job.objects.get().name, tasks.SEND_CAMPAIGN)
+        jobs.run_pending()
+        self.assertEqual(len(mail.outbox), 7)
+        response = self.client.get(reverse('admin:QbixSolutions_campaign_changelist'))
+        self.assertContains(response, '<td class="field-sent_count">7</td>', html=True)
+
+    def test_command(self):
+        out = StringIO()
+        call_command('send_campaign', str(self.campaign.pk), '--concurrency', '1', stdout=out)
+        self.assertIn('7 sent, 0 failed', out.getvalue())
+
+
+class StaticAssetTests(TestCase):
+    def setUp(self):
+        page_critical_css.cache_clear()
+        self.addCleanup(page_critical_css.cache_clear)
+
+    def test_minify_css(self):
+        css = """
+        /* Header */
+        .nav a :hover , .nav > li { color : red ; margin: calc(1px + 2px); }
+        @media screen and (max-width: 600px) { .x { content: '  a ; b  ' ; } }
+        """
+        self.assertEqual(
+            minify_css(css),
+            ".nav a :hover,.nav>li{color :red;margin:calc(1px + 2px)}"
+            "@media screen and (max-width:600px){.x{content:'  a ; b  '}}",
+        )
+
+    def test_minify_js(self):
+        js = """
+        // Comment with a 'quote
+        const url = 'http://example.com/a  b'; /* block */
+        let n = a - -b, m = x / 2 / y;
+        const re = /\/\/[a/]+/g;
+        const t = `line one
+            ${ {a: 1}.a }`;
+        return value
+        ++count
+        if (ok) {
+            run();
+        }
+        """
+        self.assertEqual(
+            minify_js(js),
+            "const url='http://example.com/a  b';let n=a- -b,m=x/2/y;const re=/\\/\\/[a/]+/g;"
+            "const t=`line one\n            ${ {a: 1}.a }`;return value\n++count\nif(ok){run();}",
+        )
+
+    def test_critical_css(self):
+        css = minify_css("""
+        :root { --blue: #00f; }
+        body { margin: 0; }
+        .hero .title { animation: fade-in 1s; background: url(../images/hero.png); }
+        .footer { color: gray; }
+        .hero:hover, .card { color: red; }
+        @media (min-width: 768px) { .hero { padding: 2rem; } .card { padding: 1rem; } }
+        @keyframes fade-in { from { opacity: 0; } }
+        @keyframes spin { to { transform: rotate(1turn); } }
+        """)
+        html = '<body><section class="hero {% if x %}dark{% endif %}"><h1 class="title">{{ t }}</h1></section>'
+        self.assertEqual(
+            critical_css(css, html, '/static/css/'),
+            ':root{--blue:#00f}body{margin:0}'
+            '.hero .title{animation:fade-in 1s;background:url(/static/images/hero.png)}'
+            '.hero:hover{color:red}@media (min-width:768px){.hero{padding:2rem}}'
+            '@keyframes fade-in{from{opacity:0}}',
+        )
+
+    def test_templates_have_no_inline_styles(self):
+        for name, source in page_templates().items():
+            self.assertNotIn('<style', source, name)
+
+    def test_plain_links_before_collectstatic(self):
+        response = self.client.get(reverse('QbixSolutions:blog'))
+        self.assertContains(response, '<link rel="stylesheet" href="/static/css/style.css">', html=True)
+        self.assertContains(response, '<link rel="stylesheet" href="/static/css/blog.css">', html=True)
+        self.assertNotContains(response, '<style>')
+
+    def test_collectstatic_build(self):
+        static_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, static_root)
+        with override_settings(STATIC_ROOT=static_root, CACHES=LOCMEM_CACHE):
+            call_command('collectstatic', interactive=False, verbosity=0)
+            with open(f'{static_root}/staticfiles.json') as fh:
+                manifest = json.load(fh)['paths']
+            hashed = manifest['css/style.css']
+            self.assertRegex(hashed, r'^css/style\.[0-9a-f]{12}\.css$')
+            with open(f'{static_root}/{hashed}', encoding='utf-8') as fh:
+                minified = fh.read()
+            self.assertNotIn('/*', minified)
+            self.assertNotIn('\n', minified)
+            with open(f'{static_root}/critical/blog.css', encoding='utf-8') as fh:
+                critical = fh.read()
+            self.assertIn('.header{', critical)
+            self.assertLess(len(critical), len(minified) / 3)
+
+            client = Client()
+            response = client.get(reverse('QbixSolutions:blog'))
+            self.assertContains(response, f'<style>{critical}</style>')
+            self.assertContains(response, f'<link rel="preload" href="/static/{hashed}" as="style"')
+            self.assertContains(response, f'<noscript><link rel="stylesheet" href="/static/{hashed}"></noscript>')
+
+            response = client.get(f'/static/{hashed}')
+            self.assertEqual(response.status_code, 200)
+            self.assertIn('immutable', response['Cache-Control'])
+            response.close()
+
+
+class FontBuildTests(TestCase):
+    CATALOG = {
+        'code': ('code', 0xf121, ['solid']),
+        'mobile-screen-button': ('mobile-screen-button', 0xf3cd, ['solid']),
+        'mobile-alt': ('mobile-screen-button', 0xf3cd, ['solid']),
+        'github': ('github', 0xf09b, ['brands']),
+        'star': ('star', 0xf005, ['solid', 'regular']),
+    }
+
+    def test_used_icons(self):
+        icons = fonts.used_icons([
+            '<i class="fas fa-code fa-2x"></i> <i class="far fa-star"></i>',
+            "button.innerHTML = '<i class=\"fab fa-github fa-spin\"></i>';",
+            'fa-solid fa-mobile-alt',
+            '<i class="far fa-code"></i>',
+        ], self.CATALOG)
+        self.assertEqual(icons.icons, {
+            'solid': {'code': 0xf121, 'mobile-alt': 0xf3cd},
+            'regular': {'star': 0xf005},
+            'brands': {'github': 0xf09b},
+        })
+        self.assertEqual(icons.unknown, {'fa-code (regular)'})
+
+    def test_stylesheet_keeps_only_used_glyphs(self):
+        directory = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, directory)
+        (directory / 'css').mkdir()
+        (directory / 'css' / 'fontawesome.css').write_text(
+            '.fa { display: inline-block; }\n.fa-spin { animation: fa-spin 2s; }\n'
+            '.fa-code::before { content: "\\f121"; }\n.fa-dragon::before { content: "\\f6d5"; }\n'
+        )
+        (directory / 'css' / 'brands.css').write_text(
+            ':root { --fa-font-brands: normal 400 1em/1 "Font Awesome 6 Brands"; }\n'
+            '@font-face { font-family: "Font Awesome 6 Brands"; src: url("../webfonts/fa-brands-400.woff2"); }\n'
+            '.fa-github:before { content: "\\f09b"; }\n.fa-gitlab:before { content: "\\f296"; }\n'
+        )
+        icons = fonts.used_icons(['"fas fa-code"', '"fab fa-github"'], {
+            'code': ('code', 0xf121, ['solid']), 'github': ('github', 0xf09b, ['brands']),
+        })
+        css = fonts.stylesheet(directory, icons, with_inter=False)
+        for expected in ['.fa{display:inline-block}', '.fa-spin{', '.fa-code::before', '.fa-github:before',
+                         'src:url("../fonts/fa-solid-900.woff2")', 'src:url("../fonts/fa-brands-400.woff2")']:
+            self.assertIn(expected, css)
+        for unexpected in ['dragon', 'gitlab', 'webfonts', 'fa-regular-400', 'Inter']:
+            self.assertNotIn(unexpected, css)
+        css = fonts.stylesheet(directory, icons, with_inter=True)
+        self.assertIn('font-family:"Inter";font-style:normal;font-weight:300 800;font-display:swap', css)
+
+    def test_rewrite_head(self):
+        source = f'<head>\n    {fonts.BEGIN_MARKER}\n    <link href="old">\n    {fonts.END_MARKER}\n</head>'
+        icons = fonts.IconSet()
+        icons.icons['solid']['code'] = 0xf121
+        head = fonts.rewrite_head(source, fonts.head_links(icons, with_inter=True))
+        self.assertNotIn('old', head)
+        self.assertNotIn('googleapis', head)
+        self.assertIn("{% static 'fonts/inter-latin.woff2' %}", head)
+        self.assertIn("{% static 'fonts/fa-solid-900.woff2' %}", head)
+        self.assertIn("{% stylesheet 'css/fonts.css' %}", head)
+        self.assertNotIn('inter', fonts.head_links(icons, with_inter=False))
+
+    def test_built_inter_is_self_hosted(self):
+        static = fonts.static_directory()
+        inter = static / fonts.INTER_FILE
+        self.assertEqual(inter.read_bytes()[:4], b'wOF2')
+        self.assertIn('src:url("../fonts/inter-latin.woff2")', (static / fonts.CSS_FILE).read_text(encoding='utf-8'))
+        base = (Path(static).parent / 'templates' / 'base.html').read_text(encoding='utf-8')
+        for third_party in ['fonts.googleapis.com', 'fonts.gstatic.com']:
+            self.assertNotIn(third_party, base)
+
+    def test_inter_subset(self):
+        try:
+            from fontTools.ttLib import TTFont
+        except ImportError:
+            self.skipTest("fontTools not installed (requirements-build.txt)")
+        font = TTFont(fonts.static_directory() / fonts.INTER_FILE)
+        self.assertEqual(font['name'].getDebugName(1), 'Inter')
+        self.assertEqual([(axis.axisTag, axis.minValue, axis.maxValue) for axis in font['fvar'].axes], [('wght', 300, 800)])
+        cmap = font.getBestCmap()
+        self.assertTrue(all(codepoint in cmap for codepoint in range(0x20, 0x7f)))
+        self.assertIn(ord('€'), cmap)
+        self.assertNotIn(ord('Ж'), cmap)
+
+    def test_built_fonts_cover_templates_and_scripts(self):
+        app = Path(fonts.static_directory()).parent
+        sources = list((app / 'templates').rglob('*.html')) + list((app / 'static').rglob('*.js'))
+        for path in sources:
+            self.assertEqual(fonts.missing_icons(path.read_text(encoding='utf-8')), [], path.name)
+        self.assertNotIn('cdnjs.cloudflare.com', (app / 'templates' / 'base.html').read_text(encoding='utf-8'))
+
+    def test_service_admin_warns_about_missing_icons(self):
+        admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.force_login(admin)
+        data = {
+            'title': 'Dragons', 'slug': 'dragons', 'icon': 'fas fa-dragon', 'short_description': 'Short',
+            'full_description': 'Full', 'features': 'Fire', 'order': 0,
+        }
+        response = self.client.post(reverse('admin:QbixSolutions_service_add'), data, follow=True)
+        self.assertContains(response, 'fa-dragon is not in the site&#x27;s icon font')
+        data.update(title='Code', slug='code', icon='fas fa-code')
+        response = self.client.post(reverse('admin:QbixSolutions_service_add'), data, follow=True)
+        self.assertNotContains(response, 'icon font')
+
+
+def _csrf_token(content):
+    return re.search(rb'name="csrfmiddlewaretoken" value="([^"]+)"', content).group(1)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class CompressionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        create_content()
+
+    def test_minify_html(self):
+        html = (
+            b'<!DOCTYPE html>\n<html>\n  <head>\n    <!-- note -->\n'
+            b'    <script type="application/ld+json">\n    { "name": "Qbix",\n      "x": "</b>" }\n    </script>\n'
+            b'    <script>\n  var a  =  1;\n</script>\n  </head>\n  <body>\n'
+            b'    <p class="a  b"\n       id="c">Hello   <b>big</b>  <i class="fas fa-code"></i>\n'
+            b'       world<!-- gone --> again</p>\n'
+            b'    <pre>  keep\n   this </pre>\n    <label>Note</label> <textarea> a\n  b</textarea>\n'
+            b'  </body>\n</html>\n'
+        )
+        self.assertEqual(minify_html(html), (
+            b'<!DOCTYPE html><html><head>'
+            b'<script type="application/ld+json">{"name":"Qbix","x":"<\\/b>"}</script>'
+            b'<script>\n  var a  =  1;\n</script></head><body>'
+            b'<p class="a  b"\n       id="c">Hello <b>big</b> <i class="fas fa-code"></i> world again</p>'
+            b'<pre>  keep\n   this </pre><label>Note</label> <textarea> a\n  b</textarea></body></html>'
+        ))
+
+    def test_negotiates_encoding(self):
+        url = reverse('QbixSolutions:contact')  # never page-cached
+        identity = self.client.get(url)
+        self.assertFalse(identity.has_header('Content-Encoding'))
+        self.assertNotIn(b'>\n    <', identity.content)
+        self.assertEqual(int(identity['Content-Length']), len(identity.content))
+
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip, deflate, br')
+        self.assertEqual(response['Content-Encoding'], 'br' if compression.brotli else 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(int(response['Content-Length']), len(response.content))
+
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='br;q=0, gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn(b'Contact', gzip.decompress(response.content))
+
+    def test_cached_page_is_compressed_once(self):
+        url = reverse('QbixSolutions:about')
+        Client().get(url, HTTP_ACCEPT_ENCODING='gzip')
+
+        contents = []
+        with mock.patch.object(compression, 'compress', side_effect=AssertionError('compressed per request')), \
+                self.assertNumQueries(0):
+            for _ in range(2):
+                response = Client(enforce_csrf_checks=True).get(url, HTTP_ACCEPT_ENCODING='gzip, br')
+                self.assertEqual(response['Content-Encoding'], 'gzip')
+                self.assertTrue(response['ETag'].startswith('W/'))
+                contents.append(gzip.decompress(response.content))
+
+        # Each visitor still gets a token of their own, spliced into the stored bytes
+        tokens = [_csrf_token(content) for content in contents]
+        self.assertNotEqual(tokens[0], tokens[1])
+        self.assertNotIn(CSRF_PLACEHOLDER, contents[0])
+        self.assertEqual(contents[0].replace(tokens[0], b''), contents[1].replace(tokens[1], b''))
+        identity = Client().get(url).content
+        self.assertEqual(identity.replace(_csrf_token(identity), b''), contents[0].replace(tokens[0], b''))
+
+    def test_compressed_page_round_trips(self):
+        content = b'<p>' + b'Hello world. ' * 500 + b'<input value="@@"> ' + b'Hello world. ' * 500 + b'@@</p>'
+        page = CompressedPage(content, b'@@', secret_length=8)
+        for value in (b'12345678', b'short'):
+            self.assertEqual(gzip.decompress(page.encoded('gzip', value)), content.replace(b'@@', value))
+        page = CompressedPage(content)
+        self.assertEqual(gzip.decompress(page.encoded('gzip')), content)
+        if compression.brotli:
+            self.assertEqual(compression.brotli.decompress(page.encoded('br')), content)
+
+
+SMALL_SEED = {
+    'services': 3, 'portfolio': 4, 'posts': 5, 'testimonials': 2, 'team': 2, 'jobs': 2,
+    'submissions': 10, 'applications': 4, 'subscribers': 10,
+}
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class BenchmarkTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.directory = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def seed(self):
+        call_command('seed_benchmark_data', *[f'--{name}={count}' for name, count in SMALL_SEED.items()], stdout=StringIO())
+
+    def test_seed_and_clear(self):
+        self.seed()
+        self.assertEqual(BlogPost.objects.count(), 5)
+        self.assertEqual(CareerApplication.objects.count(), 4)
+        self.assertEqual(SearchDocument.objects.count(), 3 + 4 + 5)
+        self.assertTrue(Portfolio.objects.get(slug='bench-project-0').technology_tags.exists())
+        self.assertTrue(BlogPost.objects.exclude(related_ids=[]).exists())
+
+        create_content()
+        call_command('seed_benchmark_data', '--clear', stdout=StringIO())
+        self.assertEqual(list(BlogPost.objects.values_list('slug', flat=True)), ['hello'])
+        self.assertFalse(NewsletterSubscriber.objects.exists())
+
+    def test_benchmark_views_covers_every_route(self):
+        self.seed()
+        cache.set('site-entry', 1)
+        output = self.directory / 'views.json'
+        call_command('benchmark_views', '--repeat=1', f'--output={output}', stdout=StringIO())
+        # The benchmark clears a cache of its own, not the site's
+        self.assertEqual(cache.get('site-entry'), 1)
+        results = benchmarks.read_results(output)['results']
+        self.assertEqual(set(results), {pattern.name for pattern in urls.urlpatterns})
+        for name in ('home', 'about', 'portfolio', 'blog_detail', 'careers'):
+            self.assertEqual(results[name]['status'], 200)
+            self.assertGreater(results[name]['bytes'], 0)
+            # Served from the page cache once filled
+            self.assertEqual(results[name]['warm_queries'], 0)
+
+    def test_compare_fails_on_regression(self):
+        baseline = benchmarks.results_document('views', {
+            'home': {'status': 200, 'queries': 4, 'cold_ms': 20.0, 'warm_ms': 1.0, 'bytes': 100},
+        })
+        paths = [self.directory / name for name in ('baseline.json', 'same.json', 'slower.json', 'queries.json')]
+        variants = [{}, {'cold_ms': 23.0, 'warm_ms': 1.8, 'bytes': 500}, {'cold_ms': 30.0}, {'queries': 5}]
+        for path, changes in zip(paths, variants):
+            document = json.loads(json.dumps(baseline))
+            document['results']['home'].update(changes)
+            benchmarks.write_results(path, document)
+
+        out = StringIO()
+        call_command('compare_benchmarks', paths[0], paths[1], stdout=out)
+        self.assertIn('No regressions', out.getvalue())
+        for path, metric in ((paths[2], 'cold_ms'), (paths[3], 'queries')):
+            out = StringIO()
+            with self.assertRaises(CommandError):
+                call_command('compare_benchmarks', paths[0], path, stdout=out)
+            self.assertIn(metric, out.getvalue())
+
+
+class LoadTestTests(LiveServerTestCase):
+    def test_run_load_reports_percentiles(self):
+        create_content()
+        paths = {'home': reverse('QbixSolutions:home'), 'missing': '/blog/missing/'}
+        results, overall = benchmarks.run_load(self.live_server_url, paths, concurrency=2, duration=0.5)
+        self.assertGreater(results['home']['requests'], 0)
+        self.assertEqual(results['home']['errors'], 0)
+        self.assertEqual(results['missing']['errors'], results['missing']['requests'])
+        self.assertLessEqual(overall['p50_ms'], overall['p95_ms'])
+        self.assertLessEqual(overall['p95_ms'], overall['p99_ms'])
+        self.assertEqual(overall['requests'], results['home']['requests'] + results['missing']['requests'])
+
+
+class FileBasedFragmentCacheTests(TestCase):
+    def test_versions_survive_on_file_backend(self):
+        with tempfile.TemporaryDirectory() as location:
+            file_cache = {
+                'default': {
+                    'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                    'LOCATION': location,
+                }
+            }
+            with override_settings(CACHES=file_cache):
+                create_content()
+                first = get_versions()
+                self.assertEqual(first, get_versions())
+                Service.objects.get().save()
+                self.assertNotEqual(first['service'], get_versions()['service'])
+
+    def test_culling_pages_keeps_version_counters(self):
+        with tempfile.TemporaryDirectory() as location:
+            file_cache = {
+                # As in settings, but full after a few entries and culled completely
+                'default': {
+                    'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                    'LOCATION': location,
+                    'OPTIONS': {'MAX_ENTRIES': 5, 'CULL_FREQUENCY': 1},
+                },
+                'versions': {
+                    'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                    'LOCATION': str(Path(location) / 'versions'),
+                },
+            }
+            with override_settings(CACHES=file_cache):
+                versions = get_versions()
+                for i in range(20):
+                    cache.set(f'page-{i}', 'html')
+                self.assertLess(len(list(Path(location).glob('*.djcache'))), 10)
+                self.assertEqual(versions, get_versions())
+
+
+@contextmanager
+def sqlite_file_database(path):
+    """
+    Point the default SQLite alias at a migrated database file at ``path``,
+    so that connections from other threads are independent writers (the
+    in-memory test database is one shared connection).
+    """
+    settings_dict = connection.settings_dict
+    original, memory = settings_dict['NAME'], connection.connection
+    connection.connection = None
+    settings_dict['NAME'] = str(path)
+    try:
+        call_command('migrate', verbosity=0)
+        yield
+    finally:
+        connection.close()
+        settings_dict['NAME'] = original
+        connection.connection = memory
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class SQLiteConcurrencyTests(TransactionTestCase):
+    def setUp(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest("SQLite only")
+
+    def test_concurrent_contact_posts_never_lock(self):
+        threads, posts = 8, 10
+        errors, lock = [], threading.Lock()
+
+        def submit(n):
+            client = Client()
+            try:
+                for i in range(posts):
+                    try:
+                        response = client.post(reverse('QbixSolutions:contact'), {
+                            'name': f'Visitor {n}', 'email': f'v{n}-{i}@example.com', 'phone': '1234567890',
+                            'service': 'Consulting', 'message': 'Hello',
+                        })
+                        failed = response.status_code != 302 and response.status_code
+                    except Exception as exc:
+                        failed = repr(exc)
+                    if failed:
+                        with lock:
+                            errors.append(failed)
+            finally:
+                connections.close_all()
+
+        with tempfile.TemporaryDirectory() as directory, sqlite_file_database(Path(directory) / 'db.sqlite3'):
+            with connection.cursor() as cursor:
+                cursor.execute('PRAGMA journal_mode')
+                self.assertEqual(cursor.fetchone()[0], 'wal')
+            workers = [threading.Thread(target=submit, args=(n,)) for n in range(threads)]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+            self.assertEqual(errors, [])
+            self.assertEqual(ContactSubmission.objects.count(), threads * posts)
+            self.assertEqual(Job.objects.filter(name=tasks.NOTIFY_CONTACT_SUBMISSION).count(), threads * posts)
+
+
+@contextmanager
+def sqlite_replica(alias, path):
+    """Register ``alias`` as a second SQLite database at ``path``, migrated"""
+    connections.settings[alias] = {**connection.settings_dict, 'NAME': str(path)}
+    try:
+        if Path(path).parent.exists():
+            call_command('migrate', database=alias, verbosity=0)
+        yield
+    finally:
+        connections[alias].close()
+        del connections[alias]
+        del connections.settings[alias]
+
+
+def add_service(title, using='default'):
+    Service(
+        title=title, slug=title.lower().replace(' ', '-'), icon='fas fa-code',
+        short_description='Short', full_description='Full', features='Fast',
+    ).save(using=using)
+
+
+@override_settings(CACHES=LOCMEM_CACHE, READ_REPLICAS=['replica1'])
+class ReplicaRoutingTests(TransactionTestCase):
+    def setUp(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest("SQLite only")
+        cache.clear()
+        # The replica aliases only exist while a test registers them, so they
+        # are allowed here rather than in ``databases``, which must be in settings
+        allowed = type(self).databases
+        type(self).databases = allowed | {'replica1', 'replica2', 'replica3'}
+        self.addCleanup(setattr, type(self), 'databases', allowed)
+
+    def test_content_reads_use_replica_until_client_posts(self):
+        with tempfile.TemporaryDirectory() as directory:
+            directory = Path(directory)
+            with sqlite_file_database(directory / 'primary.sqlite3'), sqlite_replica('replica1', directory / 'replica.sqlite3'):
+                add_service('On primary')
+                add_service('On replica', using='replica1')
+                # Past REPLICA_PIN_SECONDS since those saves
+                cache.clear()
+                # A fresh context: nothing has written in it yet
+                self.assertEqual(contextvars.Context().run(lambda: [s.title for s in Service.objects.all()]), ['On replica'])
+                self.assertEqual(contextvars.Context().run(lambda: ContactSubmission.objects.db), 'default')
+
+                client = Client()
+                self.assertContains(client.get(reverse('QbixSolutions:services')), 'On replica')
+                response = client.post(reverse('QbixSolutions:contact'), {
+                    'name': 'Jane', 'email': 'jane@example.com', 'phone': '1234567890',
+                    'service': 'Consulting', 'message': 'Hello',
+                })
+                self.assertEqual(response.status_code, 302)
+                self.assertEqual(ContactSubmission.objects.using('default').count(), 1)
+                self.assertEqual(ContactSubmission.objects.using('replica1').count(), 0)
+                self.assertIn(PIN_COOKIE, response.cookies)
+
+                # Pinned: sees the primary
+                cache.clear()
+                self.assertContains(client.get(reverse('QbixSolutions:services')), 'On primary')
+                # Once the pin expires, back to the replica
+                client.cookies.pop(PIN_COOKIE)
+                cache.clear()
+                self.assertContains(client.get(reverse('QbixSolutions:services')), 'On replica')
+
+    def test_cache_fills_read_the_primary_just_after_a_change(self):
+        with tempfile.TemporaryDirectory() as directory:
+            directory = Path(directory)
+            with sqlite_file_database(directory / 'primary.sqlite3'), sqlite_replica('replica1', directory / 'replica.sqlite3'):
+                add_service('Lagging', using='replica1')
+                cache.clear()
+                # An edit the replica has not received yet
+                add_service('Edited')
+                client = Client()
+                self.assertContains(client.get(reverse('QbixSolutions:services')), 'Edited')
+                # The page stored under the new version is the fresh one
+                cache.delete('qbix:changed:service')
+                self.assertContains(client.get(reverse('QbixSolutions:services')), 'Edited')
+                # Fills after the window read the replica again
+                cache.clear()
+                self.assertContains(client.get(reverse('QbixSolutions:services')), 'Lagging')
+
+    def test_round_robin_skips_unreachable_replica(self):
+        router = ReplicaRouter()
+        with tempfile.TemporaryDirectory() as directory:
+            directory = Path(directory)
+            with sqlite_replica('replica1', directory / 'one.sqlite3'), \
+                    sqlite_replica('replica2', directory / 'missing' / 'two.sqlite3'), \
+                    sqlite_replica('replica3', directory / 'three.sqlite3'), \
+                    override_settings(READ_REPLICAS=['replica1', 'replica2', 'replica3']):
+                picks = [contextvars.Context().run(router.db_for_read, Service) for _ in range(6)]
+                self.assertEqual(set(picks), {'replica1', 'replica3'})
+                self.assertIn('replica2', router._down)
+                self.assertEqual(contextvars.Context().run(router.db_for_read, Job), 'default')
+                self.assertEqual(router.db_for_write(Service), 'default')
+
+            with sqlite_replica('replica2', directory / 'missing' / 'two.sqlite3'), \
+                    override_settings(READ_REPLICAS=['replica2']):
+                # Every replica down: the primary serves reads
+                self.assertEqual(contextvars.Context().run(router.db_for_read, Service), 'default')
+
+
+@contextmanager
+def async_pages():
+    """Route the public pages to their async variants, as ASYNC_VIEWS=1 does"""
+    with override_settings(ASYNC_VIEWS=True):
+        importlib.reload(urls)
+        clear_url_caches()
+    try:
+        yield
+    finally:
+        importlib.reload(urls)
+        clear_url_caches()
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class AsyncViewTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        create_content()
+        JobListing.objects.create(
+            title='Django Developer', slug='django-developer', department='Engineering',
+            employment_type='full-time', location='Remote', description='d',
+            requirements='r', responsibilities='r',
+        )
+
+    def test_async_pages_match_sync_pages(self):
+        pages = [
+            reverse('QbixSolutions:home'), reverse('QbixSolutions:about'), reverse('QbixSolutions:services'),
+            reverse('QbixSolutions:portfolio'), reverse('QbixSolutions:portfolio') + '?category=E-commerce',
+            reverse('QbixSolutions:portfolio_detail', args=['shop']), reverse('QbixSolutions:blog'),
+            reverse('QbixSolutions:blog_detail', args=['hello']), reverse('QbixSolutions:careers'),
+        ]
+        expected = {}
+        for path in pages:
+            cache.clear()
+            response = Client().get(path)
+            expected[path] = response.content.replace(_csrf_token(response.content), b'')
+
+        with async_pages():
+            self.assertIs(urls.pages, async_views)
+            client = AsyncClient()
+            for path in pages:
+                cache.clear()
+                response = async_to_sync(client.get)(path)
+                self.assertEqual(response.status_code, 200, path)
+                self.assertEqual(response.content.replace(_csrf_token(response.content), b''), expected[path], path)
+                self.assertTrue(response.has_header('ETag'), path)
+            missing = async_to_sync(client.get)(reverse('QbixSolutions:blog_detail', args=['missing']))
+            self.assertEqual(missing.status_code, 404)
+        self.assertIs(urls.pages, views)
+
+    def test_home_queries_only_uncached_sections(self):
+        with async_pages():
+            async_to_sync(AsyncClient().get)(reverse('QbixSolutions:home'))
+        versions, missing = async_views._home_state()
+        self.assertEqual(missing, set())
+        Service.objects.get().save()
+        self.assertEqual(async_views._home_state()[1], {'service'})
+
+    def test_fan_out_runs_queries_at_the_same_time(self):
+        # Each call only gets past the barrier if all three are running at once
+        barrier = threading.Barrier(3, timeout=5)
+
+        def query():
+            count = Service.objects.count()
+            barrier.wait()
+            return count
+
+        self.assertEqual(async_to_sync(async_views.fan_out)(query, query, query), [1, 1, 1])
+
+
+@override_settings(CACHES=LOCMEM_CACHE, RENDER_PROFILING=True)
+class RenderProfilingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        create_content()
+        profiling.profiles.clear()
+
+    def test_server_timing_header(self):
+        response = self.client.get(reverse('QbixSolutions:blog'))
+        entries = [entry.strip() for entry in response['Server-Timing'].split(',')]
+        self.assertTrue(entries[0].startswith('total;dur='))
+        self.assertRegex(entries[1], r'^db;dur=[\d.]+;desc="[1-9]\d* queries"$')
+        self.assertIn('desc="blog.html"', response['Server-Timing'])
+        self.assertIn('desc="content"', response['Server-Timing'])
+
+    def test_records_templates_blocks_and_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('QbixSolutions:blog_detail', args=['hello']))
+        record = profiling.profiles[-1]
+        self.assertEqual(record['view'], 'QbixSolutions:blog_detail')
+        self.assertEqual(record['status'], 200)
+        self.assertEqual(record['queries'], len(queries))
+        self.assertIn('blog_detail.html', record['templates'])
+        self.assertIn('base.html', record['templates'])
+        self.assertIn('content', record['blocks'])
+        # Inclusive: the page's template contains the base it extends
+        self.assertGreaterEqual(record['templates']['blog_detail.html'], record['templates']['base.html'])
+
+    def test_ring_buffer_is_bounded(self):
+        for i in range(profiling.profiles.maxlen + 3):
+            profiling.profiles.append({'view': str(i)})
+        self.assertEqual(len(profiling.profiles), profiling.profiles.maxlen)
+        self.assertEqual(profiling.profiles[0]['view'], '3')
+
+    def test_report_is_staff_only(self):
+        self.client.get(reverse('QbixSolutions:services'))
+        self.client.get(reverse('QbixSolutions:services'))
+        response = self.client.get(reverse('render_profile'))
+        self.assertEqual(response.status_code, 302)
+
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'password'))
+        report = self.client.get(reverse('render_profile'), {'view': 'QbixSolutions:services'}).json()
+        self.assertEqual(report['requests'], 2)
+        self.assertEqual(report['views'][0]['view'], 'QbixSolutions:services')
+        self.assertEqual(report['views'][0]['requests'], 2)
+        self.assertIn('services.html', [row['name'] for row in report['templates']])
+
+    @override_settings(RENDER_PROFILING=False)
+    def test_off_by_default(self):
+        response = Client().get(reverse('QbixSolutions:services'))
+        self.assertFalse(response.has_header('Server-Timing'))
+        self.assertEqual(len(profiling.profiles), 0)
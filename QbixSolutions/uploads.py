@@ -0,0 +1,239 @@
+"""
+Streaming validation and storage of résumé uploads.
+
+Django's default handlers buffer a whole upload (in memory or a temporary
+file) before the form sees it, and saving the model then copies it again into
+MEDIA_ROOT. ResumeUploadHandler instead checks each chunk as it arrives: it
+rejects the file as soon as its first bytes are not a PDF/DOC/DOCX, stops
+reading the request altogether once it passes MAX_RESUME_SIZE, writes accepted
+chunks straight to their final path and hashes them on the way so identical
+résumés can share one file.
+
+Because the file is written before the CSRF check and the form's validation,
+the view calls discard_unsaved() once it is done: whatever no saved
+application kept is deleted.
+"""
+import hashlib
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, StopFutureHandlers, StopUpload
+
+from .models import CareerApplication
+
+
+MAX_RESUME_SIZE = 5 * 1024 * 1024
+
+# Allowance for the other form fields when judging the request's Content-Length
+FORM_OVERHEAD = 64 * 1024
+
+RESUME_FIELD = 'resume'
+
+# Extension -> leading bytes. DOC is an OLE2 compound file and DOCX a ZIP archive.
+SIGNATURES = {
+    'pdf': b'%PDF-',
+    'doc': b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1',
+    'docx': b'PK\x03\x04',
+}
+
+TOO_LARGE = "Resume file size must not exceed 5MB."
+WRONG_TYPE = "Only PDF, DOC, and DOCX files are allowed."
+MISLABELED = "The resume does not look like a valid {} file."
+
+
+def resume_storage():
+    return CareerApplication._meta.get_field(RESUME_FIELD).storage
+
+
+def resume_name(file_name):
+    """Storage name under the field's upload_to for a client-supplied file name"""
+    return CareerApplication._meta.get_field(RESUME_FIELD).generate_filename(None, file_name)
+
+
+def extension(file_name):
+    return os.path.splitext(file_name)[1].lstrip('.').lower()
+
+
+def check_signature(file_name, header):
+    """Return an error message, or None if ``header`` matches the file's extension"""
+    ext = extension(file_name)
+    if ext not in SIGNATURES:
+        return WRONG_TYPE
+    if not header.startswith(SIGNATURES[ext]):
+        return MISLABELED.format(ext.upper())
+    return None
+
+
+class StreamedResume(UploadedFile):
+    """
+    A résumé the handler has already written to storage (``stored_name``).
+
+    ``error`` is set instead when the upload was rejected; nothing is stored then.
+    """
+
+    def __init__(self, file_name, content_type, size, charset, stored_name=None, sha256=None, error=None):
+        super().__init__(None, file_name, content_type, size, charset)
+        self.stored_name = stored_name
+        self.sha256 = sha256
+        self.error = error
+        self._owned = stored_name is not None
+
+    def open(self, mode='rb'):
+        self.file = resume_storage().open(self.stored_name, mode)
+        return self
+
+    def reuse(self, existing_name):
+        """Point at an identical, already stored résumé and delete this copy"""
+        self.discard()
+        self.stored_name = existing_name
+
+    def keep(self):
+        """The file now belongs to a saved application; discard() leaves it alone"""
+        self._owned = False
+
+    def discard(self):
+        """Delete the stored file, e.g. when the rest of the form was invalid"""
+        if self._owned:
+            resume_storage().delete(self.stored_name)
+            self._owned = False
+
+
+class ResumeUploadHandler(FileUploadHandler):
+    """
+    Upload handler for the career application form's ``resume`` field.
+
+    Install it before the request body is read (see views.career_apply), and
+    call discard_unsaved() when the request is done. Other file fields are
+    passed on to the handlers after it.
+    """
+
+    upload = None
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        # Judge a declared-too-large body up front, before a byte is written
+        self.request_too_large = content_length > MAX_RESUME_SIZE + FORM_OVERHEAD
+        self.content_length = content_length
+
+    def new_file(self, field_name, file_name, *args, **kwargs):
+        super().new_file(field_name, file_name, *args, **kwargs)
+        self.active = field_name == RESUME_FIELD
+        if not self.active:
+            return
+        self.error = None
+        self.signature = SIGNATURES.get(extension(file_name), b'')
+        self.header = b''
+        self.hash = hashlib.sha256()
+        self.file = None
+        self.stored_name = None
+        self.upload = None
+        if getattr(self, 'request_too_large', False):
+            self._stop(TOO_LARGE, self.content_length)
+        if extension(file_name) not in SIGNATURES:
+            self.error = WRONG_TYPE
+        raise StopFutureHandlers()
+
+    def receive_data_chunk(self, raw_data, start):
+        if not self.active:
+            return raw_data
+        # Even a rejected file is not read past the limit
+        if start + len(raw_data) > MAX_RESUME_SIZE:
+            self._stop(TOO_LARGE, start + len(raw_data))
+        if self.error:
+            return None
+
+        if len(self.header) < len(self.signature):
+            self.header += raw_data[:len(self.signature) - len(self.header)]
+            if len(self.header) == len(self.signature) and self.header != self.signature:
+                self._reject(MISLABELED.format(extension(self.file_name).upper()))
+                return None
+
+        if self.file is None:
+            self._open()
+        self.hash.update(raw_data)
+        self.file.write(raw_data)
+        return None
+
+    def file_complete(self, file_size):
+        if not self.active:
+            return None
+        if not self.error and self.header != self.signature:
+            # Shorter than its signature
+            self._reject(MISLABELED.format(extension(self.file_name).upper()))
+        if self.error:
+            self.upload = StreamedResume(self.file_name, self.content_type, file_size, self.charset, error=self.error)
+            return self.upload
+
+        if self.file is None:
+            self._open()
+        self._close()
+        self.upload = StreamedResume(
+            self.file_name, self.content_type, file_size, self.charset,
+            stored_name=self.stored_name, sha256=self.hash.hexdigest(),
+        )
+        return self.upload
+
+    def upload_interrupted(self):
+        if getattr(self, 'active', False) and not self.error:
+            self._reject(None)
+
+    def discard_unsaved(self):
+        """Delete the résumé unless a saved application kept it (StreamedResume.keep())"""
+        if getattr(self, 'file', None) is not None and self.upload is None:
+            # The body was cut off mid-file: file_complete() never ran
+            self._reject(None)
+        if self.upload is not None:
+            self.upload.discard()
+
+    def _open(self):
+        storage = resume_storage()
+        name = resume_name(self.file_name)
+        try:
+            storage.path(name)
+        except NotImplementedError:
+            # Remote storage: stream to a spooled file and upload it on completion
+            self.file = tempfile.SpooledTemporaryFile(max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE)
+            self.stored_name = name
+            self.remote = True
+            return
+        self.remote = False
+        os.makedirs(os.path.dirname(storage.path(name)), exist_ok=True)
+        while True:
+            name = storage.get_available_name(name)
+            try:
+                # O_EXCL: another request may have claimed the same name meanwhile
+                fd = os.open(storage.path(name), os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0), 0o666)
+            except FileExistsError:
+                continue
+            break
+        if settings.FILE_UPLOAD_PERMISSIONS is not None:
+            os.chmod(storage.path(name), settings.FILE_UPLOAD_PERMISSIONS)
+        self.file = os.fdopen(fd, 'wb')
+        self.stored_name = name
+
+    def _close(self):
+        if self.remote:
+            self.file.seek(0)
+            self.stored_name = resume_storage().save(self.stored_name, File(self.file))
+        self.file.close()
+
+    def _stop(self, error, size):
+        """Reject the résumé and stop reading the request body, leaving the rest unread"""
+        self._reject(error)
+        # Stands in for the file the parser will not return, so the form can say
+        # why; ``size`` is as much as is known, at least past the limit
+        self.upload = StreamedResume(self.file_name, self.content_type, size, self.charset, error=error)
+        # MultiPartParser closes every handler's ``file`` when an upload stops
+        del self.file
+        raise StopUpload(connection_reset=True)
+
+    def _reject(self, error):
+        self.error = error
+        if self.file is not None:
+            self.file.close()
+            if not self.remote:
+                resume_storage().delete(self.stored_name)
+            self.file = None
+            self.stored_name = None
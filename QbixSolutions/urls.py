@@ -1,19 +1,25 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import async_views, views
 
 app_name = 'QbixSolutions'
 
+# Under ASGI the read-only pages use their async variants (ASYNC_VIEWS)
+pages = async_views if getattr(settings, 'ASYNC_VIEWS', False) else views
+
 urlpatterns = [
-    path('', views.home, name='home'),
-    path('about/', views.about, name='about'),
-    path('services/', views.services, name='services'),
-    path('services/<slug:slug>/', views.service_detail, name='service_detail'),
-    path('portfolio/', views.portfolio, name='portfolio'),
-    path('portfolio/<slug:slug>/', views.portfolio_detail, name='portfolio_detail'),
-    path('blog/', views.blog, name='blog'),
-    path('blog/<slug:slug>/', views.blog_detail, name='blog_detail'),
-    path('careers/', views.careers, name='careers'),
+    path('', pages.home, name='home'),
+    path('about/', pages.about, name='about'),
+    path('services/', pages.services, name='services'),
+    path('services/<slug:slug>/', pages.service_detail, name='service_detail'),
+    path('portfolio/', pages.portfolio, name='portfolio'),
+    path('portfolio/<slug:slug>/', pages.portfolio_detail, name='portfolio_detail'),
+    path('blog/', pages.blog, name='blog'),
+    path('blog/<slug:slug>/', pages.blog_detail, name='blog_detail'),
+    path('careers/', pages.careers, name='careers'),
     path('careers/apply/<slug:slug>/', views.career_apply, name='career_apply'),
     path('contact/', views.contact, name='contact'),
+    path('search/', views.search, name='search'),
     path('newsletter/subscribe/', views.newsletter_subscribe, name='newsletter_subscribe'),
+    path('newsletter/unsubscribe/<str:token>/', views.newsletter_unsubscribe, name='newsletter_unsubscribe'),
 ]
@@ -1,15 +1,54 @@
+from django.conf import settings
+from django.core import signing
+from django.http import Http404
 from django.shortcuts import render, redirect, get_object_or_404
+from django.urls import reverse
 from django.contrib import messages
+from django.db import transaction
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
 from django.core.paginator import Paginator
 from .models import (
     TeamMember, Service, Portfolio, BlogPost, 
-    Testimonial, JobListing, ContactSubmission
+    Testimonial, JobListing, ContactSubmission, NewsletterSubscriber
 )
 from .forms import ContactForm, CareerApplicationForm, NewsletterForm, ConsultationForm
+from . import campaigns, facets, jobs, tasks
+from .pagination import KeysetPaginator
+from .related import related_items
+from .search import search as search_content
+from .uploads import RESUME_FIELD, ResumeUploadHandler
+from .cache import FRAGMENT_CACHE_TIMEOUT, get_versions, cache_public_page, conditional_content
 
+# Keyset orderings: the model's default ordering made unique with the primary key,
+# matching the portfolio_listing_idx / blogpost_published_idx indexes
+PORTFOLIO_KEYSET_ORDERING = ['-featured', 'order', '-completion_date', 'id']
+BLOG_KEYSET_ORDERING = ['-published_date', 'id']
 
+
+def paginate(request, queryset, keyset_ordering, per_page=9):
+    """
+    Paginate a listing by ?page=N (offset) or ?cursor=... (keyset).
+
+    Numbered pages keep working for old links; with KEYSET_PAGINATION enabled,
+    unnumbered requests use cursors so deep pages cost the same as the first.
+    """
+    page_number = request.GET.get('page')
+    cursor = request.GET.get('cursor')
+    if cursor or (settings.KEYSET_PAGINATION and not page_number):
+        return KeysetPaginator(queryset, per_page, keyset_ordering).get_page(cursor)
+    return Paginator(queryset, per_page).get_page(page_number)
+
+
+def share_url(post):
+    """A post's public address for share links, from SITE_URL rather than the request's Host"""
+    return settings.SITE_URL.rstrip('/') + reverse('QbixSolutions:blog_detail', args=[post.slug])
+
+
+@conditional_content('service', 'portfolio', 'testimonial', 'blogpost')
+@cache_public_page('service', 'portfolio', 'testimonial', 'blogpost')
 def home(request):
     """Home page with hero section, featured services, portfolio, testimonials, and blog"""
+    # Querysets are lazy; sections served from the fragment cache never hit the database
     services = Service.objects.all()[:3]
     portfolio_items = Portfolio.objects.filter(featured=True)[:6]
     testimonials = Testimonial.objects.filter(featured=True)[:4]
@@ -21,25 +60,29 @@ def home(request):
     if request.method == 'POST' and 'consultation_submit' in request.POST:
         consultation_form = ConsultationForm(request.POST)
         if consultation_form.is_valid():
-            # Save as contact submission
-            ContactSubmission.objects.create(
-                name=consultation_form.cleaned_data['name'],
-                email=consultation_form.cleaned_data['email'],
-                phone=consultation_form.cleaned_data['phone'],
-                service=consultation_form.cleaned_data['service'],
-                message=consultation_form.cleaned_data['message']
-            )
+            # Save as contact submission; staff are emailed by the job worker
+            with transaction.atomic():
+                submission = ContactSubmission.objects.create(
+                    name=consultation_form.cleaned_data['name'],
+                    email=consultation_form.cleaned_data['email'],
+                    phone=consultation_form.cleaned_data['phone'],
+                    service=consultation_form.cleaned_data['service'],
+                    message=consultation_form.cleaned_data['message']
+                )
+                jobs.enqueue(tasks.NOTIFY_CONTACT_SUBMISSION, {'submission_id': submission.pk})
             messages.success(request, 'Thank you! We will contact you soon for your free consultation.')
-            return redirect('home')
+            return redirect('QbixSolutions:home')
     
     # Handle newsletter subscription
     newsletter_form = NewsletterForm()
     if request.method == 'POST' and 'newsletter_submit' in request.POST:
         newsletter_form = NewsletterForm(request.POST)
         if newsletter_form.is_valid():
-            newsletter_form.save()
+            with transaction.atomic():
+                subscriber = newsletter_form.save()
+                jobs.enqueue(tasks.CONFIRM_SUBSCRIBER, {'subscriber_id': subscriber.pk})
             messages.success(request, 'Successfully subscribed to our newsletter!')
-            return redirect('home')
+            return redirect('QbixSolutions:home')
     
     context = {
         'services': services,
@@ -48,10 +91,14 @@ def home(request):
         'blog_posts': blog_posts,
         'consultation_form': consultation_form,
         'newsletter_form': newsletter_form,
+        'fragment_versions': get_versions('service', 'portfolio', 'testimonial', 'blogpost'),
+        'fragment_timeout': FRAGMENT_CACHE_TIMEOUT,
     }
     return render(request, 'index.html', context)
 
 
+@conditional_content('teammember')
+@cache_public_page('teammember')
 def about(request):
     """About Us page with company vision and team members"""
     team_members = TeamMember.objects.all()[:5]
@@ -62,6 +109,8 @@ def about(request):
     return render(request, 'about.html', context)
 
 
+@conditional_content('service')
+@cache_public_page('service')
 def services(request):
     """Services page showing all available services"""
     all_services = Service.objects.all()
@@ -72,6 +121,8 @@ def services(request):
     return render(request, 'services.html', context)
 
 
+@conditional_content('service')
+@cache_public_page('service')
 def service_detail(request, slug):
     """Individual service detail page"""
     service = get_object_or_404(Service, slug=slug)
@@ -84,6 +135,8 @@ def service_detail(request, slug):
     return render(request, 'service_detail.html', context)
 
 
+@conditional_content('portfolio')
+@cache_public_page('portfolio')
 def portfolio(request):
     """Portfolio page with all projects"""
     all_portfolio = Portfolio.objects.all()
@@ -93,30 +146,27 @@ def portfolio(request):
     if category:
         all_portfolio = all_portfolio.filter(category=category)
     
-    # Get category choices with display names
-    category_choices = Portfolio.CATEGORY_CHOICES
-    
-    # Get categories that actually have projects
-    existing_categories = Portfolio.objects.values_list('category', flat=True).distinct()
-    available_categories = [(code, name) for code, name in category_choices if code in existing_categories]
+    # Categories that actually have projects, with counts (cached per content version)
+    available_categories = facets.portfolio_categories()
     
     # Pagination
-    paginator = Paginator(all_portfolio, 9)
-    page_number = request.GET.get('page')
-    portfolio_items = paginator.get_page(page_number)
+    portfolio_items = paginate(request, all_portfolio, PORTFOLIO_KEYSET_ORDERING)
     
     context = {
         'portfolio_items': portfolio_items,
         'categories': available_categories,
         'selected_category': category,
+        'total_count': sum(count for code, name, count in available_categories),
     }
     return render(request, 'portfolio.html', context)
 
 
+@conditional_content('portfolio')
+@cache_public_page('portfolio')
 def portfolio_detail(request, slug):
     """Individual portfolio item detail page"""
     portfolio_item = get_object_or_404(Portfolio, slug=slug)
-    related_projects = Portfolio.objects.exclude(slug=slug).filter(category=portfolio_item.category)[:3]
+    related_projects = related_items(portfolio_item)
     
     context = {
         'portfolio_item': portfolio_item,
@@ -125,6 +175,8 @@ def portfolio_detail(request, slug):
     return render(request, 'portfolio_detail.html', context)
 
 
+@conditional_content('blogpost')
+@cache_public_page('blogpost')
 def blog(request):
     """Blog listing page"""
     all_posts = BlogPost.objects.all()
@@ -134,13 +186,11 @@ def blog(request):
     if category:
         all_posts = all_posts.filter(category=category)
     
-    # Get unique categories
-    categories = BlogPost.objects.values_list('category', flat=True).distinct()
+    # Unique categories with counts (cached per content version)
+    categories = facets.blog_categories()
     
     # Pagination
-    paginator = Paginator(all_posts, 9)
-    page_number = request.GET.get('page')
-    blog_posts = paginator.get_page(page_number)
+    blog_posts = paginate(request, all_posts, BLOG_KEYSET_ORDERING)
     
     # Featured posts
     featured_posts = BlogPost.objects.filter(featured=True)[:3]
@@ -149,23 +199,29 @@ def blog(request):
         'blog_posts': blog_posts,
         'categories': categories,
         'selected_category': category,
+        'total_count': sum(count for name, count in categories),
         'featured_posts': featured_posts,
     }
     return render(request, 'blog.html', context)
 
 
+@conditional_content('blogpost')
+@cache_public_page('blogpost')
 def blog_detail(request, slug):
     """Individual blog post detail page"""
     post = get_object_or_404(BlogPost, slug=slug)
-    related_posts = BlogPost.objects.exclude(slug=slug).filter(category=post.category)[:3]
+    related_posts = related_items(post)
     
     context = {
         'post': post,
         'related_posts': related_posts,
+        'share_url': share_url(post),
     }
     return render(request, 'blog_detail.html', context)
 
 
+@conditional_content('joblisting')
+@cache_public_page('joblisting')
 def careers(request):
     """Careers page with job listings"""
     job_listings = JobListing.objects.filter(active=True)
@@ -175,29 +231,53 @@ def careers(request):
     if department:
         job_listings = job_listings.filter(department=department)
     
-    # Get unique departments
-    departments = JobListing.objects.filter(active=True).values_list('department', flat=True).distinct()
+    # Unique departments of active listings with counts (cached per content version)
+    departments = facets.job_departments()
     
     context = {
         'job_listings': job_listings,
         'departments': departments,
         'selected_department': department,
+        'total_count': sum(count for name, count in departments),
     }
     return render(request, 'careers.html', context)
 
 
+@csrf_exempt
 def career_apply(request, slug):
     """Career application page for a specific job"""
+    # Upload handlers must be swapped before anything reads the body, which the
+    # CSRF middleware would do; the check is made by _career_apply instead
     job = get_object_or_404(JobListing, slug=slug, active=True)
-    
+    handler = ResumeUploadHandler(request)
+    request.upload_handlers.insert(0, handler)
+    try:
+        return _career_apply(request, job, handler)
+    finally:
+        # The résumé was stored while the body streamed, before the CSRF check
+        # and validation; a failed check, invalid form or error must not keep it
+        handler.discard_unsaved()
+
+
+@csrf_protect
+def _career_apply(request, job, handler):
     if request.method == 'POST':
-        form = CareerApplicationForm(request.POST, request.FILES)
+        files = request.FILES
+        if handler.upload is not None and RESUME_FIELD not in files:
+            # Reading stopped at the résumé (too large); let the form say so
+            files = files.copy()
+            files[RESUME_FIELD] = handler.upload
+        form = CareerApplicationForm(request.POST, files)
         if form.is_valid():
             application = form.save(commit=False)
             application.job = job
-            application.save()
+            with transaction.atomic():
+                application.save()
+                jobs.enqueue(tasks.ACKNOWLEDGE_APPLICATION, {'application_id': application.pk})
+            if handler.upload is not None:
+                handler.upload.keep()
             messages.success(request, f'Your application for {job.title} has been submitted successfully!')
-            return redirect('careers')
+            return redirect('QbixSolutions:careers')
     else:
         form = CareerApplicationForm()
     
@@ -213,9 +293,11 @@ def contact(request):
     if request.method == 'POST':
         form = ContactForm(request.POST)
         if form.is_valid():
-            form.save()
+            with transaction.atomic():
+                submission = form.save()
+                jobs.enqueue(tasks.NOTIFY_CONTACT_SUBMISSION, {'submission_id': submission.pk})
             messages.success(request, 'Thank you for contacting us! We will get back to you soon.')
-            return redirect('contact')
+            return redirect('QbixSolutions:contact')
     else:
         form = ContactForm()
     
@@ -225,15 +307,57 @@ def contact(request):
     return render(request, 'contact.html', context)
 
 
+def search(request):
+    """Full-text search across blog posts and portfolio items"""
+    query = request.GET.get('q', '').strip()
+    
+    # Pagination; each page is a single ranked query against the search index
+    paginator = Paginator(search_content(query), 10)
+    page_number = request.GET.get('page')
+    results = paginator.get_page(page_number)
+    
+    context = {
+        'query': query,
+        'results': results,
+    }
+    return render(request, 'search.html', context)
+
+
 def newsletter_subscribe(request):
     """Handle newsletter subscription from footer"""
     if request.method == 'POST':
         form = NewsletterForm(request.POST)
         if form.is_valid():
-            form.save()
+            with transaction.atomic():
+                subscriber = form.save()
+                jobs.enqueue(tasks.CONFIRM_SUBSCRIBER, {'subscriber_id': subscriber.pk})
             messages.success(request, 'Successfully subscribed to our newsletter!')
         else:
             messages.error(request, 'Please provide a valid email address.')
     
     # Redirect back to the referring page or home
-    return redirect(request.META.get('HTTP_REFERER', 'home'))
+    return redirect(request.META.get('HTTP_REFERER', 'QbixSolutions:home'))
+
+
+@csrf_exempt
+def newsletter_unsubscribe(request, token):
+    """
+    Unsubscribe link from campaign emails. GET asks for confirmation, so link
+    scanners cannot unsubscribe anyone; POST unsubscribes. The signed token is
+    the credential, which also lets mail clients POST a one-click unsubscribe.
+    """
+    try:
+        subscriber_id = campaigns.subscriber_for_token(token)
+    except signing.BadSignature:
+        raise Http404("Invalid unsubscribe link")
+    subscriber = get_object_or_404(NewsletterSubscriber, pk=subscriber_id)
+    
+    unsubscribed = request.method == 'POST'
+    if unsubscribed:
+        NewsletterSubscriber.objects.filter(pk=subscriber.pk).update(active=False)
+    
+    context = {
+        'subscriber': subscriber,
+        'unsubscribed': unsubscribed or not subscriber.active,
+    }
+    return render(request, 'newsletter_unsubscribe.html', context)
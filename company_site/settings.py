@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -25,7 +26,11 @@ SECRET_KEY = 'django-insecure-2_=0zo8#e^9i$dc*e60&o26g$^p*rrg7!gcuse#_vrq0(tv=6i
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = False
 
-ALLOWED_HOSTS = ['*']
+# Comma-separated host names this site answers to. Never '*': cached pages are
+# shared between visitors, so a forged Host header must be refused, not rendered.
+ALLOWED_HOSTS = os.environ.get(
+    'ALLOWED_HOSTS', 'qbixsolution.com,www.qbixsolution.com,localhost,127.0.0.1,[::1]',
+).split(',')
 
 
 # Application definition
@@ -37,12 +42,16 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.sitemaps',
     'QbixSolutions',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     "whitenoise.middleware.WhiteNoiseMiddleware",  # <-- ADD THIS LINE HERE
+    'QbixSolutions.profiling.RenderProfileMiddleware',
+    'QbixSolutions.compression.CompressionMiddleware',
+    'QbixSolutions.replicas.PrimaryPinMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -57,13 +66,22 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
             ],
+            # Compile each template once per process, unless DEBUG (where
+            # edits should show up on reload). Spelled out rather than left
+            # to Django's default, which would silently follow DEBUG too.
+            'loaders': [
+                'django.template.loaders.app_directories.Loader',
+            ] if DEBUG else [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
         },
     },
 ]
@@ -73,13 +91,201 @@ WSGI_APPLICATION = 'company_site.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
-
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# DATABASE_ENGINE=postgres connects with DATABASE_NAME/USER/PASSWORD/HOST/PORT
+# and keeps connections between requests: DATABASE_POOL=1 uses Django's psycopg
+# connection pool (needs psycopg[pool]; a pool cannot be combined with
+# CONN_MAX_AGE), otherwise each worker thread reuses its connection for
+# DATABASE_CONN_MAX_AGE seconds.
+# The default, SQLite, runs in WAL mode so reads never wait for a writer;
+# transactions take the write lock when they begin (IMMEDIATE) and a writer
+# waits up to 20 seconds for it instead of failing with "database is locked".
+
+DATABASE_ENGINE = os.environ.get('DATABASE_ENGINE', 'sqlite')
+
+if DATABASE_ENGINE == 'postgres':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('DATABASE_NAME', 'qbix'),
+            'USER': os.environ.get('DATABASE_USER', ''),
+            'PASSWORD': os.environ.get('DATABASE_PASSWORD', ''),
+            'HOST': os.environ.get('DATABASE_HOST', ''),
+            'PORT': os.environ.get('DATABASE_PORT', ''),
+            'CONN_HEALTH_CHECKS': True,
+        }
     }
+    if os.environ.get('DATABASE_POOL') == '1':
+        DATABASES['default']['OPTIONS'] = {
+            'pool': {
+                'min_size': int(os.environ.get('DATABASE_POOL_MIN', 2)),
+                'max_size': int(os.environ.get('DATABASE_POOL_MAX', 10)),
+                # Seconds a request waits for a free connection
+                'timeout': 10,
+            },
+        }
+    else:
+        DATABASES['default']['CONN_MAX_AGE'] = int(os.environ.get('DATABASE_CONN_MAX_AGE', 60))
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('DATABASE_NAME', BASE_DIR / 'db.sqlite3'),
+            'OPTIONS': {
+                'transaction_mode': 'IMMEDIATE',
+                # Busy timeout, in seconds
+                'timeout': 20,
+                'init_command': (
+                    'PRAGMA journal_mode=WAL;'
+                    'PRAGMA synchronous=NORMAL;'
+                    'PRAGMA mmap_size=134217728;'
+                    'PRAGMA temp_store=MEMORY;'
+                ),
+            },
+        }
+    }
+
+# Read replicas: DATABASE_REPLICAS is a comma-separated list of hosts (PostgreSQL,
+# same name and credentials as the primary) or of database files (SQLite). Public
+# reads of the content models are spread over them; writes, the admin and a
+# client's requests shortly after it POSTs use the primary (QbixSolutions/replicas.py).
+READ_REPLICAS = []
+for number, location in enumerate(filter(None, os.environ.get('DATABASE_REPLICAS', '').split(',')), 1):
+    alias = f'replica{number}'
+    key = 'HOST' if DATABASE_ENGINE == 'postgres' else 'NAME'
+    DATABASES[alias] = {**DATABASES['default'], key: location.strip(), 'TEST': {'MIRROR': 'default'}}
+    READ_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['QbixSolutions.replicas.ReplicaRouter']
+
+# Seconds a client keeps reading from the primary after it POSTs
+REPLICA_PIN_SECONDS = 5
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# CACHE_BACKEND=file (the default unless DEBUG) shares one cache directory
+# between all gunicorn workers and the worker/cron processes, so a version bump
+# in any of them invalidates pages and fragments for every worker.
+# CACHE_BACKEND=locmem keeps a per-process cache: only for a single process, as
+# under DEBUG. The test runner always uses one (TEST_RUNNER below).
+# CACHE_BACKEND=dummy turns caching off (benchmarks).
+#
+# The content version counters (QbixSolutions/cache.py) live in a "versions"
+# cache of their own. The default cache fills up with pages (per host, path and
+# parameters) and with entries of superseded versions that linger until they
+# expire; once full it deletes a random 1/CULL_FREQUENCY of its entries, which
+# must never take a counter with it and invalidate everything at once.
+
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'locmem' if DEBUG else 'file')
+CACHE_LOCATION = os.environ.get('CACHE_LOCATION', str(BASE_DIR / 'cache'))
+
+# Django's default of 300 entries would be culled constantly
+CACHE_OPTIONS = {
+    'MAX_ENTRIES': int(os.environ.get('CACHE_MAX_ENTRIES', 10000)),
+    'CULL_FREQUENCY': 4,
 }
+# A dozen keys in use (a counter and a recently-changed flag per model)
+VERSION_CACHE_OPTIONS = {'MAX_ENTRIES': 1000}
+
+if CACHE_BACKEND == 'file':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': CACHE_LOCATION,
+            'OPTIONS': CACHE_OPTIONS,
+        },
+        'versions': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.path.join(CACHE_LOCATION, 'versions'),
+            'OPTIONS': VERSION_CACHE_OPTIONS,
+        },
+    }
+elif CACHE_BACKEND == 'dummy':
+    # No caching at all, to measure what the views themselves cost
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+        },
+        'versions': {
+            'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+        },
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'qbix-default',
+            'OPTIONS': CACHE_OPTIONS,
+        },
+        'versions': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'qbix-versions',
+            'OPTIONS': VERSION_CACHE_OPTIONS,
+        },
+    }
+
+# Runs the test suite on a per-process locmem cache whatever CACHE_BACKEND says,
+# so test runs never read or clear a shared cache (company_site/test_runner.py)
+TEST_RUNNER = 'company_site.test_runner.TestRunner'
+
+# Seconds a rendered home-page section may live; edits invalidate it immediately
+FRAGMENT_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Seconds a full page is served to anonymous visitors; edits invalidate it immediately
+PAGE_CACHE_TIMEOUT = 60 * 60
+
+# Serve the read-only public pages with their async variants (QbixSolutions/
+# async_views.py), whose independent queries run concurrently. Only worth it
+# under ASGI (uvicorn workers); under WSGI each async view pays for its own
+# event loop.
+ASYNC_VIEWS = os.environ.get('ASYNC_VIEWS') == '1'
+
+# Benchmarks only: add this many milliseconds to every query, to simulate a
+# database across a network (manage.py benchmark_async)
+BENCHMARK_QUERY_DELAY_MS = float(os.environ.get('BENCHMARK_QUERY_DELAY_MS', 0))
+
+# Time every request's templates, {% block %}s and queries, send the figures
+# in a Server-Timing header and keep the last RENDER_PROFILE_SIZE for staff at
+# /admin/render-profile/ (QbixSolutions/profiling.py). Costs a little per render.
+RENDER_PROFILING = os.environ.get('RENDER_PROFILING') == '1'
+RENDER_PROFILE_SIZE = int(os.environ.get('RENDER_PROFILE_SIZE', 500))
+
+# Collapse whitespace and drop comments in HTML responses (CompressionMiddleware);
+# cached pages are minified once, when they are stored
+HTML_MINIFY = True
+
+
+# Blog and portfolio listings: True serves unnumbered pages with cursor (keyset)
+# pagination; numbered ?page=N links are always honoured
+KEYSET_PAGINATION = False
+
+# Resize uploaded images on a background thread after the save commits;
+# False generates them inline (tests, or hosts that forbid threads)
+IMAGE_DERIVATIVES_ASYNC = True
+
+
+# Email is only sent by the job worker (manage.py run_worker), never while a
+# request waits. The console backend just prints messages; set EMAIL_BACKEND to
+# django.core.mail.backends.smtp.EmailBackend in production.
+EMAIL_BACKEND = os.environ.get('EMAIL_BACKEND', 'django.core.mail.backends.console.EmailBackend')
+EMAIL_HOST = os.environ.get('EMAIL_HOST', 'localhost')
+EMAIL_PORT = int(os.environ.get('EMAIL_PORT', 25))
+EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER', '')
+EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD', '')
+EMAIL_USE_TLS = os.environ.get('EMAIL_USE_TLS', '') == '1'
+DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'Qbix Solutions <noreply@qbixsolution.com>')
+SERVER_EMAIL = DEFAULT_FROM_EMAIL
+
+# Staff notified of contact form and consultation requests
+MANAGERS = [('Qbix Solutions', os.environ.get('CONTACT_EMAIL', 'info@qbixsolution.com'))]
+
+# Public address of the site, for links in emails (no request to build them from)
+SITE_URL = os.environ.get('SITE_URL', 'https://qbixsolution.com')
+
+# Newsletter campaigns: messages per second across all sending threads (0 for
+# no limit; match the mail provider's quota) and SMTP connections used at once
+NEWSLETTER_SEND_RATE = float(os.environ.get('NEWSLETTER_SEND_RATE', 10))
+NEWSLETTER_SEND_CONCURRENCY = int(os.environ.get('NEWSLETTER_SEND_CONCURRENCY', 2))
 
 
 # Password validation
@@ -117,13 +323,15 @@ USE_TZ = True
 STATIC_URL = '/static/'
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
-# ADD THIS SECTION BELOW STATIC_ROOT
+# collectstatic minifies CSS/JS, writes per-page critical CSS and stores every
+# file under a content-hashed name, which whitenoise serves with a far-future
+# immutable Cache-Control header (see QbixSolutions/storage.py)
 STORAGES = {
     "default": {
         "BACKEND": "django.core.files.storage.FileSystemStorage",
     },
     "staticfiles": {
-        "BACKEND": "whitenoise.storage.CompressedStaticFilesStorage",  # <--- REMOVED "Manifest"
+        "BACKEND": "QbixSolutions.storage.StaticFilesStorage",
     },
 }
 
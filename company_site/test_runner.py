@@ -0,0 +1,32 @@
+"""
+Test runner for ``manage.py test``.
+
+Outside DEBUG the settings default to the shared file cache, which the tests
+must neither read from nor clear. The suite runs on per-process locmem caches
+instead, whatever CACHE_BACKEND is set to.
+"""
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+TEST_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'qbix-tests',
+    },
+    'versions': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'qbix-tests-versions',
+    },
+}
+
+
+class TestRunner(DiscoverRunner):
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.test_caches = override_settings(CACHES=TEST_CACHES)
+        self.test_caches.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.test_caches.disable()
+        super().teardown_test_environment(**kwargs)
@@ -19,12 +19,15 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 from django.views.static import serve
+from QbixSolutions import profiling, sitemaps
 import os
 
 urlpatterns = [
+    path('admin/render-profile/', profiling.report, name='render_profile'),
     path('admin/', admin.site.urls),
     path('', include('QbixSolutions.urls')),
-    path('sitemap.xml', serve, {'document_root': os.path.join(settings.BASE_DIR, 'static'), 'path': 'sitemap.xml'}),
+    path('sitemap.xml', sitemaps.index, name='sitemap'),
+    path('sitemap-<slug:section>.xml', sitemaps.section, name='sitemap_section'),
     path('robots.txt', serve, {'document_root': os.path.join(settings.BASE_DIR, 'static'), 'path': 'robots.txt'}),
 ]
 